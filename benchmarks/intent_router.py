@@ -0,0 +1,34 @@
+"""
+自然語句路由基準測試：量測 IntentRouter 對一般訊息的每則路由成本。
+
+執行方式:
+    uv run python benchmarks/intent_router.py
+"""
+
+import timeit
+from functools import partial
+
+from lineaihelper.intent_router import IntentRouter
+
+MESSAGES = [
+    "2330 多少",
+    "台積電股價",
+    "幫我分析一下鴻海",
+    "輝達最近走勢如何",
+    "今天天氣真好，晚上要不要一起吃飯？",
+    "I like pineapple",
+]
+
+
+def main() -> None:
+    router = IntentRouter()
+    for text in MESSAGES:
+        runs = 2000
+        best = min(timeit.repeat(partial(router.route, text), number=runs, repeat=5))
+        intent = router.route(text)
+        routed = intent.to_command() if intent else "(fallback)"
+        print(f"{text:<24} -> {routed:<18} {best * 1e6 / runs:6.1f} us")
+
+
+if __name__ == "__main__":
+    main()
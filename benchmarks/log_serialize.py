@@ -0,0 +1,59 @@
+"""
+日誌序列化基準測試：比較 json.dumps 與 orjson 序列化同一筆紀錄的成本。
+
+執行方式:
+    uv run python benchmarks/log_serialize.py
+"""
+
+import json
+import timeit
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from lineaihelper.logging_config import serialize_bytes
+
+RECORD = {
+    "time": datetime.now(timezone.utc),
+    "level": SimpleNamespace(name="INFO", no=20),
+    "message": "收到使用者訊息",
+    "name": "lineaihelper.main",
+    "function": "handle_message",
+    "line": 240,
+    "extra": {
+        "trace_id": "4bf92f35-77b3-4da6-a3ce-929d0e0e4736",
+        "request_id": "0f8fad5b-d9cb-469f-a165-70867728950e",
+        "line_inbound_id": "N/A",
+        "extra": {"user_text": ".stock 2330 trend", "reply_token": "r" * 32},
+    },
+    "exception": None,
+}
+
+
+def json_dumps(record: dict) -> str:
+    return json.dumps(
+        {
+            "timestamp": record["time"].isoformat(),
+            "level": record["level"].name,
+            "message": record["message"],
+            "module": record["name"],
+            "function": record["function"],
+            "line": record["line"],
+            "extra": record["extra"],
+        },
+        ensure_ascii=False,
+    )
+
+
+def main() -> None:
+    cases = {
+        "json.dumps": lambda: json_dumps(RECORD),
+        "serialize_bytes (orjson)": lambda: serialize_bytes(RECORD),
+    }
+    for name, fn in cases.items():
+        runs = 20_000
+        best = min(timeit.repeat(fn, number=runs, repeat=5)) / runs
+        print(f"{name:<28} {best * 1e6:6.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
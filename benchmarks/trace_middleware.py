@@ -0,0 +1,121 @@
+"""
+追蹤 Middleware 成本基準測試：比較原本的 @app.middleware("http") 實作
+(uuid4 + BaseHTTPMiddleware) 與純 ASGI 的 TraceIdMiddleware 每請求成本。
+
+以直接呼叫 ASGI app 的方式量測 (不經網路與 uvicorn)，並移除日誌 sink，
+僅反映 Middleware 本身的額外負擔。
+
+執行方式:
+    uv run python benchmarks/trace_middleware.py [請求數量]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from collections.abc import Callable
+
+from fastapi import FastAPI, Request, Response
+from loguru import logger
+from starlette.types import Message
+
+from lineaihelper.context import line_inbound_id_var, request_id_var, trace_id_var
+from lineaihelper.middlewares import TraceIdMiddleware
+
+
+async def legacy_middleware(request: Request, call_next: Callable) -> Response:
+    """改寫前的實作 (保留於此作為比較基準)"""
+    trace_id = request.headers.get("x-trace-id", str(uuid.uuid4()))
+    request_id = str(uuid.uuid4())
+    line_inbound_id = request.headers.get("x-line-request-id", "N/A")
+    t_token = trace_id_var.set(trace_id)
+    r_token = request_id_var.set(request_id)
+    l_token = line_inbound_id_var.set(line_inbound_id)
+    with logger.contextualize(
+        trace_id=trace_id, request_id=request_id, line_inbound_id=line_inbound_id
+    ):
+        logger.info(
+            "開始處理請求",
+            extra={"method": request.method, "path": request.url.path},
+        )
+        try:
+            response: Response = await call_next(request)
+            response.headers["x-trace-id"] = trace_id
+            response.headers["x-request-id"] = request_id
+            return response
+        finally:
+            trace_id_var.reset(t_token)
+            request_id_var.reset(r_token)
+            line_inbound_id_var.reset(l_token)
+
+
+def build_app(kind: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "healthy"}
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {"ok": True}
+
+    if kind == "legacy":
+        app.middleware("http")(legacy_middleware)
+    elif kind == "asgi":
+        app.add_middleware(TraceIdMiddleware, skip_paths=["/health"])
+    return app
+
+
+async def measure(app: FastAPI, path: str, n_requests: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        return None
+
+    for _ in range(100):  # 暖機 (建立路由與 Middleware 堆疊)
+        await app(dict(scope), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(n_requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / n_requests
+
+
+async def main() -> None:
+    n_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    logger.remove()
+
+    kinds = ("none", "legacy", "asgi")
+    apps = {kind: build_app(kind) for kind in kinds}
+    for path in ("/ping", "/health"):
+        # 交錯量測各實作並取最小值，降低機器負載波動的影響
+        best = {kind: float("inf") for kind in kinds}
+        for _ in range(7):
+            for kind in kinds:
+                elapsed = await measure(apps[kind], path, n_requests)
+                best[kind] = min(best[kind], elapsed)
+        print(f"{path} (no middleware: {best['none'] * 1e6:.1f} us/request)")
+        for kind in ("legacy", "asgi"):
+            overhead = (best[kind] - best["none"]) * 1e6
+            print(f"  {kind:<8} {overhead:8.1f} us/request overhead")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Webhook 入口成本基準測試：比較 LINE SDK WebhookParser 與輕量解析路徑的每事件成本。
+
+執行方式:
+    uv run python benchmarks/webhook_ingress.py [事件數量]
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import sys
+import timeit
+
+from linebot.v3 import WebhookParser
+
+from lineaihelper.webhook import parse_webhook
+
+SECRET = "benchmark-secret"
+
+
+def build_payload(n_events: int) -> bytes:
+    events = [
+        {
+            "type": "message",
+            "mode": "active",
+            "timestamp": 1700000000000,
+            "webhookEventId": f"01HEVENT{i:06d}",
+            "deliveryContext": {"isRedelivery": False},
+            "replyToken": f"reply-token-{i}",
+            "source": {"type": "user", "userId": f"U{i:032d}"},
+            "message": {"type": "text", "id": str(i), "text": f".price 23{i:02d}"},
+        }
+        for i in range(n_events)
+    ]
+    return json.dumps({"destination": "U0", "events": events}).encode("utf-8")
+
+
+def sign(body: bytes) -> str:
+    digest = hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+def main() -> None:
+    n_events = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    body = build_payload(n_events)
+    signature = sign(body)
+    sdk_parser = WebhookParser(SECRET)
+
+    cases = {
+        "sdk WebhookParser.parse": lambda: sdk_parser.parse(
+            body.decode("utf-8"), signature
+        ),
+        "lineaihelper.webhook.parse_webhook": lambda: parse_webhook(
+            body, signature, SECRET
+        ),
+    }
+
+    print(f"events per delivery: {n_events}")
+    for name, fn in cases.items():
+        runs = 200
+        best = min(timeit.repeat(fn, number=runs, repeat=5)) / runs
+        print(f"{name:<40} {best * 1e6 / n_events:8.1f} us/event")
+
+
+if __name__ == "__main__":
+    main()
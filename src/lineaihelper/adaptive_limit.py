@@ -0,0 +1,177 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+from typing import Any, AsyncIterator, Callable, Deque, NoReturn, Optional
+
+from loguru import logger
+
+from lineaihelper.exceptions import DependencyOverloadedError
+from lineaihelper.metrics import REGISTRY
+
+CONCURRENCY_LIMIT = REGISTRY.gauge(
+    "linenexus_concurrency_limit",
+    "Current adaptive concurrency limit, by dependency.",
+    ("dependency",),
+)
+CONCURRENCY_IN_FLIGHT = REGISTRY.gauge(
+    "linenexus_concurrency_in_flight",
+    "Outbound calls currently holding a concurrency slot, by dependency.",
+    ("dependency",),
+)
+CONCURRENCY_REJECTED = REGISTRY.counter(
+    "linenexus_concurrency_rejected_total",
+    "Outbound calls rejected because the concurrency limit was reached.",
+    ("dependency",),
+)
+
+
+def _any_error(exc: BaseException) -> bool:
+    return True
+
+
+class AdaptiveLimiter:
+    """
+    依觀測到的延遲與錯誤自動調整的並發上限 (AIMD)。
+
+    呼叫成功且延遲低於 latency_threshold 時上限每輪約加 1 (每次 +1/limit)；
+    延遲超過門檻、逾時或 is_congestion 判定為上游壅塞的錯誤時乘以 backoff。
+    於上次調降前就已發出的請求不會再次調降，避免同一波壅塞讓上限一路降到底。
+    無空位時最多等待 max_wait 秒，之後立即以 DependencyOverloadedError 拒絕，
+    讓過載轉為快速失敗而非排隊等到逾時。
+
+    Example:
+        async with limiter.slot():
+            quote = await provider.get_quote(symbol)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_threshold: float = 5.0,
+        backoff: float = 0.7,
+        max_wait: float = 1.0,
+        is_congestion: Callable[[BaseException], bool] = _any_error,
+        message: str = "外部服務目前忙碌中，請稍後再試。",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_threshold = latency_threshold
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.is_congestion = is_congestion
+        self.message = message
+        self._clock = clock
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._last_decrease = -math.inf
+
+        CONCURRENCY_LIMIT.set_function(lambda: self.limit, name)
+        CONCURRENCY_IN_FLIGHT.set_function(lambda: self._in_flight, name)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """取得一個並發空位並依本次呼叫的結果調整上限"""
+        await self._acquire()
+        in_flight = self._in_flight
+        start = self._clock()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # 取消多半來自呼叫端的逾時；只有等待已超過門檻時才視為壅塞
+            if self._clock() - start > self.latency_threshold:
+                self._decrease(start, "timeout")
+            raise
+        except Exception as e:
+            if isinstance(e, TimeoutError) or self.is_congestion(e):
+                self._decrease(start, type(e).__name__)
+            raise
+        else:
+            if self._clock() - start > self.latency_threshold:
+                self._decrease(start, "latency")
+            elif in_flight >= self._limit / 2:
+                # 僅在實際用到上限的一半以上時放寬，避免離峰時上限無限制地成長
+                self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        if self.max_wait <= 0:
+            self._reject()
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=self.max_wait)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # 取消前已取得空位，需歸還
+                self._release()
+            else:
+                self._forget(waiter)
+            raise
+        if not waiter.done():
+            self._forget(waiter)
+            self._reject()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        # 空位直接轉交給等待者，計數不經過歸零再加回
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def _forget(self, waiter: "asyncio.Future[None]") -> None:
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self) -> NoReturn:
+        CONCURRENCY_REJECTED.inc(self.name)
+        raise DependencyOverloadedError(self.message)
+
+    def _decrease(self, started_at: float, reason: str) -> None:
+        if started_at < self._last_decrease:
+            return
+        self._last_decrease = self._clock()
+        previous = self.limit
+        self._limit = max(float(self.min_limit), math.floor(self._limit * self.backoff))
+        if self.limit != previous:
+            logger.info(
+                "Concurrency limit decreased",
+                extra={
+                    "dependency": self.name,
+                    "limit": self.limit,
+                    "previous": previous,
+                    "reason": reason,
+                },
+            )
+
+
+def limited(limiter: Optional[AdaptiveLimiter]) -> AbstractAsyncContextManager[Any]:
+    """limiter 為 None (未啟用) 時不限制"""
+    if limiter is None:
+        return nullcontext()
+    return limiter.slot()
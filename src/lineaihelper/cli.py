@@ -1,6 +1,7 @@
+import argparse
 import subprocess
 import sys
-from typing import NoReturn
+from typing import List, NoReturn, Optional
 
 
 def lint() -> NoReturn:
@@ -29,3 +30,136 @@ def type_check() -> NoReturn:
     print("Running Mypy...")
     result = subprocess.run(["mypy", "."])
     sys.exit(result.returncode)
+
+
+def trace(argv: Optional[List[str]] = None) -> NoReturn:
+    """依 trace_id 輸出各階段耗時瀑布圖"""
+    from lineaihelper.tracing import find_trace, format_waterfall
+
+    parser = argparse.ArgumentParser(
+        prog="trace", description="顯示單一請求的 Span 耗時瀑布圖"
+    )
+    parser.add_argument("trace_id", help="x-trace-id 或 OTLP traceId")
+    parser.add_argument(
+        "--file", default="logs/traces.jsonl", help="Span 檔案 (TRACE_EXPORT_PATH)"
+    )
+    args = parser.parse_args(argv)
+
+    spans = find_trace(args.file, args.trace_id)
+    print(format_waterfall(spans))
+    sys.exit(0 if spans else 1)
+
+
+def profile(argv: Optional[List[str]] = None) -> NoReturn:
+    """列出剖析檔或顯示最耗時的函式"""
+    from lineaihelper.profiling import list_profiles, profile_path, summarize
+
+    parser = argparse.ArgumentParser(prog="profile", description="檢視請求剖析結果")
+    parser.add_argument(
+        "--dir", default="logs/profiles", help="剖析檔目錄 (PROFILE_DIR)"
+    )
+    sub = parser.add_subparsers(dest="action", required=True)
+    sub.add_parser("list", help="列出所有剖析檔 (新到舊)")
+    show = sub.add_parser("show", help="顯示指定 trace_id 最耗時的函式")
+    show.add_argument("trace_id")
+    show.add_argument(
+        "--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"]
+    )
+    show.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.action == "list":
+        paths = list_profiles(args.dir)
+        for path in paths:
+            print(f"{path.stem}\t{path.stat().st_size / 1024:.1f} KB")
+        sys.exit(0 if paths else 1)
+
+    path = profile_path(args.dir, args.trace_id)
+    if not path.exists():
+        print(f"Profile not found: {path}")
+        sys.exit(1)
+    print(summarize(path, sort=args.sort, limit=args.limit))
+    sys.exit(0)
+
+
+def log_report(argv: Optional[List[str]] = None) -> NoReturn:
+    """串接日誌中的請求紀錄，輸出延遲百分位數表與 Parquet 明細"""
+    from lineaihelper.log_analytics import (
+        LatencyStats,
+        ParquetRowWriter,
+        format_table,
+        iter_log_files,
+        iter_requests,
+    )
+
+    parser = argparse.ArgumentParser(
+        prog="log-report", description="依指令與小時統計請求延遲"
+    )
+    parser.add_argument(
+        "paths", nargs="*", default=["logs"], help="日誌目錄或檔案 (含 .log.zip)"
+    )
+    parser.add_argument("--output", help="輸出每筆請求明細的 Parquet 檔")
+    parser.add_argument(
+        "--window", type=float, default=300.0, help="請求未結束的最長等待秒數"
+    )
+    args = parser.parse_args(argv)
+
+    files = iter_log_files(args.paths)
+    if not files:
+        print("No log files found.")
+        sys.exit(1)
+
+    writer = ParquetRowWriter(args.output) if args.output else None
+    stats = LatencyStats()
+    try:
+        for row in iter_requests(files, window=args.window):
+            stats.add(row)
+            if writer is not None:
+                writer.write(row)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(format_table("command", stats.by_command))
+    print()
+    print(format_table("hour (UTC)", stats.by_hour))
+    print()
+    print("  ".join(f"{k}={v}" for k, v in sorted(stats.statuses.items())))
+    if writer is not None:
+        print(f"Wrote {writer.rows_written} rows to {args.output}")
+    sys.exit(0)
+
+
+def import_report(argv: Optional[List[str]] = None) -> NoReturn:
+    """量測匯入模組的時間，列出最耗時的套件與模組"""
+    from lineaihelper.config import settings
+    from lineaihelper.lazy_imports import HEAVY_MODULES, measure_import, top_packages
+
+    parser = argparse.ArgumentParser(
+        prog="import-report", description="以 -X importtime 分析啟動匯入成本"
+    )
+    parser.add_argument("module", nargs="?", default="lineaihelper.main")
+    parser.add_argument("--limit", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    records = measure_import(args.module)
+    target = next((r for r in records if r.module == args.module), None)
+    total = target.cumulative_us / 1e6 if target else 0.0
+    print(
+        f"{args.module}: {total:.3f}s (budget {settings.IMPORT_TIME_BUDGET_SECONDS}s)"
+    )
+    print()
+    print(f"{'package':<32}{'self (ms)':>12}")
+    for package, self_us in top_packages(records)[: args.limit]:
+        print(f"{package:<32}{self_us / 1000:>12.1f}")
+    print()
+    print(f"{'module':<48}{'cumulative (ms)':>16}")
+    slowest = sorted(records, key=lambda r: r.cumulative_us, reverse=True)
+    for record in slowest[: args.limit]:
+        print(f"{record.module:<48}{record.cumulative_us / 1000:>16.1f}")
+
+    loaded = sorted({r.module for r in records} & set(HEAVY_MODULES))
+    if loaded:
+        print()
+        print(f"Heavy modules loaded at import: {', '.join(loaded)}")
+    sys.exit(0 if total <= settings.IMPORT_TIME_BUDGET_SECONDS and not loaded else 1)
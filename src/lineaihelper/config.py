@@ -1,3 +1,5 @@
+from typing import Dict, List, Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,7 +14,19 @@ class Settings(BaseSettings):
     APP_PORT: int = 8000
     DEBUG: bool = False
     ENVIRONMENT: str = "development"  # development, staging, production
+    # 正式環境啟動器 (uv run serve) 的 Worker 程序數
+    WORKERS: int = 1
+    # 預熱時先載入 LINE SDK / google-genai / yfinance 等重量級依賴
+    IMPORT_WARMUP_ENABLED: bool = True
+    # 匯入 lineaihelper.main 的時間上限 (秒)，由 tests/test_lazy_imports.py 檢查
+    IMPORT_TIME_BUDGET_SECONDS: float = 1.5
     LOG_JSON: bool = False
+    # 日誌檔目錄 (INFO / ERROR 分流檔與其輪替壓縮檔)
+    LOG_DIR: str = "logs"
+    # 日誌佇列上限 (滿時丟棄最舊紀錄) 與 INFO 取樣率 (可依訊息個別設定)
+    LOG_QUEUE_MAX_SIZE: int = 10_000
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+    LOG_SAMPLE_RATES: Dict[str, float] = {}
 
     # LINE Bot 設定
     LINE_CHANNEL_ACCESS_TOKEN: str
@@ -21,6 +35,141 @@ class Settings(BaseSettings):
     # AI 設定
     GEMINI_API_KEY: str
 
+    # 聊天對話記憶設定
+    CHAT_MEMORY_TOKENS_PER_USER: int = 2000
+    CHAT_MEMORY_MAX_USERS: int = 1000
+    CHAT_MEMORY_MAX_TOTAL_TOKENS: int = 500_000
+    CHAT_MEMORY_KEEP_RECENT_TURNS: int = 4
+    CHAT_SUMMARY_MAX_CHARS: int = 200
+
+    # 聊天近似問題快取設定
+    CHAT_CACHE_ENABLED: bool = True
+    CHAT_CACHE_THRESHOLD: float = 0.7
+    CHAT_CACHE_TTL_SECONDS: float = 600.0
+    CHAT_CACHE_MAX_ENTRIES: int = 2000
+
+    # 背景工作佇列設定
+    JOB_WORKERS: int = 8
+    JOB_QUEUE_MAX_SIZE: int = 100
+    JOB_QUEUE_MAX_PER_SOURCE: int = 20
+    JOB_DRAIN_TIMEOUT_SECONDS: float = 10.0
+
+    # 部署角色："all" 於同一程序接收並處理事件；"ingress" 僅驗證簽章並將事件
+    # 寫入持久化佇列，由獨立的 Worker 程序 (uv run worker) 消化
+    PROCESS_ROLE: Literal["all", "ingress"] = "all"
+    DURABLE_QUEUE_PATH: str = "run/jobs.db"
+    # 可見性逾時需大於 JOB_BUDGET_SECONDS，否則執行中的工作可能被重複領取
+    DURABLE_QUEUE_VISIBILITY_SECONDS: float = 180.0
+    DURABLE_QUEUE_MAX_ATTEMPTS: int = 3
+    DURABLE_QUEUE_POLL_INTERVAL_SECONDS: float = 0.2
+
+    # 回覆時限設定 (以 Webhook 事件時間為起點)
+    REPLY_TOKEN_TTL_SECONDS: float = 50.0
+    REPLY_ACK_AFTER_SECONDS: float = 20.0
+    JOB_BUDGET_SECONDS: float = 120.0
+    PUSH_FALLBACK_ENABLED: bool = True
+
+    # Webhook 事件去重設定
+    IDEMPOTENCY_TTL_SECONDS: float = 600.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 10_000
+
+    # 市場數據快取設定
+    QUOTE_CACHE_TTL_SECONDS: float = 10.0
+    HISTORY_CACHE_TTL_SECONDS: float = 300.0
+    # 依交易日曆 (calendars/*.yaml) 調整 TTL：上述 TTL 僅用於盤中與收盤後的
+    # 收盤價確認期，休市期間快取到下次開盤 (上限 MARKET_DATA_MAX_TTL_SECONDS)
+    MARKET_CALENDAR_ENABLED: bool = True
+    MARKET_SETTLE_SECONDS: float = 1800.0
+    MARKET_DATA_MAX_TTL_SECONDS: float = 21600.0
+    # 開盤時於背景重新預抓 WARMUP_SYMBOLS，避免第一位使用者承擔上游延遲
+    MARKET_OPEN_WARMUP_ENABLED: bool = True
+    # 上游失敗或斷路時，改回傳此時間內最後一次成功的行情 (標示為延遲資料)
+    MARKET_DATA_STALE_SECONDS: float = 86400.0
+
+    # 指令結果快取 (各指令 TTL 於 register_command 設定)
+    RESULT_CACHE_MAX_ENTRIES: int = 1000
+
+    # 跨 Worker 共享快取 (SQLite 檔案路徑，空字串代表停用)；
+    # 報價、K 線、指令結果、聊天回答與 Webhook 去重皆透過此檔案共享
+    SHARED_CACHE_PATH: str = ""
+    SHARED_CACHE_LEASE_SECONDS: float = 10.0
+
+    # Gemini 模型
+    GEMINI_MODEL: str = "gemini-2.5-flash"
+
+    # 外部依賴的自適應並發上限 (AIMD)：延遲超過門檻或上游壅塞時上限乘以
+    # ADAPTIVE_LIMIT_BACKOFF，健康時逐步放寬；等待超過 MAX_WAIT 仍無空位即拒絕
+    ADAPTIVE_LIMIT_ENABLED: bool = True
+    ADAPTIVE_LIMIT_BACKOFF: float = 0.7
+    ADAPTIVE_LIMIT_MAX_WAIT_SECONDS: float = 1.0
+    PROVIDER_LIMIT_INITIAL: int = 8
+    PROVIDER_LIMIT_MIN: int = 2
+    PROVIDER_LIMIT_MAX: int = 32
+    PROVIDER_LATENCY_THRESHOLD_SECONDS: float = 3.0
+    GEMINI_LIMIT_INITIAL: int = 4
+    GEMINI_LIMIT_MIN: int = 1
+    GEMINI_LIMIT_MAX: int = 16
+    GEMINI_LATENCY_THRESHOLD_SECONDS: float = 20.0
+
+    # 外部依賴的重試 (Full Jitter 指數退避) 與斷路器：連續 CIRCUIT_FAILURE_THRESHOLD
+    # 次呼叫失敗 (用盡重試才算一次) 後斷路，CIRCUIT_RESET_SECONDS 後放行一個試探請求
+    RETRY_BASE_DELAY_SECONDS: float = 0.2
+    RETRY_MAX_DELAY_SECONDS: float = 2.0
+    PROVIDER_RETRY_ATTEMPTS: int = 3
+    GEMINI_RETRY_ATTEMPTS: int = 2
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # 自然語句路由 (fallback: "echo" 維持回顯，"chat" 交給 .chat)
+    INTENT_ROUTER_ENABLED: bool = True
+    INTENT_ROUTER_FALLBACK: Literal["echo", "chat"] = "echo"
+
+    # 多指令訊息設定 (LINE 單次回覆最多 5 則訊息)
+    MAX_COMMANDS_PER_MESSAGE: int = 5
+    MULTI_COMMAND_BUDGET_SECONDS: float = 60.0
+
+    # 限流設定 (每分鐘次數，亦為允許的瞬間爆量；"default" 為未列出指令的預設值)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_USER_PER_MINUTE: Dict[str, float] = {
+        "default": 20,
+        ".stock": 3,
+        ".chat": 10,
+    }
+    RATE_LIMIT_GROUP_PER_MINUTE: Dict[str, float] = {
+        "default": 60,
+        ".stock": 10,
+        ".chat": 30,
+    }
+
+    # 追蹤設定 (取樣率 0 代表停用；輸出為 OTLP/JSON 檔案)
+    TRACE_SAMPLE_RATE: float = 0.0
+    TRACE_EXPORT_PATH: str = "logs/traces.jsonl"
+    TRACE_FLUSH_INTERVAL_SECONDS: float = 5.0
+    # 不產生追蹤 ID 也不記錄請求日誌的路徑 (健康檢查、監控抓取)
+    TRACE_SKIP_PATHS: List[str] = ["/health", "/ready", "/metrics"]
+
+    # 就緒檢查：預熱 (預抓熱門代碼、建立連線池、技術分析) 完成後 /ready 才回應 200
+    WARMUP_SYMBOLS: List[str] = ["2330", "0050"]
+    READINESS_WARMUP_TIMEOUT_SECONDS: float = 60.0
+    # 依賴延遲探測 (Yahoo / Gemini / LINE)，間隔 0 代表停用
+    DEPENDENCY_PROBE_INTERVAL_SECONDS: float = 30.0
+    DEPENDENCY_PROBE_TIMEOUT_SECONDS: float = 5.0
+    DEPENDENCY_PROBE_SYMBOL: str = "2330"
+    # 以本機 Stub 代替需連線的預熱與探測 (測試、離線開發)
+    READINESS_LOCAL_STUBS: bool = False
+
+    # 事件迴圈延遲監控 (阻塞超過門檻時記錄迴圈執行緒的呼叫堆疊)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.1
+    LOOP_MONITOR_THRESHOLD_SECONDS: float = 0.25
+
+    # 隨選剖析 (需同時設定 ADMIN_TOKEN，作為 x-debug-profile 標頭的密鑰)
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: str = "logs/profiles"
+
+    # 管理端點設定 (空字串代表停用)
+    ADMIN_TOKEN: str = ""
+
     # 允許讀取 .env 檔案
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
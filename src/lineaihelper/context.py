@@ -4,3 +4,4 @@ from contextvars import ContextVar
 trace_id_var: ContextVar[str] = ContextVar("trace_id", default="system")
 request_id_var: ContextVar[str] = ContextVar("request_id", default="system")
 line_inbound_id_var: ContextVar[str] = ContextVar("line_inbound_id", default="N/A")
+user_id_var: ContextVar[str] = ContextVar("user_id", default="")
@@ -0,0 +1,152 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    以本地規則粗估文字的 Token 數量，避免每次都呼叫外部 API 計算。
+
+    中日韓文字約 1 字 1 Token，其餘字元約 4 字元 1 Token。
+    """
+    wide = sum(1 for ch in text if ord(ch) > 0x2E7F)
+    narrow = len(text) - wide
+    return wide + (narrow + 3) // 4
+
+
+@dataclass
+class Turn:
+    """單一對話回合"""
+
+    seq: int
+    role: str  # "user" 或 "model"
+    text: str
+    tokens: int
+
+
+@dataclass
+class Conversation:
+    """單一使用者的對話狀態 (摘要 + 近期回合)"""
+
+    summary: str = ""
+    summary_tokens: int = 0
+    turns: Deque[Turn] = field(default_factory=deque)
+    next_seq: int = 0
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_tokens + sum(t.tokens for t in self.turns)
+
+
+class ConversationMemory:
+    """
+    以 LINE userId 為鍵的對話記憶庫。
+
+    - 每位使用者有固定的 Token 預算，超過時丟棄最舊的回合。
+    - 跨使用者以 LRU 淘汰，並受總 Token 上限與使用者數量上限約束。
+    - 當單一對話超過摘要門檻時，由呼叫端將舊回合壓縮為簡短摘要。
+    """
+
+    def __init__(
+        self,
+        max_tokens_per_user: int = 2000,
+        max_users: int = 1000,
+        max_total_tokens: int = 500_000,
+        summary_ratio: float = 0.75,
+        keep_recent_turns: int = 4,
+    ):
+        self.max_tokens_per_user = max_tokens_per_user
+        self.max_users = max_users
+        self.max_total_tokens = max_total_tokens
+        self.summary_threshold = int(max_tokens_per_user * summary_ratio)
+        self.keep_recent_turns = keep_recent_turns
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._total_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    @property
+    def total_tokens(self) -> int:
+        return self._total_tokens
+
+    def get(self, user_id: str) -> Optional[Conversation]:
+        """取得對話並標記為最近使用"""
+        conv = self._conversations.get(user_id)
+        if conv is not None:
+            self._conversations.move_to_end(user_id)
+        return conv
+
+    def append(self, user_id: str, role: str, text: str) -> None:
+        """新增一個回合，並強制執行單一使用者與全域的預算"""
+        conv = self._conversations.get(user_id)
+        if conv is None:
+            conv = Conversation()
+            self._conversations[user_id] = conv
+        else:
+            self._conversations.move_to_end(user_id)
+
+        turn = Turn(
+            seq=conv.next_seq, role=role, text=text, tokens=estimate_tokens(text)
+        )
+        conv.next_seq += 1
+        conv.turns.append(turn)
+        self._total_tokens += turn.tokens
+
+        # 單一使用者預算：丟棄最舊回合 (至少保留最新一回合)
+        while conv.tokens > self.max_tokens_per_user and len(conv.turns) > 1:
+            self._total_tokens -= conv.turns.popleft().tokens
+
+        self._evict(keep=user_id)
+
+    def needs_summary(self, user_id: str) -> bool:
+        """判斷對話是否已達摘要門檻且有足夠的舊回合可壓縮"""
+        conv = self._conversations.get(user_id)
+        if conv is None:
+            return False
+        return (
+            conv.tokens >= self.summary_threshold
+            and len(conv.turns) > self.keep_recent_turns
+        )
+
+    def turns_to_summarize(self, user_id: str) -> List[Turn]:
+        """回傳可被壓縮的舊回合 (保留最近 keep_recent_turns 回合)"""
+        conv = self._conversations.get(user_id)
+        if conv is None or len(conv.turns) <= self.keep_recent_turns:
+            return []
+        return list(conv.turns)[: len(conv.turns) - self.keep_recent_turns]
+
+    def compact(self, user_id: str, summary: str, upto_seq: int) -> None:
+        """
+        以摘要取代 seq <= upto_seq 的回合。
+
+        以 seq 判斷而非索引，確保摘要期間新增或淘汰的回合不會被誤刪。
+        """
+        conv = self._conversations.get(user_id)
+        if conv is None:
+            return
+
+        while conv.turns and conv.turns[0].seq <= upto_seq:
+            self._total_tokens -= conv.turns.popleft().tokens
+
+        self._total_tokens -= conv.summary_tokens
+        conv.summary = summary
+        conv.summary_tokens = estimate_tokens(summary)
+        self._total_tokens += conv.summary_tokens
+
+    def clear(self, user_id: str) -> None:
+        """清除指定使用者的對話"""
+        conv = self._conversations.pop(user_id, None)
+        if conv is not None:
+            self._total_tokens -= conv.tokens
+
+    def _evict(self, keep: str) -> None:
+        """依 LRU 順序淘汰使用者，直到符合全域上限"""
+        while self._conversations and (
+            len(self._conversations) > self.max_users
+            or self._total_tokens > self.max_total_tokens
+        ):
+            oldest = next(iter(self._conversations))
+            if oldest == keep:
+                break
+            self.clear(oldest)
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from loguru import logger
+
+# 送出一則 LINE 回覆中的多個訊息泡泡
+Sender = Callable[[List[str]], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class DeliveryBudget:
+    """
+    單一 Webhook 事件的時間預算，以 LINE 事件時間戳 (epoch 秒) 為起點。
+
+    Attributes:
+        event_time: 事件發生時間 (epoch 秒)。
+        reply_ttl: Reply Token 的可用秒數。
+        ack_after: 超過此秒數仍未完成時，先以 Reply 送出確認訊息並改用 Push。
+        job_budget: 整體工作預算，超過後結果已無法送達，取消進行中的工作。
+    """
+
+    event_time: float
+    reply_ttl: float = 50.0
+    ack_after: float = 20.0
+    job_budget: float = 120.0
+
+    @property
+    def ack_at(self) -> float:
+        return self.event_time + min(self.ack_after, self.reply_ttl)
+
+    @property
+    def reply_deadline(self) -> float:
+        return self.event_time + self.reply_ttl
+
+    @property
+    def job_deadline(self) -> float:
+        return self.event_time + self.job_budget
+
+
+async def _wait(task: "asyncio.Future[List[str]]", timeout: float) -> bool:
+    if timeout > 0:
+        await asyncio.wait({task}, timeout=timeout)
+    return task.done()
+
+
+async def deliver_with_deadline(
+    work: Callable[[], Awaitable[List[str]]],
+    budget: DeliveryBudget,
+    reply: Sender,
+    push: Optional[Sender],
+    ack_text: str,
+    clock: Callable[[], float] = time.time,
+) -> str:
+    """
+    在預算內執行工作並送出結果。
+
+    - 於 ack_at 前完成：直接以 Reply 回覆結果。
+    - 逾時且可 Push：先以 Reply 送出確認訊息，完成後改以 Push 送出結果。
+    - 結果已無法送達 (Reply Token 過期且無 Push 對象，或超過整體預算)：取消工作。
+
+    Returns:
+        str: 實際的送達方式，"reply"、"push" 或 "expired"。
+    """
+    now = clock()
+    final_deadline = budget.job_deadline if push else budget.reply_deadline
+    if now >= final_deadline:
+        logger.warning(
+            "Event expired before processing", extra={"age": now - budget.event_time}
+        )
+        return "expired"
+
+    task = asyncio.ensure_future(work())
+    try:
+        if await _wait(task, budget.ack_at - clock()):
+            await reply(task.result())
+            return "reply"
+
+        if push is None:
+            if await _wait(task, budget.reply_deadline - clock()):
+                await reply(task.result())
+                return "reply"
+        elif clock() < budget.reply_deadline:
+            await reply([ack_text])
+            logger.info("Reply budget at risk, acknowledged and switched to push")
+            if await _wait(task, budget.job_deadline - clock()):
+                await push(task.result())
+                return "push"
+        elif await _wait(task, budget.job_deadline - clock()):
+            await push(task.result())
+            return "push"
+
+        logger.warning(
+            "Delivery deadline exceeded, cancelling job",
+            extra={"age": clock() - budget.event_time},
+        )
+        return "expired"
+    finally:
+        if not task.done():
+            # 取消會一路傳遞到 Provider 與 AI 的子任務
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
@@ -1,47 +1,250 @@
-from typing import Dict
+import asyncio
+import time
+import unicodedata
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-from google import genai
 from loguru import logger
 
+from lineaihelper.config import settings
 from lineaihelper.exceptions import LineNexusError
+from lineaihelper.intent_router import IntentRouter
+from lineaihelper.metrics import RESULT_CACHE, observe
 from lineaihelper.services import (
+    COMMAND_REGISTRY,
     BaseService,
-    ChatService,
-    HelpService,
-    PriceService,
-    StockService,
+    CommandSpec,
+    ServiceDeps,
 )
+from lineaihelper.tracing import span
+from lineaihelper.ttl_cache import TTLCache
+
+if TYPE_CHECKING:
+    from google import genai
+
+# 結果快取鍵：(正式指令名稱, 正規化後的參數)
+ResultKey = Tuple[str, str]
 
 
 class CommandDispatcher:
-    def __init__(self, gemini_client: genai.Client):
-        # 註冊指令對應的服務
-        self.services: Dict[str, BaseService] = {
-            ".stock": StockService(gemini_client),
-            ".price": PriceService(),
-            ".chat": ChatService(gemini_client),
-            ".help": HelpService(),
-        }
+    def __init__(
+        self,
+        gemini_client: Optional["genai.Client"] = None,
+        registry: Optional[Dict[str, CommandSpec]] = None,
+        deps: Optional[ServiceDeps] = None,
+        router: Optional[IntentRouter] = None,
+    ):
+        # 服務共用同一組依賴，並於首次使用時才建立
+        self.deps = deps or ServiceDeps(gemini_client)
+        self.specs: Dict[str, CommandSpec] = dict(registry or COMMAND_REGISTRY)
+        self.services: Dict[str, BaseService] = {}
+        self.router = router
+        if router is None and settings.INTENT_ROUTER_ENABLED:
+            self.router = IntentRouter(fallback=settings.INTENT_ROUTER_FALLBACK)
+
+        # 整則回覆的結果快取，TTL 依各指令的 cache_ttl 設定
+        self.result_cache: TTLCache[ResultKey, str] = TTLCache(
+            settings.RESULT_CACHE_MAX_ENTRIES
+        )
+        self._pending: Dict[ResultKey, "asyncio.Future[Tuple[str, bool]]"] = {}
+        # 多 Worker 部署時，結果快取另外寫入跨程序共享快取
+        self.shared_results = self.deps.shared_cache("result")
+
+        # 指令與別名對應到正式名稱
+        self._aliases: Dict[str, str] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        for spec in self.specs.values():
+            self._aliases[spec.name] = spec.name
+            for alias in spec.aliases:
+                self._aliases[self._normalize(alias)] = spec.name
+            if spec.max_concurrency:
+                self._semaphores[spec.name] = asyncio.Semaphore(spec.max_concurrency)
+
+    @staticmethod
+    def _normalize(token: str) -> str:
+        # NFKC 會將全形「．ｓｔｏｃｋ」轉為半形 ".stock"
+        return unicodedata.normalize("NFKC", token).lower()
+
+    @staticmethod
+    def _normalize_args(args: str) -> str:
+        # 參數保留大小寫 (策略名稱區分大小寫)，僅統一全形字元與空白
+        return " ".join(unicodedata.normalize("NFKC", args).split())
+
+    def split_command(self, user_text: str) -> Tuple[str, str]:
+        """
+        將訊息拆為 (正式指令名稱, 參數)；非指令訊息回傳空字串指令。
+        """
+        parts = user_text.split(maxsplit=1)
+        if not parts:
+            return "", user_text
+        token = self._normalize(parts[0])
+        if not token.startswith("."):
+            return "", user_text
+        return self._aliases.get(token, token), parts[1] if len(parts) > 1 else ""
+
+    def route(self, user_text: str) -> str:
+        """
+        將不以指令開頭的自然語句 (如「台積電股價」) 轉為對應指令；
+        無法判斷時原樣回傳。
+
+        每則訊息只需路由一次：呼叫端 (handle_message) 於進入時路由，
+        再將結果交給限流、split_commands 與 execute_message。
+        """
+        if self.router is None or self.split_command(user_text)[0]:
+            return user_text
+        intent = self.router.route(user_text)
+        if intent is None:
+            return user_text
+        logger.info("Routed plain text", extra={"command": intent.command})
+        return intent.to_command()
+
+    def split_commands(self, user_text: str) -> List[str]:
+        """
+        將多行訊息拆為多個指令；以指令開頭的行會開始新指令，
+        其餘行併入前一個指令的參數 (例如多行的 .chat 內容)。
+        """
+        commands: List[str] = []
+        for line in user_text.splitlines():
+            if self.split_command(line.strip())[0] or not commands:
+                commands.append(line.strip())
+            else:
+                commands[-1] += "\n" + line
+        return [c for c in commands if c] or [user_text]
+
+    async def execute_message(self, user_text: str) -> List[str]:
+        """
+        執行訊息中的所有指令，並回傳最多 MAX_COMMANDS_PER_MESSAGE 則回覆。
+
+        各指令並行執行、錯誤互相隔離，且共享同一個整體時間預算；
+        超出預算的指令會被取消並回覆逾時訊息。user_text 需已經過 route()。
+        """
+        commands = self.split_commands(user_text)
+        if len(commands) <= 1 or not self.split_command(commands[0])[0]:
+            return [await self.parse_and_execute(user_text)]
+
+        limit = settings.MAX_COMMANDS_PER_MESSAGE
+        dropped = len(commands) - limit
+        commands = commands[:limit]
+        logger.info("Dispatching multi-command message", extra={"count": len(commands)})
+
+        tasks = [asyncio.ensure_future(self.parse_and_execute(c)) for c in commands]
+        try:
+            _, pending = await asyncio.wait(
+                tasks, timeout=settings.MULTI_COMMAND_BUDGET_SECONDS
+            )
+        finally:
+            # 逾時或外層被取消時，一併取消尚未完成的指令
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        results = [
+            f"{self.split_command(c)[0]} 執行逾時，請稍後再試。"
+            if task in pending
+            else task.result()
+            for c, task in zip(commands, tasks, strict=True)
+        ]
+        if dropped > 0:
+            results[-1] += f"\n\n(一次最多處理 {limit} 個指令，已略過 {dropped} 個)"
+        return results
+
+    def get_service(self, command: str) -> Optional[BaseService]:
+        """取得指令對應的服務，首次使用時才建立實例"""
+        service = self.services.get(command)
+        if service is None and command in self.specs:
+            service = self.specs[command].factory(self.deps)
+            self.services[command] = service
+            logger.info("Service constructed", extra={"command": command})
+        return service
 
     async def parse_and_execute(self, user_text: str) -> str:
         """
         解析使用者文字並分發給對應服務，並處理所有業務與系統異常。
         """
-        if not user_text.startswith("."):
+        command, args = self.split_command(user_text)
+        if not command:
             return f"LineNexus (Async) received: {user_text}"
 
-        parts = user_text.split(" ", 1)
-        command = parts[0].lower()
-        args = parts[1] if len(parts) > 1 else ""
-
         logger.info("Dispatching command", extra={"command": command})
 
+        start = time.perf_counter()
+        with span("dispatch", command=command):
+            text, ok = await self._resolve(command, args)
+        # 未註冊的指令統一標記，避免使用者輸入造成標籤爆量
+        observe(
+            "command",
+            command if command in self.specs else "unknown",
+            "ok" if ok else "error",
+            time.perf_counter() - start,
+        )
+        return text
+
+    async def _resolve(self, command: str, args: str) -> Tuple[str, bool]:
+        """先查結果快取與執行中的相同指令，皆無才實際執行"""
+        spec = self.specs.get(command)
+        if spec is None or not spec.cache_ttl:
+            return await self._run(command, args)
+
+        key = (command, self._normalize_args(args))
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            # 命中時完全略過服務層
+            RESULT_CACHE.inc(command, "hit")
+            logger.info("Result cache hit", extra={"command": command})
+            return cached, True
+
+        task = self._pending.get(key)
+        if task is None:
+            RESULT_CACHE.inc(command, "miss")
+            # 以獨立 Task 執行，同時抵達的相同指令共用這一次執行
+            ttl = spec.cache_ttl
+            task = asyncio.ensure_future(self._run_shared(key, ttl, command, args))
+            self._pending[key] = task
+            task.add_done_callback(lambda t: self._on_done(key, ttl, t))
+        else:
+            RESULT_CACHE.inc(command, "coalesced")
+            logger.info("Coalesced onto in-flight command", extra={"command": command})
+
+        return await asyncio.shield(task)
+
+    def _on_done(
+        self, key: ResultKey, ttl: float, task: "asyncio.Future[Tuple[str, bool]]"
+    ) -> None:
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        text, cacheable = task.result()
+        if cacheable:
+            self.result_cache.set(key, text, ttl)
+
+    async def _run_shared(
+        self, key: ResultKey, ttl: float, command: str, args: str
+    ) -> Tuple[str, bool]:
+        """本地未命中時查詢共享快取，執行成功的可快取結果寫回共享快取"""
+        if self.shared_results is None:
+            return await self._run(command, args)
+
+        shared: Optional[str] = await self.shared_results.get(key)
+        if shared is not None:
+            RESULT_CACHE.inc(command, "shared_hit")
+            return shared, True
+        text, cacheable = await self._run(command, args)
+        if cacheable:
+            await self.shared_results.set(key, text, ttl)
+        return text, cacheable
+
+    async def _run(self, command: str, args: str) -> Tuple[str, bool]:
+        """
+        執行指令並處理所有業務與系統異常。
+
+        Returns:
+            Tuple[str, bool]: (回覆文字, 是否可快取)；錯誤、逾時與限流回覆不快取。
+        """
         try:
-            service = self.services.get(command)
-            if service:
-                return await service.execute(args)
-            else:
-                return f"Unknown command: {command}, type .help for info."
+            service = self.get_service(command)
+            if not service:
+                return f"Unknown command: {command}, type .help for info.", False
+            return await self._execute(command, service, args)
         except LineNexusError as e:
             # 攔截自定義的業務邏輯錯誤
             logger.warning(
@@ -51,7 +254,7 @@ class CommandDispatcher:
                     "error": e.message,
                 },
             )
-            return f"{e.message}"
+            return f"{e.message}", False
         except Exception:
             # 攔截未預期的系統錯誤
             logger.exception(
@@ -61,4 +264,37 @@ class CommandDispatcher:
                     "args": args,
                 },
             )
-            return "系統發生未知錯誤，請稍後再試或聯繫管理員。"
+            return "系統發生未知錯誤，請稍後再試或聯繫管理員。", False
+
+    async def _execute(
+        self, command: str, service: BaseService, args: str
+    ) -> Tuple[str, bool]:
+        """套用指令的併發上限與逾時預算"""
+        spec = self.specs.get(command)
+        if spec is None:
+            return await self._call(service, args), True
+
+        semaphore = self._semaphores.get(command)
+        if semaphore is not None and semaphore.locked():
+            # 已達併發上限時立即拒絕，避免慢指令佔滿所有 Worker
+            logger.warning(
+                "Command concurrency limit reached", extra={"command": command}
+            )
+            return f"目前 {command} 請求過多，請稍後再試。", False
+
+        try:
+            async with semaphore if semaphore is not None else nullcontext():
+                # 協程於取得併發名額後才建立，等待期間被取消也不會留下未執行的協程
+                text = await asyncio.wait_for(self._call(service, args), spec.timeout)
+            return text, True
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Command timed out",
+                extra={"command": command, "timeout": spec.timeout},
+            )
+            return f"{command} 執行逾時，請稍後再試。", False
+
+    @staticmethod
+    async def _call(service: BaseService, args: str) -> str:
+        with span(f"service.{type(service).__name__}"):
+            return await service.execute(args)
@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from lineaihelper.ids import new_id
+from lineaihelper.metrics import REGISTRY
+from lineaihelper.shared_cache import connect_sqlite
+
+QUEUE_REDELIVERED = REGISTRY.counter(
+    "linenexus_durable_queue_redelivered_total",
+    "Jobs claimed again after their visibility timeout expired.",
+)
+QUEUE_DEAD = REGISTRY.counter(
+    "linenexus_durable_queue_dead_total",
+    "Jobs moved to the dead-letter state after exhausting their attempts.",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key TEXT UNIQUE,
+    payload BLOB NOT NULL,
+    enqueued_at REAL NOT NULL,
+    visible_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    done_at REAL,
+    dead INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (done_at, dead, visible_at, id);
+"""
+
+
+@dataclass(frozen=True)
+class Lease:
+    """已領取的工作；須以 ack 確認完成，否則可見性逾時後會被重新領取"""
+
+    job_id: int
+    token: str
+    payload: bytes
+    attempts: int
+
+
+class DurableQueue:
+    """
+    以本機 SQLite (WAL) 實作的持久化工作佇列，提供至少一次 (at-least-once) 的
+    投遞保證。
+
+    - enqueue 以 dedupe_key (webhookEventId) 去重，LINE 重送的事件不會重複入列。
+    - claim 以單一 UPDATE ... RETURNING 原子地領取工作並設定可見性逾時；
+      Worker 當掉或逾時未 ack 的工作會在逾時後被其他 Worker 重新領取。
+    - 超過 max_attempts 仍未完成的工作標記為 dead，不再投遞。
+    - 已完成的工作保留 done_at 供去重，由 purge 定期清除。
+
+    方法皆為同步的資料庫操作，於事件迴圈中應透過 asyncio.to_thread 呼叫。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = 180.0,
+        max_attempts: int = 3,
+        busy_timeout: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.busy_timeout = busy_timeout
+        self._clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = connect_sqlite(self.path, self.busy_timeout, _SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def enqueue(self, items: Iterable[Tuple[str, bytes]]) -> int:
+        """
+        於同一個交易中寫入多筆 (dedupe_key, payload)，回傳實際新增的筆數。
+        dedupe_key 為空字串時不去重。
+        """
+        now = self._clock()
+        rows = [(key or None, payload, now, now) for key, payload in items]
+        with self._lock:
+            conn = self._connection()
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO jobs "
+                    "(dedupe_key, payload, enqueued_at, visible_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            return conn.total_changes - before
+
+    def claim(self, limit: int = 1) -> List[Lease]:
+        """領取最多 limit 筆可見的工作 (依入列順序)"""
+        now = self._clock()
+        token = new_id()
+        with self._lock:
+            conn = self._connection()
+            dead = conn.execute(
+                "UPDATE jobs SET dead = 1 WHERE done_at IS NULL AND dead = 0 "
+                "AND attempts >= ? AND visible_at <= ?",
+                (self.max_attempts, now),
+            ).rowcount
+            rows = conn.execute(
+                "UPDATE jobs SET visible_at = ?, attempts = attempts + 1, "
+                "lease_token = ? WHERE id IN ("
+                "SELECT id FROM jobs WHERE done_at IS NULL AND dead = 0 "
+                "AND visible_at <= ? ORDER BY id LIMIT ?) "
+                "RETURNING id, payload, attempts",
+                (now + self.visibility_timeout, token, now, limit),
+            ).fetchall()
+
+        if dead:
+            QUEUE_DEAD.inc(amount=dead)
+            logger.warning("Jobs moved to dead letter", extra={"count": dead})
+        leases = [Lease(job_id, token, payload, n) for job_id, payload, n in rows]
+        redelivered = sum(1 for lease in leases if lease.attempts > 1)
+        if redelivered:
+            QUEUE_REDELIVERED.inc(amount=redelivered)
+        return sorted(leases, key=lambda lease: lease.job_id)
+
+    def ack(self, lease: Lease) -> bool:
+        """標記完成；租約已逾時並被他人重新領取時回傳 False"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE jobs SET done_at = ?, lease_token = NULL "
+                "WHERE id = ? AND lease_token = ?",
+                (self._clock(), lease.job_id, lease.token),
+            )
+        return cursor.rowcount == 1
+
+    def nack(self, lease: Lease, delay: float = 0.0) -> bool:
+        """放回佇列，delay 秒後可再被領取"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE jobs SET visible_at = ?, lease_token = NULL "
+                "WHERE id = ? AND lease_token = ?",
+                (self._clock() + delay, lease.job_id, lease.token),
+            )
+        return cursor.rowcount == 1
+
+    def pending(self) -> int:
+        """尚未完成 (含執行中) 的工作數量"""
+        with self._lock:
+            row = (
+                self._connection()
+                .execute("SELECT COUNT(*) FROM jobs WHERE done_at IS NULL AND dead = 0")
+                .fetchone()
+            )
+        return int(row[0])
+
+    def purge(self, older_than: float) -> int:
+        """刪除完成超過 older_than 秒的工作，回傳筆數"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM jobs WHERE done_at IS NOT NULL AND done_at <= ?",
+                (self._clock() - older_than,),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
@@ -1,24 +1,27 @@
+from typing import TYPE_CHECKING
+
 from fastapi import Request
 from fastapi.responses import JSONResponse
-from linebot.v3.exceptions import InvalidSignatureError
-from linebot.v3.messaging import ApiException, ErrorResponse
 from loguru import logger
 
 from lineaihelper.exceptions import LineNexusError
+from lineaihelper.line_client import is_api_exception
 
+if TYPE_CHECKING:
+    from linebot.v3.messaging import ApiException
 
-async def invalid_signature_handler(
-    request: Request, exc: InvalidSignatureError
-) -> JSONResponse:
+
+async def invalid_signature_handler(request: Request, exc: Exception) -> JSONResponse:
     """處理 LINE Webhook 簽章無效錯誤"""
     logger.error("無效的 LINE 簽章", extra={"error": str(exc)})
     return JSONResponse(status_code=400, content={"detail": "Invalid signature"})
 
 
 async def line_api_exception_handler(
-    request: Request | None, exc: ApiException
+    request: Request | None, exc: "ApiException"
 ) -> JSONResponse:
     """處理 LINE Messaging API 的通訊異常"""
+    from linebot.v3.messaging import ErrorResponse
 
     request_id = exc.headers.get("x-line-request-id") if exc.headers else "N/A"
 
@@ -68,5 +71,8 @@ async def business_exception_handler(request: Request, exc: Exception) -> JSONRe
 
 async def global_exception_handler(request: Request, exc: Exception) -> JSONResponse:
     """全域異常攔截，作為最後一道防線"""
+    # LINE SDK 採延遲載入，無法預先以類別註冊 ApiException 的處理器
+    if is_api_exception(exc):
+        return await line_api_exception_handler(request, exc)
     logger.exception("全域攔截到未處理異常", extra={"error": str(exc)})
     return JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
@@ -1,7 +1,5 @@
 from typing import NoReturn, Optional
 
-from google.genai import errors
-
 
 class LineNexusError(Exception):
     """LineNexus 專案的基礎異常類別"""
@@ -24,6 +22,27 @@ class ExternalAPIError(LineNexusError):
     pass
 
 
+class DependencyOverloadedError(ExternalAPIError):
+    """外部依賴的並發已達自適應上限，請求未送出即被拒絕"""
+
+    pass
+
+
+class CircuitOpenError(ExternalAPIError):
+    """外部依賴的斷路器開啟中，請求未送出即被拒絕"""
+
+    pass
+
+
+def is_gemini_overload(e: BaseException) -> bool:
+    """Gemini 的 5xx 與 429 代表上游壅塞；其餘 4xx 為請求本身的問題"""
+    from google.genai import errors
+
+    if isinstance(e, errors.ServerError):
+        return True
+    return isinstance(e, errors.ClientError) and e.code == 429
+
+
 def handle_gemini_error(e: Exception, default_msg: str = "AI 暫時無法回應") -> NoReturn:
     """
     統一處理 Google GenAI API 異常轉換。
@@ -35,6 +54,9 @@ def handle_gemini_error(e: Exception, default_msg: str = "AI 暫時無法回應"
     Raises:
         ExternalAPIError: 轉換後的專案標準異常。
     """
+    # 僅在錯誤路徑上需要，避免匯入本模組時連帶載入 google-genai
+    from google.genai import errors
+
     if isinstance(e, errors.ClientError):
         # 處理 4xx 錯誤，如配額超出 (ResourceExhausted) 或參數錯誤
         error_msg = str(e).lower()
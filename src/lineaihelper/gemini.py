@@ -0,0 +1,37 @@
+from typing import TYPE_CHECKING, Optional
+
+from lineaihelper.adaptive_limit import AdaptiveLimiter, limited
+from lineaihelper.config import settings
+from lineaihelper.metrics import track
+from lineaihelper.resilience import Resilience, resilient
+from lineaihelper.tracing import span
+
+if TYPE_CHECKING:
+    from google import genai
+    from google.genai import types
+
+
+async def generate_content(
+    client: "genai.Client",
+    prompt: str,
+    limiter: Optional[AdaptiveLimiter] = None,
+    resilience: Optional[Resilience] = None,
+) -> "types.GenerateContentResponse":
+    """
+    呼叫 Gemini 產生回應 (所有服務共用)。
+
+    每次嘗試都在自適應並發上限內執行並記錄延遲指標與追蹤 Span；
+    失敗時依 resilience 重試並計入斷路器。
+    """
+
+    async def attempt() -> "types.GenerateContentResponse":
+        async with limited(limiter):
+            with (
+                track("gemini", settings.GEMINI_MODEL),
+                span("gemini.generate_content", model=settings.GEMINI_MODEL),
+            ):
+                return await client.aio.models.generate_content(
+                    model=settings.GEMINI_MODEL, contents=prompt
+                )
+
+    return await resilient(resilience, attempt)
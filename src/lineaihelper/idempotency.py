@@ -0,0 +1,96 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Protocol
+
+
+class IdempotencyBackend(Protocol):
+    """
+    跨程序共享的去重後端介面 (如 SQLite、Redis)。
+
+    set_if_absent 必須是原子操作：鍵不存在時寫入並回傳 True，否則回傳 False。
+    """
+
+    async def set_if_absent(self, key: str, ttl: float) -> bool: ...
+
+
+@dataclass
+class InFlightJob:
+    """執行中的工作，供重送事件附掛等待結果"""
+
+    result: Optional[List[str]] = None
+    delivered: bool = False
+    finished: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class IdempotencyStore:
+    """
+    以 webhookEventId 為鍵的冪等層。
+
+    - 本地為有上限、會過期的集合，快速擋下重複事件。
+    - 可選的共享後端讓多個程序之間也能去重。
+    - 記錄執行中的工作，讓重送事件附掛到原始工作而非重新執行。
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        max_entries: int = 10_000,
+        backend: Optional[IdempotencyBackend] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.backend = backend
+        self._clock = clock
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._in_flight: Dict[str, InFlightJob] = {}
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    async def claim(self, key: str) -> bool:
+        """
+        宣告處理此事件；首次出現回傳 True，重複事件回傳 False。
+        """
+        now = self._clock()
+        self._expire(now)
+
+        if key in self._seen:
+            return False
+        if self.backend is not None and not await self.backend.set_if_absent(
+            key, self.ttl_seconds
+        ):
+            return False
+
+        self._seen[key] = now + self.ttl_seconds
+        while len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return True
+
+    def start(self, key: str) -> InFlightJob:
+        """登記執行中的工作"""
+        job = InFlightJob()
+        self._in_flight[key] = job
+        return job
+
+    def in_flight(self, key: str) -> Optional[InFlightJob]:
+        return self._in_flight.get(key)
+
+    def finish(self, key: str, result: Optional[List[str]], delivered: bool) -> None:
+        """標記工作完成並喚醒附掛的重送事件"""
+        job = self._in_flight.pop(key, None)
+        if job is None:
+            return
+        job.result = result
+        job.delivered = delivered
+        job.finished.set()
+
+    def _expire(self, now: float) -> None:
+        # 所有項目 TTL 相同，插入順序即過期順序
+        while self._seen:
+            key, expires_at = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[key]
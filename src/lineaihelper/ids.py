@@ -0,0 +1,51 @@
+import random
+import threading
+import time
+from typing import Callable
+
+
+class SortableIdGenerator:
+    """
+    產生 UUIDv7 格式的 ID：前 48 位元為毫秒時間戳，其餘為序號。
+
+    - 依字串排序即為產生順序 (同一毫秒內以序號遞增，時鐘回撥時沿用上次時間)。
+    - 每毫秒只取一次亂數 (Mersenne Twister，非系統呼叫)，比 uuid4 便宜；
+      僅作為追蹤用途，不可當作安全性權杖。
+    - 輸出為標準 UUID 字串，可直接被 uuid.UUID 解析 (如 tracing.otel_trace_id)。
+    """
+
+    _SEQ_BITS = 74  # rand_a (12) + rand_b (62)
+
+    def __init__(self, clock: Callable[[], int] = time.time_ns):
+        self._clock = clock
+        self._last_ms = -1
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def __call__(self) -> str:
+        with self._lock:
+            now_ms = self._clock() // 1_000_000
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # 保留最高位元為 0，確保同一毫秒內遞增不會溢位
+                self._seq = self._random.getrandbits(self._SEQ_BITS - 1)
+            else:
+                self._seq += 1
+                if self._seq >> self._SEQ_BITS:
+                    self._last_ms += 1
+                    self._seq = 0
+            ms, seq = self._last_ms, self._seq
+
+        value = (
+            (ms & 0xFFFF_FFFF_FFFF) << 80
+            | 0x7 << 76  # version 7
+            | (seq >> 62) << 64  # rand_a
+            | 0b10 << 62  # RFC 4122 variant
+            | (seq & 0x3FFF_FFFF_FFFF_FFFF)  # rand_b
+        )
+        h = f"{value:032x}"
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+new_id = SortableIdGenerator()
@@ -0,0 +1,246 @@
+import re
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Generic, Iterator, List, Literal, Optional, Tuple, TypeVar
+
+P = TypeVar("P")
+
+# 常見標的名稱 -> 代碼 (代碼本身亦會加入自動機，收錄的代碼單獨出現即可路由)
+DEFAULT_SYMBOLS: Dict[str, str] = {
+    "台積電": "2330",
+    "台積": "2330",
+    "tsmc": "2330",
+    "鴻海": "2317",
+    "聯發科": "2454",
+    "廣達": "2382",
+    "台達電": "2308",
+    "聯電": "2303",
+    "中華電": "2412",
+    "富邦金": "2881",
+    "國泰金": "2882",
+    "長榮": "2603",
+    "元大台灣50": "0050",
+    "0050": "0050",
+    "高股息": "0056",
+    "0056": "0056",
+    "蘋果": "AAPL",
+    "apple": "AAPL",
+    "aapl": "AAPL",
+    "輝達": "NVDA",
+    "nvidia": "NVDA",
+    "nvda": "NVDA",
+    "特斯拉": "TSLA",
+    "tesla": "TSLA",
+    "tsla": "TSLA",
+    "微軟": "MSFT",
+    "microsoft": "MSFT",
+    "msft": "MSFT",
+    "谷歌": "GOOGL",
+    "google": "GOOGL",
+    "亞馬遜": "AMZN",
+    "amazon": "AMZN",
+}
+
+PRICE_KEYWORDS = (
+    "股價",
+    "價格",
+    "報價",
+    "現價",
+    "多少",
+    "幾塊",
+    "幾元",
+    "收盤",
+    "漲跌",
+    "price",
+    "quote",
+)
+
+# 分析關鍵字 -> 策略 (對應 stock prompt 的 strategy)
+ANALYSIS_KEYWORDS: Dict[str, str] = {
+    "分析": "general",
+    "技術面": "general",
+    "能買": "general",
+    "可以買": "general",
+    "建議": "general",
+    "analysis": "general",
+    "趨勢": "trend",
+    "走勢": "trend",
+    "trend": "trend",
+    "動能": "momentum",
+    "momentum": "momentum",
+}
+
+# 表示訊息與股票相關的用語；未收錄的數字代碼需搭配這些用語才會路由
+# (「多少」、「價格」等報價用語也常用於一般金額，不足以判斷)
+STOCK_CONTEXT_KEYWORDS = (
+    "股",
+    "股票",
+    "代號",
+    "代碼",
+    "etf",
+    "stock",
+)
+
+# 未收錄名稱的台股代碼 (4 碼個股、5~6 碼 ETF / 權證)
+_TW_CODE = re.compile(r"(?<![0-9])[0-9]{4,6}(?![0-9])")
+
+
+class AhoCorasick(Generic[P]):
+    """
+    多模式字串比對自動機，一次線性掃描即可找出所有模式的出現位置。
+    """
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[str, P]]] = [[]]
+        self._built = False
+
+    def add(self, pattern: str, payload: P) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((pattern, payload))
+        self._built = False
+
+    def build(self) -> None:
+        """以 BFS 建立失敗連結並合併輸出"""
+        queue: "deque[int]" = deque(self._goto[0].values())
+        for child in queue:
+            self._fail[child] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str, P]]:
+        """
+        逐一產生 (起始位置, 模式, 附帶資料)。
+        """
+        if not self._built:
+            self.build()
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for pattern, payload in self._out[node]:
+                yield i - len(pattern) + 1, pattern, payload
+
+
+@dataclass(frozen=True)
+class Intent:
+    """路由結果"""
+
+    command: str
+    args: str
+
+    def to_command(self) -> str:
+        return f"{self.command} {self.args}".rstrip()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class IntentRouter:
+    """
+    將不以 "." 開頭的自然語句轉為指令，不呼叫任何模型。
+
+    - 標的 + 分析關鍵字 -> .stock 代碼 [策略]
+    - 標的 + 報價關鍵字，或訊息只有標的 -> .price 代碼
+    - 未收錄的數字代碼需伴隨股票用語 (如「股票 6488」)，單獨的數字或金額不路由
+    - 無法判斷時依 fallback 回傳 .chat 或 None (維持原本的回顯)
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[Dict[str, str]] = None,
+        fallback: Literal["echo", "chat"] = "echo",
+    ):
+        self.fallback = fallback
+        self._automaton: AhoCorasick[Tuple[str, str]] = AhoCorasick()
+        symbols = symbols or DEFAULT_SYMBOLS
+        patterns = {self._normalize(name): symbol for name, symbol in symbols.items()}
+        for symbol in symbols.values():
+            patterns.setdefault(self._normalize(symbol), symbol)
+        for pattern, symbol in patterns.items():
+            self._automaton.add(pattern, ("symbol", symbol))
+        for keyword in PRICE_KEYWORDS:
+            self._automaton.add(keyword, ("price", ""))
+        for keyword, strategy in ANALYSIS_KEYWORDS.items():
+            self._automaton.add(keyword, ("analysis", strategy))
+        for keyword in STOCK_CONTEXT_KEYWORDS:
+            self._automaton.add(keyword, ("context", ""))
+        self._automaton.build()
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return unicodedata.normalize("NFKC", text).lower()
+
+    def route(self, text: str) -> Optional[Intent]:
+        normalized = self._normalize(text).strip()
+        if not normalized or normalized.startswith("."):
+            return None
+
+        symbol: Optional[str] = None
+        symbol_span = (0, 0)
+        wants_price = False
+        stock_context = False
+        strategy: Optional[str] = None
+        # 關鍵字所在位置，判斷「訊息只有標的」時一併扣除
+        keyword_spans: List[Tuple[int, int]] = []
+        for start, pattern, (kind, value) in self._automaton.iter_matches(normalized):
+            end = start + len(pattern)
+            # 英文與數字模式需落在單字邊界，避免 "pineapple" 命中 "apple"
+            if _is_word_char(pattern[0]) and (
+                (start > 0 and _is_word_char(normalized[start - 1]))
+                or (end < len(normalized) and _is_word_char(normalized[end]))
+            ):
+                continue
+            if kind == "symbol":
+                # 取最長的名稱，例如「台積電」優先於「台積」
+                if symbol is None or end - start > symbol_span[1] - symbol_span[0]:
+                    symbol, symbol_span = value, (start, end)
+                continue
+            keyword_spans.append((start, end))
+            if kind == "price":
+                wants_price = True
+            elif kind == "context":
+                stock_context = True
+            elif strategy is None or strategy == "general":
+                strategy = value
+
+        if symbol is None and stock_context:
+            match = _TW_CODE.search(normalized)
+            if match:
+                symbol, symbol_span = match.group(), match.span()
+
+        if symbol is not None:
+            if strategy is not None:
+                args = symbol if strategy == "general" else f"{symbol} {strategy}"
+                return Intent(".stock", args)
+            covered = set(range(*symbol_span))
+            for start, end in keyword_spans:
+                covered.update(range(start, end))
+            rest = (ch for i, ch in enumerate(normalized) if i not in covered)
+            if wants_price or not any(ch.isalnum() for ch in rest):
+                return Intent(".price", symbol)
+
+        if self.fallback == "chat":
+            return Intent(".chat", text.strip())
+        return None
@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+from collections import OrderedDict, deque
+from typing import Any, Callable, Coroutine, Deque, List, Optional, Tuple
+
+from loguru import logger
+
+Job = Callable[[], Coroutine[Any, Any, None]]
+
+
+class JobQueue:
+    """
+    有界的非同步工作佇列，由固定數量的 Worker 消化。
+
+    - 佇列滿時 submit 立即回傳 False，由呼叫端決定如何卸載 (例如回覆忙碌訊息)。
+    - 依來源 (使用者、群組) 分流排隊，Worker 以輪詢 (Round-robin) 方式取件，
+      避免單一來源洗版而餓死其他來源。
+    - 每個工作在提交當下的 Context 副本中執行，避免 ContextVar 在工作間互相污染。
+    - 關閉時停止收件，並在逾時前盡量消化剩餘工作。
+    """
+
+    def __init__(
+        self,
+        workers: int = 8,
+        max_size: int = 100,
+        max_per_source: Optional[int] = None,
+    ):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_per_source = max_per_source or max_size
+        self._sources: "OrderedDict[str, Deque[Tuple[Job, contextvars.Context]]]" = (
+            OrderedDict()
+        )
+        self._available: Optional[asyncio.Semaphore] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task[None]] = []
+        self._size = 0
+        self._in_flight = 0
+        self._closed = False
+
+    @property
+    def queue_size(self) -> int:
+        """等待中的工作數量"""
+        return self._size
+
+    @property
+    def in_flight(self) -> int:
+        """執行中的工作數量"""
+        return self._in_flight
+
+    def start(self) -> None:
+        """啟動 Worker (需在事件迴圈中呼叫)"""
+        self._available = asyncio.Semaphore(0)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closed = False
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(
+            "Job queue started",
+            extra={"workers": self.workers, "max_size": self.max_size},
+        )
+
+    def submit(self, job: Job, source: str = "") -> bool:
+        """
+        提交工作；佇列 (或該來源的配額) 已滿或已關閉時回傳 False。
+
+        Args:
+            job: 回傳 Coroutine 的工作。
+            source: 來源識別碼 (如群組 ID 或使用者 ID)，用於公平排程。
+        """
+        if self._available is None or self._idle is None or self._closed:
+            return False
+
+        pending = self._sources.get(source)
+        if self._size >= self.max_size or (
+            pending is not None and len(pending) >= self.max_per_source
+        ):
+            logger.warning(
+                "Job queue full, shedding load",
+                extra={"queue_size": self.queue_size, "in_flight": self.in_flight},
+            )
+            return False
+
+        if pending is None:
+            pending = self._sources[source] = deque()
+        pending.append((job, contextvars.copy_context()))
+        self._size += 1
+        self._idle.clear()
+        self._available.release()
+        return True
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        """停止收件並在 drain_timeout 秒內消化剩餘工作，逾時則取消"""
+        if self._idle is None:
+            return
+
+        self._closed = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=drain_timeout)
+            logger.info("Job queue drained")
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Job queue drain timed out",
+                extra={"queue_size": self.queue_size, "in_flight": self.in_flight},
+            )
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _next_job(self) -> Tuple[Job, contextvars.Context]:
+        """輪詢取出下一個來源的工作，並將該來源移至隊尾"""
+        source, pending = next(iter(self._sources.items()))
+        item = pending.popleft()
+        if pending:
+            self._sources.move_to_end(source)
+        else:
+            del self._sources[source]
+        self._size -= 1
+        return item
+
+    async def _worker(self) -> None:
+        assert self._available is not None and self._idle is not None
+        while True:
+            await self._available.acquire()
+            job, ctx = self._next_job()
+            self._in_flight += 1
+            try:
+                await asyncio.create_task(job(), context=ctx)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Unhandled error in background job")
+            finally:
+                self._in_flight -= 1
+                if self._size == 0 and self._in_flight == 0:
+                    self._idle.set()
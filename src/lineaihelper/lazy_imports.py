@@ -0,0 +1,71 @@
+import importlib
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+# Web 程序匯入 main 時不載入的重量級依賴；改於首次使用或背景預熱時載入
+HEAVY_MODULES: Tuple[str, ...] = (
+    "linebot.v3.messaging",
+    "google.genai",
+    "yfinance",
+    "pandas_ta",
+)
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def preload(modules: Sequence[str] = HEAVY_MODULES) -> Dict[str, float]:
+    """依序匯入模組，回傳各模組的載入秒數 (已載入者趨近 0)"""
+    timings: Dict[str, float] = {}
+    for name in modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+@dataclass(frozen=True)
+class ImportRecord:
+    """python -X importtime 的單筆紀錄 (時間單位為微秒)"""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """解析 -X importtime 輸出 (stderr)，忽略無法辨識的行"""
+    records = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append(
+            ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2)
+        )
+    return records
+
+
+def measure_import(module: str = "lineaihelper.main") -> List[ImportRecord]:
+    """於全新的子程序匯入 module 並回傳各模組的載入時間"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def top_packages(records: List[ImportRecord]) -> List[Tuple[str, int]]:
+    """依頂層套件彙總 self 時間 (微秒)，由高至低排序"""
+    totals: Dict[str, int] = {}
+    for record in records:
+        package = record.module.split(".", 1)[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
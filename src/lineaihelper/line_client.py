@@ -0,0 +1,68 @@
+import sys
+from typing import TYPE_CHECKING, List, Optional, TypeGuard
+
+if TYPE_CHECKING:
+    from linebot.v3.messaging import ApiException, AsyncApiClient, AsyncMessagingApi
+
+
+class LineClient:
+    """
+    LINE Messaging API 用戶端的延遲初始化包裝。
+
+    linebot.v3.messaging 含數百個 pydantic 模型，匯入約需 1 秒；
+    改於首次發送訊息 (或背景預熱) 時才載入，Web 程序可更快開始接收 Webhook。
+    """
+
+    def __init__(self, access_token: str):
+        self.access_token = access_token
+        self._client: Optional["AsyncApiClient"] = None
+        self._api: Optional["AsyncMessagingApi"] = None
+
+    @property
+    def api(self) -> "AsyncMessagingApi":
+        if self._api is None:
+            from linebot.v3.messaging import (
+                AsyncApiClient,
+                AsyncMessagingApi,
+                Configuration,
+            )
+
+            self._client = AsyncApiClient(Configuration(access_token=self.access_token))
+            self._api = AsyncMessagingApi(self._client)
+        return self._api
+
+    async def reply(self, reply_token: str, texts: List[str]) -> Optional[str]:
+        """以 Reply Token 回覆，回傳 LINE 的 x-line-request-id"""
+        from linebot.v3.messaging import ReplyMessageRequest, TextMessage
+
+        response = await self.api.reply_message_with_http_info(
+            ReplyMessageRequest(
+                reply_token=reply_token,
+                messages=[TextMessage(text=text) for text in texts],
+            )
+        )
+        return response.headers.get("x-line-request-id") if response.headers else None
+
+    async def push(self, to: str, texts: List[str]) -> Optional[str]:
+        """主動推播訊息，回傳 LINE 的 x-line-request-id"""
+        from linebot.v3.messaging import PushMessageRequest, TextMessage
+
+        response = await self.api.push_message_with_http_info(
+            PushMessageRequest(
+                to=to,
+                messages=[TextMessage(text=text) for text in texts],
+            )
+        )
+        return response.headers.get("x-line-request-id") if response.headers else None
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._api = None
+
+
+def is_api_exception(exc: BaseException) -> TypeGuard["ApiException"]:
+    """是否為 LINE SDK 的 ApiException；SDK 尚未載入時必定不是，無須為此匯入"""
+    module = sys.modules.get("linebot.v3.messaging.exceptions")
+    return module is not None and isinstance(exc, module.ApiException)
@@ -0,0 +1,440 @@
+import heapq
+import math
+import re
+import zipfile
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+
+# 日誌中標示各階段的訊息 (與 middlewares / main / dispatcher 一致)
+MSG_START = "開始處理請求"
+MSG_RECEIVED = "收到使用者訊息"
+MSG_DISPATCH = "Dispatching command"
+MSG_REPLIED = "訊息回覆成功"
+MSG_PUSHED = "訊息推播成功"
+MSG_ACKED = "Reply budget at risk, acknowledged and switched to push"
+
+# 訊息 -> 請求狀態；後出現的較嚴重狀態會覆蓋先前的狀態
+STATUS_MESSAGES: Dict[str, str] = {
+    "Result cache hit": "cached",
+    "Service error occurred": "error",
+    "Unexpected error in command": "error",
+    "Command timed out": "timeout",
+    "Command concurrency limit reached": "rejected",
+    "Rate limit exceeded": "rate_limited",
+    "Delivery deadline exceeded, cancelling job": "expired",
+    "Event expired before processing": "expired",
+}
+STATUS_SEVERITY = {
+    "incomplete": 0,
+    "ok": 1,
+    "cached": 2,
+    "rejected": 3,
+    "rate_limited": 3,
+    "error": 4,
+    "timeout": 5,
+    "expired": 6,
+}
+# 出現即代表請求已結束的訊息；Reply 成功後仍可能是確認訊息 (之後改為 Push)，
+# 因此僅在 grace 秒內未出現後續紀錄時才視為結束
+TERMINAL_MESSAGES = {
+    MSG_PUSHED,
+    "Rate limit exceeded",
+    "Delivery deadline exceeded, cancelling job",
+    "Event expired before processing",
+}
+
+_FILE_NAME = re.compile(r"_(\d{4}-\d{2}-\d{2})(?:\.([\d_-]+))?\.log(?:\.zip)?$")
+
+
+@dataclass
+class LogEvent:
+    ts: float
+    level: str
+    message: str
+    trace_id: str
+    request_id: str
+    fields: Dict[str, Any]
+
+
+@dataclass
+class RequestRow:
+    """單一請求的彙整結果 (欄位即輸出的欄位順序)"""
+
+    trace_id: str
+    request_id: str
+    start: float
+    hour: str
+    command: str = ""
+    symbol: str = ""
+    status: str = "incomplete"
+    delivery: str = ""
+    ingress_ms: Optional[float] = None
+    queue_ms: Optional[float] = None
+    exec_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+
+
+@dataclass
+class _RequestState:
+    first_ts: float
+    trace_id: str
+    request_id: str
+    start_ts: Optional[float] = None
+    received_ts: Optional[float] = None
+    dispatch_ts: Optional[float] = None
+    done_ts: Optional[float] = None
+    command: str = ""
+    user_text: str = ""
+    status: str = "incomplete"
+    delivery: str = ""
+    done: bool = False
+
+    @property
+    def replied(self) -> bool:
+        return self.delivery == "reply"
+
+    def to_row(self) -> RequestRow:
+        start = self.start_ts or self.received_ts or self.first_ts
+        symbol = ""
+        if self.command:
+            # 指令行的第一個參數即為代碼 (如 ".stock 2330 trend")
+            for line in self.user_text.splitlines():
+                parts = line.split()
+                if len(parts) > 1 and parts[0].startswith("."):
+                    symbol = parts[1].upper()
+                    break
+
+        def span(a: Optional[float], b: Optional[float]) -> Optional[float]:
+            return round((b - a) * 1000, 3) if a is not None and b is not None else None
+
+        return RequestRow(
+            trace_id=self.trace_id,
+            request_id=self.request_id,
+            start=start,
+            hour=datetime.fromtimestamp(start, timezone.utc).strftime("%Y-%m-%d %H:00"),
+            command=self.command,
+            symbol=symbol if self.command in (".stock", ".price") else "",
+            status=self.status,
+            delivery=self.delivery,
+            ingress_ms=span(self.start_ts, self.received_ts),
+            queue_ms=span(self.received_ts, self.dispatch_ts),
+            exec_ms=span(self.dispatch_ts, self.done_ts),
+            total_ms=span(self.start_ts or self.received_ts, self.done_ts),
+        )
+
+
+def _file_sort_key(path: Path) -> Tuple[str, int, str]:
+    match = _FILE_NAME.search(path.name)
+    if not match:
+        return ("", 1, path.name)
+    date, stamp = match.groups()
+    # 同一天中，已輪替的檔案 (有時間戳) 早於目前寫入中的檔案
+    return (date, 0 if stamp else 1, stamp or "")
+
+
+def _stream_name(path: Path) -> str:
+    """日誌檔所屬的輸出串流 (如 linenexus_error_w1)；同一串流內的紀錄依時間排列"""
+    match = _FILE_NAME.search(path.name)
+    return path.name[: match.start()] if match else path.name
+
+
+def iter_log_files(
+    paths: Iterable[str],
+    prefixes: Tuple[str, ...] = ("linenexus_info", "linenexus_error"),
+) -> List[Path]:
+    """
+    展開目錄並依時間順序排列日誌檔 (含輪替壓縮檔)。
+
+    ERROR 以上的紀錄只寫入 linenexus_error_*，因此預設同時讀取 INFO 與 ERROR 檔，
+    由 iter_requests 依時間合併。
+    """
+    files: List[Path] = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            for prefix in prefixes:
+                files.extend(path.glob(f"{prefix}_*.log"))
+                files.extend(path.glob(f"{prefix}_*.log.zip"))
+        elif path.exists():
+            files.append(path)
+    return sorted(set(files), key=_file_sort_key)
+
+
+def iter_lines(path: Path) -> Iterator[bytes]:
+    """逐行讀取日誌檔；zip 檔直接串流解壓，不載入整個檔案"""
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path) as zf:
+            for name in zf.namelist():
+                with zf.open(name) as member:
+                    yield from member
+    else:
+        with open(path, "rb") as f:
+            yield from f
+
+
+def parse_line(line: bytes) -> Optional[LogEvent]:
+    """
+    解析一行 JSON 日誌；同時支援本專案格式與 loguru serialize=True 的舊格式。
+    """
+    try:
+        data = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    record = data.get("record")
+    if isinstance(record, dict):
+        ts = float(record["time"]["timestamp"])
+        level = record["level"]["name"]
+        message = record["message"]
+        extra = record.get("extra", {})
+    else:
+        raw_ts = data.get("timestamp")
+        if not isinstance(raw_ts, str):
+            return None
+        try:
+            ts = datetime.fromisoformat(raw_ts).timestamp()
+        except ValueError:
+            return None
+        level = data.get("level", "")
+        message = data.get("message", "")
+        extra = data.get("extra", {})
+
+    nested = extra.get("extra")
+    return LogEvent(
+        ts=ts,
+        level=level,
+        message=message,
+        trace_id=extra.get("trace_id", "system"),
+        request_id=extra.get("request_id", ""),
+        fields=nested if isinstance(nested, dict) else {},
+    )
+
+
+class LatencyHistogram:
+    """
+    對數分桶的延遲直方圖 (相對誤差約 5%)，記憶體用量與資料量無關。
+    """
+
+    BASE = 1.1
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.max = 0.0
+        self._buckets: Dict[int, int] = {}
+
+    def add(self, value: float) -> None:
+        index = math.ceil(math.log(max(value, 0.01), self.BASE))
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self.BASE**index, self.max)
+        return self.max
+
+
+@dataclass
+class LatencyStats:
+    by_command: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    by_hour: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    statuses: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, row: RequestRow) -> None:
+        self.statuses[row.status] = self.statuses.get(row.status, 0) + 1
+        if row.total_ms is None:
+            return
+        command = row.command or "(none)"
+        self.by_command.setdefault(command, LatencyHistogram()).add(row.total_ms)
+        self.by_hour.setdefault(row.hour, LatencyHistogram()).add(row.total_ms)
+
+
+class RequestJoiner:
+    """
+    以 (trace_id, request_id) 串接同一請求的紀錄。
+
+    僅保留時間窗內尚未結束的請求：收到結束訊息即輸出，超過 window 秒未結束者
+    視為中斷輸出，因此記憶體用量只與同時進行的請求數有關。
+    """
+
+    def __init__(
+        self, window: float = 300.0, grace: float = 5.0, max_open: int = 100_000
+    ):
+        self.window = window
+        self.grace = grace
+        self.max_open = max_open
+        self._open: "OrderedDict[Tuple[str, str], _RequestState]" = OrderedDict()
+
+    def feed(self, event: LogEvent) -> Iterator[RequestRow]:
+        if event.trace_id == "system":
+            return
+        key = (event.trace_id, event.request_id)
+        state = self._open.get(key)
+        if state is None:
+            state = _RequestState(event.ts, event.trace_id, event.request_id)
+            self._open[key] = state
+        self._apply(state, event)
+
+        if state.done:
+            del self._open[key]
+            yield state.to_row()
+
+        # 依首次出現順序淘汰逾時或超量的請求
+        while self._open:
+            oldest_key, oldest = next(iter(self._open.items()))
+            settled = (
+                oldest.replied
+                and oldest.done_ts is not None
+                and oldest.done_ts < event.ts - self.grace
+            )
+            if (
+                not settled
+                and oldest.first_ts >= event.ts - self.window
+                and len(self._open) <= self.max_open
+            ):
+                break
+            del self._open[oldest_key]
+            yield oldest.to_row()
+
+    def flush(self) -> Iterator[RequestRow]:
+        while self._open:
+            _, state = self._open.popitem(last=False)
+            yield state.to_row()
+
+    @staticmethod
+    def _apply(state: _RequestState, event: LogEvent) -> None:
+        message = event.message
+        if message == MSG_START:
+            state.start_ts = event.ts
+        elif message == MSG_RECEIVED:
+            state.received_ts = event.ts
+            state.user_text = str(event.fields.get("user_text", ""))
+        elif message == MSG_DISPATCH and state.dispatch_ts is None:
+            state.dispatch_ts = event.ts
+            state.command = str(event.fields.get("command", ""))
+
+        status = STATUS_MESSAGES.get(message)
+        if status and STATUS_SEVERITY[status] > STATUS_SEVERITY[state.status]:
+            state.status = status
+
+        if message == MSG_REPLIED:
+            state.done_ts = event.ts
+            state.delivery = "reply"
+        elif message == MSG_ACKED:
+            # 先前的 Reply 僅是確認訊息，實際結果將以 Push 送出
+            state.done_ts = None
+            state.delivery = "ack"
+        elif message in TERMINAL_MESSAGES:
+            state.done_ts = event.ts
+            state.done = True
+            if message == MSG_PUSHED:
+                state.delivery = "push"
+
+        if state.delivery in ("reply", "push") and state.status == "incomplete":
+            state.status = "ok"
+
+
+def iter_requests(
+    files: Iterable[Path], window: float = 300.0, grace: float = 5.0
+) -> Iterator[RequestRow]:
+    """
+    串流讀取所有日誌檔並逐一產生請求彙整結果。
+
+    各輸出串流 (INFO / ERROR、各程序) 的檔案依序串接後，再依時間合併成單一事件流。
+    """
+    streams: Dict[str, List[Path]] = {}
+    for path in files:
+        streams.setdefault(_stream_name(path), []).append(path)
+
+    joiner = RequestJoiner(window=window, grace=grace)
+    events = heapq.merge(
+        *(_iter_events(paths) for paths in streams.values()), key=lambda e: e.ts
+    )
+    for event in events:
+        yield from joiner.feed(event)
+    yield from joiner.flush()
+
+
+def _iter_events(files: Iterable[Path]) -> Iterator[LogEvent]:
+    for path in files:
+        for line in iter_lines(path):
+            event = parse_line(line)
+            if event is not None:
+                yield event
+
+
+class ParquetRowWriter:
+    """
+    以固定大小的批次寫入 Parquet，輸出檔為欄式格式且記憶體用量固定。
+    需要安裝 pyarrow (pip install 'lineaihelper[analytics]')。
+    """
+
+    def __init__(self, path: str, batch_size: int = 50_000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError(
+                "輸出 Parquet 需要 pyarrow，請安裝 lineaihelper[analytics]"
+            ) from e
+
+        self._pa = pa
+        self.batch_size = batch_size
+        self.rows_written = 0
+        float_fields = {"start", "ingress_ms", "queue_ms", "exec_ms", "total_ms"}
+        self._columns = [f.name for f in fields(RequestRow)]
+        self._schema = pa.schema(
+            [
+                (name, pa.float64() if name in float_fields else pa.string())
+                for name in self._columns
+            ]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+        self._batch: Dict[str, List[Any]] = {name: [] for name in self._columns}
+        self._pending = 0
+
+    def write(self, row: RequestRow) -> None:
+        for name, value in asdict(row).items():
+            self._batch[name].append(value)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        table = self._pa.table(self._batch, schema=self._schema)
+        self._writer.write_table(table)
+        self.rows_written += self._pending
+        self._batch = {name: [] for name in self._columns}
+        self._pending = 0
+
+
+def format_table(title: str, groups: Dict[str, LatencyHistogram]) -> str:
+    """輸出 p50 / p90 / p99 / max 延遲表 (毫秒)"""
+    header = f"{title:<18} {'count':>8} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}"
+    lines = [header, "-" * len(header)]
+    for name in sorted(groups):
+        h = groups[name]
+        lines.append(
+            f"{name:<18} {h.count:>8} {h.percentile(0.5):>10.1f} "
+            f"{h.percentile(0.9):>10.1f} {h.percentile(0.99):>10.1f} {h.max:>10.1f}"
+        )
+    return "\n".join(lines)
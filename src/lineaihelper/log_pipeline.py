@@ -0,0 +1,272 @@
+import os
+import random
+import sys
+import threading
+import time
+import zipfile
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Protocol,
+    Tuple,
+)
+
+from lineaihelper.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    from loguru import Record
+
+LOG_DROPPED = REGISTRY.counter(
+    "linenexus_log_records_dropped_total",
+    "Log records dropped because the log queue was full (oldest first).",
+    # 任何記錄日誌的執行緒 (含 to_thread) 都會更新
+    thread_safe=True,
+)
+LOG_SAMPLED_OUT = REGISTRY.counter(
+    "linenexus_log_records_sampled_out_total",
+    "INFO/DEBUG log records skipped by sampling.",
+    # 任何記錄日誌的執行緒 (含 to_thread) 都會更新
+    thread_safe=True,
+)
+
+WARNING_LEVEL_NO = 30
+
+
+class LogWriter(Protocol):
+    def write(self, line: bytes) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class StreamWriter:
+    """寫入 stdout 等位元組串流；未指定時於寫入當下取用 sys.stdout"""
+
+    def __init__(self, stream: Optional[IO[bytes]] = None):
+        self._stream = stream
+
+    @property
+    def stream(self) -> IO[bytes]:
+        return self._stream if self._stream is not None else sys.stdout.buffer
+
+    def write(self, line: bytes) -> None:
+        self.stream.write(line)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        self.flush()
+
+
+class RotatingFileWriter:
+    """
+    依大小或日期輪替的檔案寫入器，輪替後的檔案壓縮為 zip 並依保留天數清除。
+
+    檔名格式與原本的 loguru sink 相同：{prefix}_{YYYY-MM-DD}.log，
+    輪替檔為 {prefix}_{YYYY-MM-DD}.{時間戳}.log.zip。清除過期檔案時以 family
+    (預設為 prefix) 比對檔名，讓各程序的檔案 (含已結束程序) 都會被清除。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str,
+        max_bytes: int,
+        retention_days: float,
+        compress: bool = True,
+        clock: Callable[[], float] = time.time,
+        family: Optional[str] = None,
+    ):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.family = family or prefix
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.compress = compress
+        self._clock = clock
+        self._file: Optional[IO[bytes]] = None
+        self._date = ""
+        self._size = 0
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.prefix}_{self._date}.log"
+
+    def write(self, line: bytes) -> None:
+        today = datetime.fromtimestamp(self._clock()).strftime("%Y-%m-%d")
+        if self._file is None:
+            self._open(today)
+        elif today != self._date or self._size + len(line) > self.max_bytes:
+            self._rotate()
+            self._open(today)
+        assert self._file is not None
+        self._file.write(line)
+        self._size += len(line)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self, date: str) -> None:
+        self._date = date
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _rotate(self) -> None:
+        self.close()
+        stamp = datetime.fromtimestamp(self._clock()).strftime("%Y-%m-%d_%H-%M-%S_%f")
+        rotated = self.directory / f"{self.prefix}_{self._date}.{stamp}.log"
+        os.replace(self.path, rotated)
+        if self.compress:
+            with zipfile.ZipFile(
+                f"{rotated}.zip", "w", compression=zipfile.ZIP_DEFLATED
+            ) as zf:
+                zf.write(rotated, arcname=rotated.name)
+            rotated.unlink()
+        self._purge()
+
+    def _purge(self) -> None:
+        cutoff = self._clock() - self.retention_days * 86400
+        for path in self.directory.glob(f"{self.family}_*"):
+            if path != self.path and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+
+
+@dataclass
+class Destination:
+    """輸出目標與其接受的等級範圍 [min_level, max_level)"""
+
+    writer: LogWriter
+    min_level: int = 0
+    max_level: Optional[int] = None
+
+    def accepts(self, level_no: int) -> bool:
+        return level_no >= self.min_level and (
+            self.max_level is None or level_no < self.max_level
+        )
+
+
+class Sampler:
+    """
+    INFO 以下紀錄的取樣器；WARNING 以上一律保留。
+
+    以 trace_id 雜湊決定，同一請求的紀錄會一起保留或略過，便於事後串接。
+    """
+
+    def __init__(
+        self, default_rate: float = 1.0, rates: Optional[Dict[str, float]] = None
+    ):
+        self.default_rate = default_rate
+        self.rates = rates or {}
+
+    def __call__(self, record: "Record") -> bool:
+        if record["level"].no >= WARNING_LEVEL_NO:
+            return True
+        rate = self.rates.get(record["message"], self.default_rate)
+        if rate >= 1:
+            return True
+        trace_id = record["extra"].get("trace_id", "system")
+        if trace_id == "system":
+            keep = random.random() < rate
+        else:
+            keep = zlib.crc32(trace_id.encode("utf-8")) / 2**32 < rate
+        if not keep:
+            LOG_SAMPLED_OUT.inc()
+        return keep
+
+
+class LogPipeline:
+    """
+    Loguru sink：每筆紀錄只序列化一次，放入有上限的佇列，
+    由背景執行緒寫入所有輸出目標。
+
+    佇列滿時丟棄最舊的紀錄並計數，記憶體用量不隨突發流量成長。
+    """
+
+    def __init__(
+        self,
+        destinations: List[Destination],
+        serializer: Callable[[Dict[str, Any]], bytes],
+        max_queue: int = 10_000,
+        flush_interval: float = 0.5,
+    ):
+        self.destinations = destinations
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._serialize = serializer
+        self._queue: Deque[Tuple[int, bytes]] = deque(maxlen=max_queue)
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def sink(self, message: Any) -> None:
+        record = message.record
+        line = self._serialize(record)
+        if len(self._queue) >= self.max_queue:
+            # deque(maxlen) 會自動移除最舊的一筆
+            self.dropped += 1
+            LOG_DROPPED.inc()
+        self._queue.append((record["level"].no, line))
+        self._wakeup.set()
+
+    def drain(self) -> int:
+        """寫出佇列中所有紀錄並回傳筆數"""
+        written = 0
+        while self._queue:
+            try:
+                level_no, line = self._queue.popleft()
+            except IndexError:
+                break
+            for destination in self.destinations:
+                if destination.accepts(level_no):
+                    destination.writer.write(line)
+            written += 1
+        if written:
+            for destination in self.destinations:
+                destination.writer.flush()
+        return written
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._stopped = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.drain()
+        for destination in self.destinations:
+            destination.writer.close()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception as e:  # pragma: no cover - 寫入錯誤不可中斷執行緒
+                sys.stderr.write(f"log pipeline write failed: {e}\n")
@@ -1,16 +1,28 @@
-import json
+import atexit
+import os
 import sys
-from typing import Any
+import traceback
+from typing import Any, Optional
 
+import orjson
 from loguru import logger
 
 from lineaihelper.config import settings
+from lineaihelper.log_pipeline import (
+    Destination,
+    LogPipeline,
+    RotatingFileWriter,
+    Sampler,
+    StreamWriter,
+)
 
+ERROR_LEVEL_NO = 40
 
-def serialize(record: Any) -> str:
-    """
-    將 Loguru 紀錄序列化為自定義 JSON 格式。
-    """
+# 目前使用中的日誌管線 (重新初始化時先關閉舊的)
+_pipeline: Optional[LogPipeline] = None
+
+
+def _to_dict(record: Any) -> dict:
     subset = {
         "timestamp": record["time"].isoformat(),
         "level": record["level"].name,
@@ -20,18 +32,50 @@ def serialize(record: Any) -> str:
         "line": record["line"],
         "extra": record["extra"],
     }
-    if record.get("exception"):
+    exception = record.get("exception")
+    if exception:
         subset["exception"] = {
-            "type": record["exception"].type.__name__,
-            "message": str(record["exception"].value),
-            "traceback": record["exception"].traceback,
+            "type": exception.type.__name__ if exception.type else None,
+            "message": str(exception.value),
+            # traceback 物件無法直接序列化，先格式化為文字
+            "traceback": "".join(
+                traceback.format_exception(
+                    exception.type, exception.value, exception.traceback
+                )
+            ),
         }
-    return json.dumps(subset, ensure_ascii=False)
+    return subset
+
+
+def serialize_bytes(record: Any) -> bytes:
+    """
+    將 Loguru 紀錄序列化為單行 JSON (含換行)，無法序列化的值以 str() 表示。
+    """
+    return orjson.dumps(_to_dict(record), default=str) + b"\n"
+
+
+def serialize(record: Any) -> str:
+    """
+    將 Loguru 紀錄序列化為自定義 JSON 格式。
+    """
+    return orjson.dumps(_to_dict(record), default=str).decode("utf-8")
+
+
+def process_log_name(role: str, index: Optional[int] = None) -> str:
+    """日誌檔名中的程序識別：{角色}{編號}，沒有編號時以 PID 區分 (如 worker-4242)"""
+    return f"{role}{index}" if index is not None else f"{role}-{os.getpid()}"
+
 
+def logging_configured() -> bool:
+    return _pipeline is not None
 
-def setup_logging() -> None:
+
+def setup_logging(process: Optional[str] = None) -> None:
     """
     配置結構化日誌（包含 INFO / ERROR 分流）
+
+    多程序部署時各程序寫入各自的檔案 (檔名加上 _{process}，見 process_log_name)，
+    避免多個程序同時輪替同一個檔案。
     """
 
     # ==============================
@@ -40,19 +84,50 @@ def setup_logging() -> None:
     # 避免重複輸出 log（很重要）
     logger.remove()
 
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.close()
+
+    sampler = Sampler(settings.LOG_INFO_SAMPLE_RATE, settings.LOG_SAMPLE_RATES)
+
     # ==============================
-    # 2. 設定 Console 輸出
+    # 2. 檔案輸出 (INFO / ERROR 分流)
     # ==============================
-    if settings.LOG_JSON:
-        # JSON 格式輸出用的 sink
-        def json_sink(msg: Any) -> None:
-            sys.stdout.write(serialize(msg.record) + "\n")
-
-        logger.add(
-            json_sink,
-            level="INFO",  # Console 顯示 INFO 以上
-        )
+    # 每筆紀錄只序列化一次，經有上限的佇列交由背景執行緒寫入所有目標
+    suffix = f"_{process}" if process else ""
+    destinations = [
+        Destination(
+            # 檔案滿 200MB 就切新檔，保留 7 天並壓縮舊檔；只收 INFO ~ WARNING
+            # (family：一併清除已結束程序留下的過期檔案)
+            RotatingFileWriter(
+                settings.LOG_DIR,
+                f"linenexus_info{suffix}",
+                200 * 1024 * 1024,
+                retention_days=7,
+                family="linenexus_info",
+            ),
+            min_level=20,
+            max_level=ERROR_LEVEL_NO,
+        ),
+        Destination(
+            # 錯誤專用：100MB 切檔、保留 30 天
+            RotatingFileWriter(
+                settings.LOG_DIR,
+                f"linenexus_error{suffix}",
+                100 * 1024 * 1024,
+                retention_days=30,
+                family="linenexus_error",
+            ),
+            min_level=ERROR_LEVEL_NO,
+        ),
+    ]
 
+    # ==============================
+    # 3. 設定 Console 輸出
+    # ==============================
+    if settings.LOG_JSON:
+        # JSON 格式與檔案共用同一份序列化結果
+        destinations.append(Destination(StreamWriter(), min_level=20))
     else:
         # 一般文字格式輸出
         log_format = (
@@ -68,43 +143,19 @@ def setup_logging() -> None:
             format=log_format,
             level="INFO",
             colorize=True,
+            filter=sampler,
         )
 
     # ==============================
-    # 3. INFO 日誌檔案（一般紀錄）
-    # ==============================
-    logger.add(
-        "logs/linenexus_info_{time:YYYY-MM-DD}.log",
-        # 檔案滿 200MB 就切新檔
-        rotation="200 MB",
-        # 保留 7 天
-        retention="7 days",
-        # 壓縮舊檔
-        compression="zip",
-        encoding="utf-8",
-        # 只收 INFO ~ WARNING
-        level="INFO",
-        # 非同步寫入（避免卡主程式）
-        enqueue=True,
-        serialize=True,
-        # 過濾 ERROR 以上（避免重複）
-        filter=lambda record: record["level"].no < 40,
-    )
-
-    # ==============================
-    # 4. ERROR 日誌檔案（錯誤專用）
+    # 4. 啟動日誌管線
     # ==============================
-    logger.add(
-        "logs/linenexus_error_{time:YYYY-MM-DD}.log",
-        rotation="100 MB",
-        retention="30 days",
-        compression="zip",
-        encoding="utf-8",
-        # 只收 ERROR 以上
-        level="ERROR",
-        enqueue=True,
-        serialize=True,
+    _pipeline = LogPipeline(
+        destinations,
+        serializer=serialize_bytes,
+        max_queue=settings.LOG_QUEUE_MAX_SIZE,
     )
+    _pipeline.start()
+    logger.add(_pipeline.sink, level="INFO", filter=sampler)
 
     # ==============================
     # 5. 預設 trace_id
@@ -112,3 +163,15 @@ def setup_logging() -> None:
     logger.configure(extra={"trace_id": "system"})
 
     logger.info("日誌系統初始化完成（INFO / ERROR 分流）")
+
+
+def shutdown_logging() -> None:
+    """寫出佇列中剩餘的紀錄並關閉檔案"""
+    global _pipeline
+    if _pipeline is not None:
+        logger.remove()
+        _pipeline.close()
+        _pipeline = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from contextlib import suppress
+from typing import Callable, Optional
+
+from loguru import logger
+
+from lineaihelper.context import trace_id_var
+from lineaihelper.metrics import REGISTRY
+
+LOOP_LAG = REGISTRY.histogram(
+    "linenexus_event_loop_lag_seconds",
+    "Event loop scheduling lag in seconds.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_BLOCKED = REGISTRY.counter(
+    "linenexus_event_loop_blocked_total",
+    "Times the event loop was blocked longer than the lag threshold.",
+    # 由看門狗執行緒更新
+    thread_safe=True,
+)
+
+
+class LoopLagMonitor:
+    """
+    事件迴圈延遲監控。
+
+    - 迴圈內的探測任務每 interval 秒醒來一次，以「實際醒來時間 - 預期時間」
+      作為排程延遲寫入直方圖，並更新心跳時間。
+    - 獨立的看門狗執行緒檢查心跳；迴圈被同步程式碼卡住超過 threshold 時，
+      直接擷取迴圈執行緒當下的呼叫堆疊，連同執行中任務的 trace_id 一併記錄。
+      每次阻塞只記錄一次。
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.25,
+        stack_limit: int = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self._clock = clock
+        self._beat = 0.0
+        self._reported = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """於事件迴圈內呼叫，啟動探測任務與看門狗執行緒"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._beat = self._clock()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, self.interval * 2)
+
+    async def _probe(self) -> None:
+        while True:
+            start = self._clock()
+            await asyncio.sleep(self.interval)
+            now = self._clock()
+            LOOP_LAG.observe(max(0.0, now - start - self.interval))
+            self._beat = now
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            stalled = self._clock() - self._beat - self.interval
+            if stalled < self.threshold:
+                self._reported = False
+            elif not self._reported:
+                self._reported = True
+                self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = (
+            "".join(traceback.format_stack(frame, limit=self.stack_limit))
+            if frame is not None
+            else ""
+        )
+
+        # 由看門狗執行緒讀取迴圈上正在執行的任務，取得其 Context 中的 trace_id
+        trace_id = "system"
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        if task is not None:
+            trace_id = task.get_context().get(trace_id_var, "system")
+
+        LOOP_BLOCKED.inc()
+        logger.bind(trace_id=trace_id).warning(
+            "Event loop blocked",
+            extra={
+                "blocked_seconds": round(stalled, 3),
+                "task": task.get_name() if task is not None else None,
+                "stack": stack,
+            },
+        )
@@ -1,26 +1,24 @@
 import asyncio
-from contextlib import asynccontextmanager
-from typing import AsyncIterator
+import hmac
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Callable, Coroutine, List, Optional, Set
 
 import uvicorn
 from fastapi import FastAPI, HTTPException, Request
-from google import genai
-from linebot.v3 import WebhookHandler
-from linebot.v3.exceptions import InvalidSignatureError
-from linebot.v3.messaging import (
-    ApiException,
-    AsyncApiClient,
-    AsyncMessagingApi,
-    Configuration,
-    ReplyMessageRequest,
-    TextMessage,
-)
-from linebot.v3.webhooks import MessageEvent, TextMessageContent
+from fastapi.responses import JSONResponse, PlainTextResponse
 from loguru import logger
 
 from lineaihelper.config import settings
-from lineaihelper.context import line_inbound_id_var, request_id_var, trace_id_var
+from lineaihelper.context import (
+    line_inbound_id_var,
+    request_id_var,
+    trace_id_var,
+    user_id_var,
+)
+from lineaihelper.delivery import DeliveryBudget, deliver_with_deadline
 from lineaihelper.dispatcher import CommandDispatcher
+from lineaihelper.durable_queue import DurableQueue
 from lineaihelper.exception_handlers import (
     business_exception_handler,
     global_exception_handler,
@@ -28,11 +26,64 @@ from lineaihelper.exception_handlers import (
     line_api_exception_handler,
 )
 from lineaihelper.exceptions import LineNexusError
-from lineaihelper.logging_config import setup_logging
-from lineaihelper.middlewares import add_trace_id_middleware
+from lineaihelper.idempotency import IdempotencyStore, InFlightJob
+from lineaihelper.job_queue import JobQueue
+from lineaihelper.line_client import LineClient, is_api_exception
+from lineaihelper.logging_config import (
+    logging_configured,
+    process_log_name,
+    setup_logging,
+)
+from lineaihelper.loop_monitor import LoopLagMonitor
+from lineaihelper.metrics import JOBS_IN_FLIGHT, JOBS_QUEUED, REGISTRY, track
+from lineaihelper.middlewares import TraceIdMiddleware
+from lineaihelper.profiling import RequestProfiler
+from lineaihelper.rate_limiter import RateLimiter
+from lineaihelper.readiness import (
+    DependencyProbes,
+    MarketOpenWarmer,
+    Readiness,
+    dependency_checks,
+    prefetch_symbol,
+    warmup_steps,
+)
+from lineaihelper.services import ChatService
+from lineaihelper.tracing import SPAN_KIND_SERVER, SpanExporter, configure, span
+from lineaihelper.webhook import (
+    InvalidSignatureError,
+    TextMessageEvent,
+    parse_webhook,
+    to_payload,
+)
+
+# 初始化日誌 (由 serve / worker 啟動時已依程序設定檔名)；單一程序的 "all" 角色
+# 使用預設檔名，其餘角色可能同時執行多個程序，檔名加上角色與 PID
+if not logging_configured():
+    setup_logging(
+        None
+        if settings.PROCESS_ROLE == "all"
+        else process_log_name(settings.PROCESS_ROLE)
+    )
+
+BUSY_REPLY_TEXT = "系統目前忙碌中，請稍後再試。"
+RATE_LIMITED_REPLY_TEXT = "指令使用過於頻繁，請稍後再試。"
+ACK_REPLY_TEXT = "已收到您的請求，正在處理中，完成後將主動傳送結果。"
+
+# 保留輕量背景任務 (如忙碌回覆) 的參照，避免被 GC 回收
+_background_tasks: Set[asyncio.Task[None]] = set()
+
+
+def _spawn(coro: Coroutine[None, None, None]) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
 
-# 初始化日誌
-setup_logging()
+
+async def _flush_spans(exporter: SpanExporter) -> None:
+    """定期於背景執行緒寫出 Span，避免檔案 I/O 阻塞事件迴圈"""
+    while True:
+        await asyncio.sleep(settings.TRACE_FLUSH_INTERVAL_SECONDS)
+        await asyncio.to_thread(exporter.flush)
 
 
 @asynccontextmanager
@@ -40,28 +91,142 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """
     FastAPI 生命週期管理
     """
-    configuration = Configuration(access_token=settings.LINE_CHANNEL_ACCESS_TOKEN)
-    async_api_client = AsyncApiClient(configuration)
-    app.state.line_bot_api = AsyncMessagingApi(async_api_client)
+    # LINE SDK 與 Gemini 用戶端皆於首次使用時才載入，縮短啟動時間
+    line_client = LineClient(settings.LINE_CHANNEL_ACCESS_TOKEN)
+    app.state.line_client = line_client
+    dispatcher = CommandDispatcher()
+    app.state.dispatcher = dispatcher
+
+    job_queue = JobQueue(
+        workers=settings.JOB_WORKERS,
+        max_size=settings.JOB_QUEUE_MAX_SIZE,
+        max_per_source=settings.JOB_QUEUE_MAX_PER_SOURCE,
+    )
+    job_queue.start()
+    app.state.job_queue = job_queue
+    JOBS_QUEUED.set_function(lambda: job_queue.queue_size)
+    JOBS_IN_FLIGHT.set_function(lambda: job_queue.in_flight)
+    app.state.idempotency = IdempotencyStore(
+        ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+        max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+        # 多 Worker 時重送事件可能落在其他程序，需透過共享快取去重
+        backend=dispatcher.deps.shared_cache("idempotency"),
+    )
+
+    # Ingress 模式：事件只寫入持久化佇列，由獨立的 Worker 程序處理
+    durable_queue: Optional[DurableQueue] = None
+    if settings.PROCESS_ROLE == "ingress":
+        durable_queue = DurableQueue(
+            settings.DURABLE_QUEUE_PATH,
+            visibility_timeout=settings.DURABLE_QUEUE_VISIBILITY_SECONDS,
+            max_attempts=settings.DURABLE_QUEUE_MAX_ATTEMPTS,
+        )
+    app.state.durable_queue = durable_queue
+
+    app.state.rate_limiter = RateLimiter(
+        user_limits=settings.RATE_LIMIT_USER_PER_MINUTE,
+        group_limits=settings.RATE_LIMIT_GROUP_PER_MINUTE,
+    )
+
+    exporter: Optional[SpanExporter] = None
+    flush_task: Optional[asyncio.Task[None]] = None
+    if settings.TRACE_SAMPLE_RATE > 0:
+        exporter = SpanExporter(settings.TRACE_EXPORT_PATH, settings.APP_NAME)
+        flush_task = asyncio.create_task(_flush_spans(exporter))
+    configure(settings.TRACE_SAMPLE_RATE, exporter)
+    app.state.profiler = (
+        RequestProfiler(settings.PROFILE_DIR) if settings.PROFILING_ENABLED else None
+    )
+
+    loop_monitor: Optional[LoopLagMonitor] = None
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor = LoopLagMonitor(
+            interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+            threshold=settings.LOOP_MONITOR_THRESHOLD_SECONDS,
+        )
+        loop_monitor.start()
 
-    gemini_client = genai.Client(api_key=settings.GEMINI_API_KEY)
-    app.state.dispatcher = CommandDispatcher(gemini_client)
+    # 預熱完成前 /ready 回應 503，負載平衡器暫不導入流量；Ingress 不需預熱
+    worker_role = settings.PROCESS_ROLE != "ingress"
+    local_stubs = settings.READINESS_LOCAL_STUBS
+    readiness = Readiness(
+        warmup_steps(
+            dispatcher.deps,
+            line_client,
+            settings.WARMUP_SYMBOLS,
+            settings.GEMINI_MODEL,
+            thread_pool_size=settings.JOB_WORKERS,
+            preload_imports=settings.IMPORT_WARMUP_ENABLED,
+            local_stubs=local_stubs,
+        )
+        if worker_role
+        else [],
+        timeout=settings.READINESS_WARMUP_TIMEOUT_SECONDS,
+    )
+    readiness.start()
+    app.state.readiness = readiness
+    probes = DependencyProbes(
+        dependency_checks(
+            dispatcher.deps,
+            line_client,
+            settings.DEPENDENCY_PROBE_SYMBOL,
+            settings.GEMINI_MODEL,
+            local_stubs=local_stubs,
+        )
+        if worker_role
+        else {},
+        interval=settings.DEPENDENCY_PROBE_INTERVAL_SECONDS,
+        timeout=settings.DEPENDENCY_PROBE_TIMEOUT_SECONDS,
+    )
+    if settings.DEPENDENCY_PROBE_INTERVAL_SECONDS > 0:
+        probes.start(after=readiness.wait)
+    app.state.dependency_probes = probes
+
+    # 開盤時重新預抓熱門代碼 (休市期間的快取會在開盤當下一起過期)
+    market_warmer: Optional[MarketOpenWarmer] = None
+    if (
+        worker_role
+        and not local_stubs
+        and settings.MARKET_CALENDAR_ENABLED
+        and settings.MARKET_OPEN_WARMUP_ENABLED
+    ):
+        deps = dispatcher.deps
+        market_warmer = MarketOpenWarmer(
+            deps.market_calendar,
+            settings.WARMUP_SYMBOLS,
+            lambda symbol: prefetch_symbol(deps.provider, symbol),
+        )
+        market_warmer.start(after=readiness.wait)
 
     logger.info("LINE 用戶端與指令分發器已初始化")
     yield
-    await async_api_client.close()
+    await readiness.stop()
+    await probes.stop()
+    if market_warmer is not None:
+        await market_warmer.stop()
+    # 先消化進行中的回覆，再關閉 LINE 用戶端
+    await job_queue.stop(drain_timeout=settings.JOB_DRAIN_TIMEOUT_SECONDS)
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    if flush_task is not None and exporter is not None:
+        flush_task.cancel()
+        exporter.flush()
+    await line_client.close()
+    if durable_queue is not None:
+        durable_queue.close()
+    shared_store = dispatcher.deps.shared_store
+    if shared_store is not None:
+        shared_store.close()
     logger.info("LINE 非同步用戶端已關閉")
 
 
 app = FastAPI(lifespan=lifespan)
-handler = WebhookHandler(settings.LINE_CHANNEL_SECRET)
 
 # 註冊 Middleware
-app.middleware("http")(add_trace_id_middleware)
+app.add_middleware(TraceIdMiddleware, skip_paths=settings.TRACE_SKIP_PATHS)
 
 # 註冊 Exception Handlers
 app.add_exception_handler(InvalidSignatureError, invalid_signature_handler)
-app.add_exception_handler(ApiException, line_api_exception_handler)
 app.add_exception_handler(LineNexusError, business_exception_handler)
 app.add_exception_handler(Exception, global_exception_handler)
 
@@ -82,9 +247,90 @@ def read_root() -> dict:
 @app.get("/health")
 def health_check() -> dict:
     """
-    健康檢查端點
+    存活檢查 (Liveness)：程序可回應即為健康，不代表已完成預熱
     """
-    return {"status": "healthy", "service": settings.APP_NAME}
+    job_queue: JobQueue = app.state.job_queue
+    return {
+        "status": "healthy",
+        "service": settings.APP_NAME,
+        "jobs": {"queued": job_queue.queue_size, "in_flight": job_queue.in_flight},
+    }
+
+
+@app.get("/ready")
+def readiness_check() -> JSONResponse:
+    """
+    就緒檢查 (Readiness)：預熱完成前回應 503，並附上各依賴的滾動探測延遲
+    """
+    readiness: Readiness = app.state.readiness
+    probes: DependencyProbes = app.state.dependency_probes
+    return JSONResponse(
+        status_code=200 if readiness.ready else 503,
+        content={
+            "status": "ready" if readiness.ready else "warming_up",
+            "warmup": readiness.results,
+            "dependencies": probes.snapshot(),
+        },
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """
+    Prometheus 指標端點 (文字格式)
+    """
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def verify_admin_token(request: Request) -> None:
+    """
+    驗證管理端點的 x-admin-token 標頭；未設定 ADMIN_TOKEN 時視同端點不存在
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@app.post("/admin/chat-cache/purge")
+def purge_chat_cache(request: Request) -> dict:
+    """
+    清空 .chat 近似問題快取
+    """
+    verify_admin_token(request)
+    dispatcher: CommandDispatcher = app.state.dispatcher
+    # 服務採延遲建立，尚未建立時沒有快取需要清除
+    chat_service = dispatcher.services.get(".chat")
+    purged = 0
+    if isinstance(chat_service, ChatService) and chat_service.answer_cache:
+        purged = chat_service.answer_cache.purge()
+    logger.info("Chat cache purged", extra={"purged": purged})
+    return {"purged": purged}
+
+
+@app.post("/admin/profile")
+def arm_profiler(request: Request, count: int = 1, user_id: str = "") -> dict:
+    """
+    預約剖析接下來 count 個工作 (可限定 user_id)
+    """
+    verify_admin_token(request)
+    profiler: Optional[RequestProfiler] = app.state.profiler
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    profiler.arm(count=count, user_id=user_id)
+    logger.info("Profiler armed", extra={"count": count, "user_id": user_id})
+    return {"armed": profiler.armed}
+
+
+def profile_requested(request: Request) -> bool:
+    """x-debug-profile 標頭需與 ADMIN_TOKEN 相符，且已啟用剖析"""
+    token = request.headers.get("x-debug-profile")
+    if not token or not settings.ADMIN_TOKEN or app.state.profiler is None:
+        return False
+    return hmac.compare_digest(token, settings.ADMIN_TOKEN)
 
 
 @app.post("/callback")
@@ -92,23 +338,86 @@ async def callback(request: Request) -> str:
     """
     LINE Webhook 回呼入口
     """
-    signature = request.headers.get("x-line-signature")
-    if not signature:
-        logger.warning("遺失 x-line-signature 標頭")
-        raise HTTPException(status_code=400, detail="Missing signature")
+    with track("callback", "/callback"), span("POST /callback", SPAN_KIND_SERVER):
+        signature = request.headers.get("x-line-signature")
+        if not signature:
+            logger.warning("遺失 x-line-signature 標頭")
+            raise HTTPException(status_code=400, detail="Missing signature")
 
-    body = await request.body()
-    body_str = body.decode("utf-8")
-    handler.handle(body_str, signature)
-    return "OK"
+        body = await request.body()
+        # 簽章只驗證一次；事件僅入列，業務處理全數交由背景 Worker 並行執行
+        try:
+            events = parse_webhook(body, signature, settings.LINE_CHANNEL_SECRET)
+        except ValueError:
+            logger.warning("無效的 Webhook Payload")
+            raise HTTPException(status_code=400, detail="Invalid payload") from None
 
+        profile = profile_requested(request)
+        durable_queue: Optional[DurableQueue] = app.state.durable_queue
+        if durable_queue is not None:
+            await enqueue_events(durable_queue, events, profile)
+            return "OK"
 
-@handler.add(MessageEvent, message=TextMessageContent)
-def handle_message(event: MessageEvent) -> None:
+        idempotency: IdempotencyStore = app.state.idempotency
+        for event in events:
+            event_id = event.webhook_event_id
+            if event_id and not await idempotency.claim(event_id):
+                # 重送事件：原始工作仍在執行時附掛等待，否則直接丟棄
+                original = idempotency.in_flight(event_id)
+                logger.info(
+                    "Duplicate webhook event",
+                    extra={
+                        "webhook_event_id": event_id,
+                        "is_redelivery": event.is_redelivery,
+                        "attached": original is not None,
+                    },
+                )
+                if original is not None:
+                    handle_message(event, attach_to=original)
+                continue
+            handle_message(event, profile=profile)
+        return "OK"
+
+
+async def enqueue_events(
+    queue: DurableQueue, events: List[TextMessageEvent], profile: bool = False
+) -> None:
+    """
+    Ingress 模式：事件連同追蹤資訊寫入持久化佇列後即回應 LINE。
+    重送事件以 webhookEventId 去重，寫入失敗時回傳 500 讓 LINE 重送。
+    """
+    context = {
+        "trace_id": trace_id_var.get(),
+        "request_id": request_id_var.get(),
+        "line_inbound_id": line_inbound_id_var.get(),
+        "profile": profile,
+    }
+    items = [(event.webhook_event_id, to_payload(event, context)) for event in events]
+    inserted = await asyncio.to_thread(queue.enqueue, items)
+    logger.info(
+        "Webhook events enqueued",
+        extra={"events": len(items), "duplicates": len(items) - inserted},
+    )
+
+
+def handle_message(
+    event: TextMessageEvent,
+    attach_to: Optional[InFlightJob] = None,
+    profile: bool = False,
+    on_finish: Optional[Callable[[], None]] = None,
+) -> None:
     """
     處理文字訊息事件
+
+    Args:
+        event: 文字訊息事件。
+        attach_to: 重送事件所附掛的原始工作；原始工作無法送達結果時，
+            改用本事件的 Reply Token 送出同一份結果，而不重新執行指令。
+        profile: 是否剖析此事件的背景工作 (由 x-debug-profile 標頭觸發)。
+        on_finish: 事件處理結束 (已回覆、限流或卸載) 後的回呼，
+            供持久化佇列的 Worker 確認 (ack) 工作。
     """
-    user_text = event.message.text.strip()
+    user_text = event.text.strip()
     logger.info(
         "收到使用者訊息",
         extra={
@@ -117,33 +426,43 @@ def handle_message(event: MessageEvent) -> None:
         },
     )
 
-    line_bot_api: AsyncMessagingApi = app.state.line_bot_api
+    line_client: LineClient = app.state.line_client
     dispatcher: CommandDispatcher = app.state.dispatcher
+    # 自然語句只路由一次，限流與執行皆使用路由後的指令
+    command_text = dispatcher.route(user_text)
+    job_queue: JobQueue = app.state.job_queue
+    idempotency: IdempotencyStore = app.state.idempotency
+    profiler: Optional[RequestProfiler] = app.state.profiler
+    event_id = event.webhook_event_id
 
     # 先擷取目前的 Context 變數，用於傳遞給背景任務
     t_id = trace_id_var.get()
     r_id = request_id_var.get()
     l_in_id = line_inbound_id_var.get()
+    user_id = event.user_id
+    push_target = event.push_target if settings.PUSH_FALLBACK_ENABLED else ""
+    budget = DeliveryBudget(
+        event_time=event.timestamp / 1000,
+        reply_ttl=settings.REPLY_TOKEN_TTL_SECONDS,
+        ack_after=settings.REPLY_ACK_AFTER_SECONDS,
+        job_budget=settings.JOB_BUDGET_SECONDS,
+    )
 
     async def process_and_reply(
-        trace_id: str, request_id: str, line_inbound_id: str
+        trace_id: str, request_id: str, line_inbound_id: str, profile: bool = False
     ) -> None:
         # 在背景任務中重新注入 Context
+        user_id_var.set(user_id)
         with logger.contextualize(
             trace_id=trace_id,
             request_id=request_id,
             line_inbound_id=line_inbound_id,
         ):
-            try:
-                reply_text = await dispatcher.parse_and_execute(user_text)
-                response = await line_bot_api.reply_message_with_http_info(
-                    ReplyMessageRequest(
-                        reply_token=event.reply_token,
-                        messages=[TextMessage(text=reply_text)],
-                    )
-                )
-                # LINE 回傳的 Request ID（發送回覆的追蹤碼）
-                line_outbound_id = response.headers.get("x-line-request-id")
+
+            async def reply(texts: List[str]) -> None:
+                with track("line", "reply"), span("line.reply"):
+                    # LINE 回傳的 Request ID（發送回覆的追蹤碼）
+                    line_outbound_id = await line_client.reply(event.reply_token, texts)
                 logger.info(
                     "訊息回覆成功",
                     extra={
@@ -153,19 +472,122 @@ def handle_message(event: MessageEvent) -> None:
                     },
                 )
 
-            except ApiException as e:
-                # 復用集中管理的處理邏輯 (傳入 None 作為 Request)
-                await line_api_exception_handler(None, e)
-            except Exception:
-                logger.exception(
-                    "發送回覆訊息時發生非預期錯誤",
+            async def push(texts: List[str]) -> None:
+                with track("line", "push"), span("line.push"):
+                    line_outbound_id = await line_client.push(push_target, texts)
+                logger.info(
+                    "訊息推播成功",
                     extra={
+                        "line_outbound_id": line_outbound_id,
                         "user_text": user_text,
-                        "reply_token": event.reply_token,
                     },
                 )
 
-    asyncio.create_task(process_and_reply(t_id, r_id, l_in_id))
+            result: Optional[List[str]] = None
+            delivered = False
+
+            async def work() -> List[str]:
+                nonlocal result
+                if attach_to is not None:
+                    assert attach_to.result is not None
+                    return attach_to.result
+                result = await dispatcher.execute_message(command_text)
+                return result
+
+            try:
+                if attach_to is not None:
+                    # 以本事件的工作預算為上限：原始工作未結束 (如關閉時未消化)
+                    # 也不會讓附掛的等待永遠掛著
+                    try:
+                        await asyncio.wait_for(
+                            attach_to.finished.wait(),
+                            budget.job_deadline - time.time(),
+                        )
+                    except TimeoutError:
+                        logger.warning("Original job did not finish within budget")
+                        return
+                    if attach_to.delivered or attach_to.result is None:
+                        return
+                with span("job.process_and_reply", attached=attach_to is not None):
+                    async with (
+                        profiler.profile(trace_id)
+                        if profile and profiler is not None
+                        else nullcontext()
+                    ):
+                        mode = await deliver_with_deadline(
+                            work,
+                            budget,
+                            reply=reply,
+                            push=push if push_target else None,
+                            ack_text=ACK_REPLY_TEXT,
+                        )
+                delivered = mode != "expired"
+            except Exception as e:
+                if is_api_exception(e):
+                    # 復用集中管理的處理邏輯 (傳入 None 作為 Request)
+                    await line_api_exception_handler(None, e)
+                else:
+                    logger.exception(
+                        "發送回覆訊息時發生非預期錯誤",
+                        extra={
+                            "user_text": user_text,
+                            "reply_token": event.reply_token,
+                        },
+                    )
+            finally:
+                if event_id and attach_to is None:
+                    idempotency.finish(event_id, result, delivered)
+                if on_finish is not None and attach_to is None:
+                    on_finish()
+
+    async def reply_now(text: str) -> None:
+        try:
+            with track("line", "reply"), span("line.reply"):
+                await line_client.reply(event.reply_token, [text])
+        except Exception as e:
+            if not is_api_exception(e):
+                raise
+            await line_api_exception_handler(None, e)
+
+    if attach_to is not None:
+        # 附掛等待不佔用 Worker
+        _spawn(process_and_reply(t_id, r_id, l_in_id))
+        return
+
+    commands = [
+        command
+        for command, _ in map(
+            dispatcher.split_command, dispatcher.split_commands(command_text)
+        )
+        if command
+    ]
+    rate_limiter: RateLimiter = app.state.rate_limiter
+    group_id = event.group_id or event.room_id
+    if settings.RATE_LIMIT_ENABLED and not rate_limiter.allow_all(
+        commands, user_id=user_id, group_id=group_id
+    ):
+        # 超過限額：立即以固定訊息回覆，不消耗 Provider 與 AI 資源
+        logger.info("Rate limit exceeded", extra={"commands": commands})
+        _spawn(reply_now(RATE_LIMITED_REPLY_TEXT))
+        if on_finish is not None:
+            on_finish()
+        return
+
+    if profiler is not None and not profile:
+        profile = profiler.claim(user_id)
+
+    if event_id:
+        idempotency.start(event_id)
+    if not job_queue.submit(
+        lambda: process_and_reply(t_id, r_id, l_in_id, profile),
+        source=event.source_id,
+    ):
+        # 佇列已滿：快速回覆忙碌訊息，不佔用服務層資源
+        if event_id:
+            idempotency.finish(event_id, None, delivered=False)
+        _spawn(reply_now(BUSY_REPLY_TEXT))
+        if on_finish is not None:
+            on_finish()
 
 
 def start() -> None:
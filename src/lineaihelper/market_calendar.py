@@ -0,0 +1,179 @@
+import re
+import time
+from datetime import date, datetime, timedelta, timezone
+from datetime import time as dtime
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+import yaml
+from loguru import logger
+
+# 預設路徑：src/lineaihelper/calendars
+CALENDARS_DIR = Path(__file__).parent / "calendars"
+
+# 指數代碼無法由後綴判斷交易所
+_INDEX_EXCHANGES = {
+    "^TWII": "TWSE",
+    "^TWOII": "TPEx",
+    "^GSPC": "NYSE",
+    "^DJI": "NYSE",
+    "^IXIC": "NYSE",
+}
+# Yahoo Finance 的美股代碼 (含 BRK-B 這類股別)；其他後綴 (如 .T、-USD) 不在日曆範圍
+_US_TICKER = re.compile(r"^[A-Z]{1,5}(-[A-Z])?$")
+
+
+def exchange_for_symbol(symbol: str) -> Optional[str]:
+    """
+    依代碼判斷交易所，規則與 YahooFinanceProvider 一致 (純數字視為上市股票)。
+
+    Returns:
+        "TWSE"、"TPEx"、"NYSE"；無法判斷 (加密貨幣、外匯、其他市場) 時為 None。
+    """
+    s = symbol.strip().upper()
+    if s.isdigit() or s.endswith(".TW"):
+        return "TWSE"
+    if s.endswith(".TWO"):
+        return "TPEx"
+    if s in _INDEX_EXCHANGES:
+        return _INDEX_EXCHANGES[s]
+    if _US_TICKER.match(s):
+        return "NYSE"
+    return None
+
+
+class ExchangeCalendar:
+    """單一交易所的交易時段、休市日與提前收盤日"""
+
+    def __init__(
+        self,
+        name: str,
+        tz: ZoneInfo,
+        open_time: dtime,
+        close_time: dtime,
+        holidays: FrozenSet[date] = frozenset(),
+        early_closes: Optional[Dict[date, dtime]] = None,
+        years: FrozenSet[int] = frozenset(),
+    ):
+        self.name = name
+        self.tz = tz
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = holidays
+        self.early_closes = early_closes or {}
+        self.years = years
+        self._warned_years: Set[int] = set()
+
+    def is_trading_day(self, day: date) -> bool:
+        if day.weekday() >= 5:
+            return False
+        if day.year not in self.years:
+            # 未涵蓋的年度視平日為交易日：TTL 偏短，不會把開盤日當休市而提供舊資料
+            if day.year not in self._warned_years:
+                self._warned_years.add(day.year)
+                logger.warning(
+                    "Market calendar does not cover year",
+                    extra={"exchange": self.name, "year": day.year},
+                )
+            return True
+        return day not in self.holidays
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """當日的 (開盤, 收盤) 時間；休市日為 None"""
+        if not self.is_trading_day(day):
+            return None
+        close_time = self.early_closes.get(day, self.close_time)
+        return (
+            datetime.combine(day, self.open_time, tzinfo=self.tz),
+            datetime.combine(day, close_time, tzinfo=self.tz),
+        )
+
+    def in_session(self, now: datetime, grace: float = 0.0) -> bool:
+        """now 是否介於開盤與收盤後 grace 秒之間"""
+        session = self.session(now.astimezone(self.tz).date())
+        if session is None:
+            return False
+        opens, closes = session
+        return opens <= now < closes + timedelta(seconds=grace)
+
+    def next_open(self, now: datetime) -> datetime:
+        """now 之後最近一次開盤時間 (盤中則為下一個交易日)"""
+        day = now.astimezone(self.tz).date()
+        for offset in range(366):
+            session = self.session(day + timedelta(days=offset))
+            if session is not None and session[0] > now:
+                return session[0]
+        raise ValueError(f"No trading session within a year for {self.name}")
+
+
+class MarketCalendar:
+    """
+    各交易所的交易日曆，資料來自套件內附的 calendars/*.yaml。
+
+    Example:
+        calendar = MarketCalendar.load()
+        exchange = calendar.for_symbol("2330")
+    """
+
+    def __init__(self, exchanges: Dict[str, ExchangeCalendar]):
+        self.exchanges = exchanges
+
+    @classmethod
+    def load(cls, directory: Optional[Path] = None) -> "MarketCalendar":
+        exchanges: Dict[str, ExchangeCalendar] = {}
+        for path in sorted((directory or CALENDARS_DIR).glob("*.yaml")):
+            data = yaml.safe_load(path.read_text(encoding="utf-8"))
+            early_closes = {
+                day: dtime.fromisoformat(value)
+                for day, value in (data.get("early_closes") or {}).items()
+            }
+            for name in data["exchanges"]:
+                exchanges[name] = ExchangeCalendar(
+                    name,
+                    ZoneInfo(data["timezone"]),
+                    dtime.fromisoformat(data["open"]),
+                    dtime.fromisoformat(data["close"]),
+                    holidays=frozenset(data.get("holidays") or ()),
+                    early_closes=early_closes,
+                    years=frozenset(data.get("years") or ()),
+                )
+        return cls(exchanges)
+
+    def for_symbol(self, symbol: str) -> Optional[ExchangeCalendar]:
+        name = exchange_for_symbol(symbol)
+        return self.exchanges.get(name) if name is not None else None
+
+
+class FreshnessPolicy:
+    """
+    依交易日曆決定行情快取的 TTL。
+
+    盤中 (含收盤後 settle_seconds 的收盤價確認期) 使用呼叫端給定的短 TTL；
+    休市時報價與 K 線都不會再變動 (已收盤的 K 棒不可變，唯一會變的當根 K 棒
+    也要到下次開盤才更新)，TTL 延長至下次開盤，並以 max_ttl 為上限，
+    避免日曆資料漏列臨時開休市時長時間提供舊資料。無法判斷交易所的代碼
+    (加密貨幣、外匯等全天交易) 一律使用短 TTL。
+    """
+
+    def __init__(
+        self,
+        calendar: MarketCalendar,
+        settle_seconds: float = 1800.0,
+        max_ttl: float = 21600.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.calendar = calendar
+        self.settle_seconds = settle_seconds
+        self.max_ttl = max_ttl
+        self._clock = clock
+
+    def ttl(self, symbol: str, default: float) -> float:
+        exchange = self.calendar.for_symbol(symbol)
+        if exchange is None:
+            return default
+        now = datetime.fromtimestamp(self._clock(), timezone.utc)
+        if exchange.in_session(now, grace=self.settle_seconds):
+            return default
+        until_open = (exchange.next_open(now) - now).total_seconds()
+        return min(until_open, self.max_ttl)
@@ -0,0 +1,304 @@
+import asyncio
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from types import TracebackType
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+# 延遲分桶 (秒)：涵蓋快取命中 (毫秒級) 到 AI 生成 (數十秒)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """
+    指標基底類別。
+
+    大部分指標只在事件迴圈執行緒上更新，僅做字典查找與數值累加，不使用鎖；
+    匯出時才組裝文字格式。會由其他執行緒更新的計數器 (如迴圈看門狗、日誌管線)
+    需以 thread_safe=True 建立，更新與匯出時加鎖。
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """匯出時的樣本行 (不含 HELP / TYPE)"""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        thread_safe: bool = False,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock() if thread_safe else None
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if self._lock is None:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        if self._lock is None:
+            items = sorted(self._values.items())
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+            for labels, v in items
+        ]
+
+
+class Gauge(Metric):
+    """瞬時值；可直接 set，或以回呼函式於匯出時讀取 (如佇列深度)"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._functions: Dict[Labels, Callable[[], float]] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def set_function(self, fn: Callable[[], float], *labels: str) -> None:
+        self._functions[labels] = fn
+
+    def value(self, *labels: str) -> float:
+        fn = self._functions.get(labels)
+        return fn() if fn is not None else self._values.get(labels, 0.0)
+
+    def samples(self) -> List[str]:
+        keys = sorted(set(self._values) | set(self._functions))
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} "
+            f"{_format_value(self.value(*labels))}"
+            for labels in keys
+        ]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 每組標籤：[各分桶計數..., +Inf 計數], 總和
+        self._counts: Dict[Labels, List[int]] = {}
+        self._sums: Dict[Labels, float] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+            self._sums[labels] = 0.0
+        # 只累加所屬的單一分桶，匯出時再轉為累積計數
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def count(self, *labels: str) -> int:
+        return sum(self._counts.get(labels, ()))
+
+    def samples(self) -> List[str]:
+        lines: List[str] = []
+        names = self.labelnames + ("le",)
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts, strict=True):
+                cumulative += count
+                le = _format_value(bound)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (le,))} "
+                    f"{cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(
+                f"{self.name}_sum{label_str} {_format_value(self._sums[labels])}"
+            )
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        thread_safe: bool = False,
+    ) -> Counter:
+        metric = Counter(name, documentation, labelnames, thread_safe=thread_safe)
+        self.register(metric)
+        return metric
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        metric = Gauge(name, documentation, labelnames)
+        self.register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.register(metric)
+        return metric
+
+    def render(self) -> str:
+        """輸出 Prometheus 文字格式 (text/plain; version=0.0.4)"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# RED 指標：component 為 callback / command / provider / gemini / line
+REQUESTS = REGISTRY.counter(
+    "linenexus_requests_total",
+    "Requests handled, by component, operation and outcome.",
+    ("component", "operation", "outcome"),
+)
+LATENCY = REGISTRY.histogram(
+    "linenexus_request_duration_seconds",
+    "Request latency in seconds, by component and operation.",
+    ("component", "operation"),
+)
+RESULT_CACHE = REGISTRY.counter(
+    "linenexus_result_cache_total",
+    "Dispatcher result cache lookups, by command and result (hit/miss/coalesced).",
+    ("command", "result"),
+)
+JOBS_QUEUED = REGISTRY.gauge("linenexus_jobs_queued", "Jobs waiting in the job queue.")
+JOBS_IN_FLIGHT = REGISTRY.gauge(
+    "linenexus_jobs_in_flight", "Jobs currently being executed."
+)
+
+
+def observe(component: str, operation: str, outcome: str, seconds: float) -> None:
+    """記錄一次請求的結果與延遲"""
+    REQUESTS.inc(component, operation, outcome)
+    LATENCY.observe(seconds, component, operation)
+
+
+class track:
+    """
+    量測區塊耗時並依是否拋出例外記錄 ok / error / cancelled。
+
+    Example:
+        with track("provider", "get_quote"):
+            quote = await provider.get_quote(symbol)
+    """
+
+    __slots__ = ("component", "operation", "_start")
+
+    def __init__(self, component: str, operation: str):
+        self.component = component
+        self.operation = operation
+        self._start = 0.0
+
+    def __enter__(self) -> "track":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            outcome = "ok"
+        elif issubclass(exc_type, asyncio.CancelledError):
+            outcome = "cancelled"
+        else:
+            outcome = "error"
+        observe(
+            self.component,
+            self.operation,
+            outcome,
+            time.perf_counter() - self._start,
+        )
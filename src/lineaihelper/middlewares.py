@@ -1,53 +1,71 @@
-import uuid
-from collections.abc import Callable
+from typing import Dict, Iterable, List, Tuple
 
-from fastapi import Request, Response
 from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from lineaihelper.context import line_inbound_id_var, request_id_var, trace_id_var
+from lineaihelper.ids import new_id
 
 
-async def add_trace_id_middleware(request: Request, call_next: Callable) -> Response:
+class TraceIdMiddleware:
     """
-    注入 trace_id / request_id 至 logging context。
+    注入 trace_id / request_id 至 logging context (純 ASGI Middleware)。
+
+    - 直接讀取 ASGI scope 標頭，不建立 Request / Response 物件。
+    - skip_paths 中的路徑 (健康檢查、metrics) 直接放行，不產生 ID 也不記錄日誌。
+    - ID 由 ids.new_id 產生，可依時間排序。
     使用全小寫 Header 名稱符合 HTTP/2 規範。
     """
 
-    # 1. 全鏈路追蹤 ID (優先從標頭獲取)
-    trace_id = request.headers.get("x-trace-id", str(uuid.uuid4()))
-
-    # 2. 單次請求 ID (本次服務生成的唯一識別碼)
-    request_id = str(uuid.uuid4())
-
-    # 3. LINE 原始請求 ID (從 LINE Webhook 進來的)
-    line_inbound_id = request.headers.get("x-line-request-id", "N/A")
-
-    # 設定 ContextVar (用於跨非同步任務傳遞)
-    t_token = trace_id_var.set(trace_id)
-    r_token = request_id_var.set(request_id)
-    l_token = line_inbound_id_var.set(line_inbound_id)
-
-    with logger.contextualize(
-        trace_id=trace_id,
-        request_id=request_id,
-        line_inbound_id=line_inbound_id,
-    ):
-        logger.info(
-            "開始處理請求",
-            extra={
-                "method": request.method,
-                "path": request.url.path,
-            },
-        )
+    def __init__(self, app: ASGIApp, skip_paths: Iterable[str] = ()):
+        self.app = app
+        self.skip_paths = frozenset(skip_paths)
 
-        try:
-            response: Response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers: Dict[bytes, bytes] = dict(scope["headers"])
+
+        # 1. 全鏈路追蹤 ID (優先從標頭獲取)
+        raw_trace_id = headers.get(b"x-trace-id")
+        trace_id = raw_trace_id.decode("latin-1") if raw_trace_id else new_id()
+
+        # 2. 單次請求 ID (本次服務生成的唯一識別碼)
+        request_id = new_id()
 
-            # 回傳追蹤 ID 供客戶端或下游服務使用
-            response.headers["x-trace-id"] = trace_id
-            response.headers["x-request-id"] = request_id
+        # 3. LINE 原始請求 ID (從 LINE Webhook 進來的)
+        raw_line_id = headers.get(b"x-line-request-id")
+        line_inbound_id = raw_line_id.decode("latin-1") if raw_line_id else "N/A"
 
-            return response
+        # 回傳追蹤 ID 供客戶端或下游服務使用
+        id_headers: List[Tuple[bytes, bytes]] = [
+            (b"x-trace-id", trace_id.encode("latin-1")),
+            (b"x-request-id", request_id.encode("latin-1")),
+        ]
+
+        async def send_with_ids(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *id_headers]
+            await send(message)
+
+        # 設定 ContextVar (用於跨非同步任務傳遞)
+        t_token = trace_id_var.set(trace_id)
+        r_token = request_id_var.set(request_id)
+        l_token = line_inbound_id_var.set(line_inbound_id)
+
+        try:
+            with logger.contextualize(
+                trace_id=trace_id,
+                request_id=request_id,
+                line_inbound_id=line_inbound_id,
+            ):
+                logger.info(
+                    "開始處理請求",
+                    extra={"method": scope["method"], "path": scope["path"]},
+                )
+                await self.app(scope, receive, send_with_ids)
         finally:
             # 清理 ContextVar (雖然 ContextVar 是 task-local，但仍建議養成好習慣)
             trace_id_var.reset(t_token)
@@ -13,6 +13,8 @@ class PriceQuote(BaseModel):
     change: Optional[float] = None
     change_percent: Optional[float] = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    # 上游暫時無法使用時由快取回傳的舊資料
+    delayed: bool = False
 
 
 class KLineBar(BaseModel):
@@ -32,6 +34,7 @@ class KLineData(BaseModel):
     symbol: str
     interval: str  # e.g., "1d", "1h"
     bars: List[KLineBar]
+    delayed: bool = False
 
     @property
     def last_close(self) -> float:
@@ -0,0 +1,103 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from loguru import logger
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+@dataclass
+class ArmedProfile:
+    """管理指令預約的剖析次數；user_id 為空字串時適用任何使用者"""
+
+    remaining: int
+    user_id: str = ""
+
+
+def profile_path(directory: str, trace_id: str) -> Path:
+    return Path(directory) / f"{_UNSAFE_CHARS.sub('_', trace_id)}.prof"
+
+
+class RequestProfiler:
+    """
+    針對單一請求的隨選剖析 (cProfile)。
+
+    觸發方式：
+    - Webhook 請求帶有正確的 x-debug-profile 標頭 (適用於重放請求)。
+    - 管理端點預約接下來 N 個 (特定使用者的) 工作。
+
+    剖析涵蓋整個背景工作 (process_and_reply)，結果以 trace_id 命名寫入磁碟。
+    cProfile 以執行緒為單位，期間在同一事件迴圈上交錯執行的其他任務也會被
+    記錄；同一時間僅允許一個剖析，其餘請求照常執行不剖析。
+    """
+
+    def __init__(self, directory: str = "logs/profiles"):
+        self.directory = directory
+        self._armed: List[ArmedProfile] = []
+        self._active = False
+
+    def arm(self, count: int = 1, user_id: str = "") -> None:
+        self._armed.append(ArmedProfile(remaining=count, user_id=user_id))
+
+    @property
+    def armed(self) -> int:
+        return sum(a.remaining for a in self._armed)
+
+    def claim(self, user_id: str) -> bool:
+        """若有符合的預約則消耗一次並回傳 True"""
+        for armed in self._armed:
+            if armed.user_id in ("", user_id):
+                armed.remaining -= 1
+                if armed.remaining <= 0:
+                    self._armed.remove(armed)
+                return True
+        return False
+
+    @asynccontextmanager
+    async def profile(self, trace_id: str) -> AsyncIterator[Optional[Path]]:
+        if self._active:
+            logger.warning("Profiler busy, skipping", extra={"trace_id": trace_id})
+            yield None
+            return
+
+        self._active = True
+        path = profile_path(self.directory, trace_id)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            self._active = False
+            # 寫檔於背景執行緒進行，避免阻塞事件迴圈
+            await asyncio.to_thread(self._dump, profiler, path)
+            logger.info("Profile saved", extra={"path": str(path)})
+
+    @staticmethod
+    def _dump(profiler: cProfile.Profile, path: Path) -> None:
+        os.makedirs(path.parent, exist_ok=True)
+        profiler.dump_stats(str(path))
+
+
+def list_profiles(directory: str) -> List[Path]:
+    """依修改時間由新到舊列出剖析檔"""
+    root = Path(directory)
+    if not root.is_dir():
+        return []
+    return sorted(root.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+
+
+def summarize(path: Path, sort: str = "cumulative", limit: int = 20) -> str:
+    """列出最耗時的函式"""
+    stream = io.StringIO()
+    stats = pstats.Stats(str(path), stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
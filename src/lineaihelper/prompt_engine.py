@@ -2,9 +2,14 @@ from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
 import yaml
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+from jinja2 import Environment, FileSystemLoader, Template, TemplateNotFound
 from loguru import logger
 
+from lineaihelper.tracing import span
+
+# 已編譯的模板，以 (檔案路徑, 修改時間) 為鍵，所有 PromptEngine 實例共用
+_COMPILED: Dict[Tuple[str, int], Tuple[Dict[str, Any], Template]] = {}
+
 
 class PromptEngine:
     def __init__(self, prompts_dir: Optional[Path] = None):
@@ -56,19 +61,19 @@ class PromptEngine:
         載入並渲染 Prompt。
         """
         try:
-            # 先讀取 metadata 用於 logging
-            body, metadata = self.get_prompt(name, version)
-            ver_info = metadata.get("version", version)
-            logger.info(
-                "Rendering prompt",
-                extra={
-                    "name": name,
-                    "version": ver_info,
-                },
-            )
+            with span("prompt.render", template=name):
+                # 先讀取 metadata 用於 logging
+                metadata, template = self._compile(name, version)
+                ver_info = metadata.get("version", version)
+                logger.info(
+                    "Rendering prompt",
+                    extra={
+                        "name": name,
+                        "version": ver_info,
+                    },
+                )
 
-            temp = self.env.from_string(body)
-            return temp.render(**variables)
+                return template.render(**variables)
 
         except TemplateNotFound:
             logger.error(
@@ -89,6 +94,32 @@ class PromptEngine:
             )
             raise
 
+    def warm(self) -> int:
+        """預先編譯所有模板並回傳數量 (於 pre-fork 前呼叫，Worker 共用編譯結果)"""
+        paths = sorted(self.prompts_dir.glob("*/*.md"))
+        for path in paths:
+            self._compile(path.parent.name, path.stem)
+        return len(paths)
+
+    def _compile(self, name: str, version: str) -> Tuple[Dict[str, Any], Template]:
+        """讀取並編譯模板；檔案修改後會重新編譯"""
+        full_path = self.prompts_dir / f"{name}/{version}.md"
+        try:
+            key: Optional[Tuple[str, int]] = (
+                str(full_path),
+                full_path.stat().st_mtime_ns,
+            )
+        except OSError:
+            key = None
+
+        compiled = _COMPILED.get(key) if key is not None else None
+        if compiled is None:
+            body, metadata = self.get_prompt(name, version)
+            compiled = (metadata, self.env.from_string(body))
+            if key is not None:
+                _COMPILED[key] = compiled
+        return compiled
+
     def _parse_frontmatter(self, content: str) -> Tuple[Dict[str, Any], str]:
         """
         解析 Markdown 檔頭的 YAML。
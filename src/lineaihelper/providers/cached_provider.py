@@ -0,0 +1,172 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from loguru import logger
+from pydantic import BaseModel
+
+from lineaihelper.adaptive_limit import AdaptiveLimiter, limited
+from lineaihelper.exceptions import ExternalAPIError
+from lineaihelper.market_calendar import FreshnessPolicy
+from lineaihelper.metrics import REGISTRY, track
+from lineaihelper.models.market_data import KLineData, PriceQuote
+from lineaihelper.providers.base_provider import BaseDataProvider
+from lineaihelper.resilience import Resilience, resilient
+from lineaihelper.shared_cache import SharedCache
+from lineaihelper.tracing import span
+from lineaihelper.ttl_cache import TTLCache
+
+T = TypeVar("T")
+
+# 回傳 delayed 資料時，服務於回覆開頭附加的提示
+DELAYED_DATA_NOTICE = "⚠️ 行情來源暫時無法連線，以下為最後一次取得的延遲資料。"
+
+STALE_SERVED = REGISTRY.counter(
+    "linenexus_stale_market_data_total",
+    "Market data served from stale cache after an upstream failure, by operation.",
+    ("operation",),
+)
+
+
+class CachedDataProvider(BaseDataProvider):
+    """
+    為任一 Provider 加上 TTL 快取與同鍵請求合併 (Single-flight) 的裝飾者。
+
+    同一則訊息中的多個指令 (如 .stock 2330 與 .price 2330) 或同時抵達的
+    相同查詢，只會對上游發出一次請求。設定 shared 時，本地未命中會再查詢
+    跨 Worker 共享快取，多個程序同時查詢同一鍵也只有一個程序呼叫上游。
+    設定 limiter 時，實際送往上游的請求受自適應並發上限約束；設定 resilience
+    時上游請求會重試並受斷路器保護。上游失敗或斷路時，若 stale_ttl 內有成功
+    取得過的資料，改回傳該資料並標示 delayed；斷路器冷卻後的試探請求成功即
+    恢復即時資料。設定 freshness 時，quote_ttl / history_ttl 只用於盤中，休市
+    期間依交易日曆快取到下次開盤。
+    """
+
+    def __init__(
+        self,
+        inner: BaseDataProvider,
+        quote_ttl: float = 10.0,
+        history_ttl: float = 300.0,
+        max_entries: int = 1000,
+        clock: Callable[[], float] = time.monotonic,
+        shared: Optional[SharedCache] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        resilience: Optional[Resilience] = None,
+        stale_ttl: float = 0.0,
+        freshness: Optional[FreshnessPolicy] = None,
+    ):
+        self.inner = inner
+        self.quote_ttl = quote_ttl
+        self.history_ttl = history_ttl
+        self.shared = shared
+        self.limiter = limiter
+        self.resilience = resilience
+        self.stale_ttl = stale_ttl
+        self.freshness = freshness
+        self._cache: TTLCache[Hashable, Any] = TTLCache(max_entries, clock=clock)
+        self._stale: TTLCache[Hashable, Any] = TTLCache(max_entries, clock=clock)
+        self._pending: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    @staticmethod
+    def _key_symbol(symbol: str) -> str:
+        return symbol.strip().upper()
+
+    def _ttl(self, symbol: str, default: float) -> float:
+        if self.freshness is None:
+            return default
+        return self.freshness.ttl(symbol, default)
+
+    async def get_quote(self, symbol: str) -> PriceQuote:
+        key = ("quote", self._key_symbol(symbol))
+        return await self._get(
+            key,
+            self._ttl(symbol, self.quote_ttl),
+            "get_quote",
+            lambda: self.inner.get_quote(symbol),
+        )
+
+    async def get_history(
+        self, symbol: str, interval: str = "1d", period: str = "1mo"
+    ) -> KLineData:
+        key = ("history", self._key_symbol(symbol), interval, period)
+        return await self._get(
+            key,
+            self._ttl(symbol, self.history_ttl),
+            "get_history",
+            lambda: self.inner.get_history(symbol, interval=interval, period=period),
+        )
+
+    def can_handle(self, symbol: str) -> bool:
+        return self.inner.can_handle(symbol)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._stale.clear()
+
+    async def _get(
+        self,
+        key: Hashable,
+        ttl: float,
+        operation: str,
+        fetch: Callable[[], Awaitable[T]],
+    ) -> T:
+        with span(f"provider.{operation}", key=key) as current:
+            cached: Optional[T] = self._cache.get(key)
+            if cached is not None:
+                if current is not None:
+                    current.attributes["cache"] = "hit"
+                return cached
+
+            task = self._pending.get(key)
+            if current is not None:
+                current.attributes["cache"] = "miss" if task is None else "coalesced"
+            if task is None:
+                # 上游請求以獨立 Task 執行，單一等待者被取消時不影響其他合併的請求
+                task = asyncio.ensure_future(self._fetch(key, ttl, operation, fetch))
+                self._pending[key] = task
+                task.add_done_callback(lambda t: self._on_done(key, ttl, t))
+
+            try:
+                result: T = await asyncio.shield(task)
+            except ExternalAPIError as e:
+                stale: Optional[T] = self._stale.get(key)
+                if stale is None:
+                    raise
+                if current is not None:
+                    current.attributes["cache"] = "stale"
+                STALE_SERVED.inc(operation)
+                logger.warning(
+                    "Serving stale market data",
+                    extra={"key": repr(key), "error": e.message},
+                )
+                return stale
+            return result
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        ttl: float,
+        operation: str,
+        fetch: Callable[[], Awaitable[T]],
+    ) -> T:
+        async def attempt() -> T:
+            # 僅量測與限制實際的上游請求，快取命中與合併的請求不計入
+            async with limited(self.limiter):
+                with track("provider", operation):
+                    return await fetch()
+
+        async def upstream() -> T:
+            return await resilient(self.resilience, attempt)
+
+        if self.shared is None:
+            return await upstream()
+        return await self.shared.get_or_fetch(key, ttl, upstream)
+
+    def _on_done(self, key: Hashable, ttl: float, task: "asyncio.Future[Any]") -> None:
+        self._pending.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            result = task.result()
+            self._cache.set(key, result, ttl)
+            if self.stale_ttl > 0 and isinstance(result, BaseModel):
+                delayed = result.model_copy(update={"delayed": True})
+                self._stale.set(key, delayed, self.stale_ttl)
@@ -0,0 +1,100 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping, Sequence, Tuple
+
+
+@dataclass
+class TokenBucket:
+    """權杖桶：容量為 capacity，每秒補充 rate 個權杖"""
+
+    capacity: float
+    rate: float
+    tokens: float
+    updated_at: float
+
+    def refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+
+class RateLimiter:
+    """
+    以使用者與群組/聊天室為單位的權杖桶限流器，可針對每個指令設定額度。
+
+    額度以「每分鐘次數」表示，同時作為桶容量 (允許的瞬間爆量)。
+    限額字典需包含 "default" 作為未列出指令的預設值，缺少時拋出 ValueError。
+    """
+
+    def __init__(
+        self,
+        user_limits: Mapping[str, float],
+        group_limits: Mapping[str, float],
+        max_buckets: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        for name, limits in (("user", user_limits), ("group", group_limits)):
+            if "default" not in limits:
+                raise ValueError(f'{name} rate limits must include a "default" entry')
+        self.user_limits = user_limits
+        self.group_limits = group_limits
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._buckets: "OrderedDict[Tuple[str, str, str], TokenBucket]" = OrderedDict()
+
+    def allow(self, command: str, user_id: str = "", group_id: str = "") -> bool:
+        """
+        檢查並扣除額度；任一層級 (使用者或群組) 超限即拒絕，且不扣除任何額度。
+        """
+        return self.allow_all([command], user_id=user_id, group_id=group_id)
+
+    def allow_all(
+        self, commands: Sequence[str], user_id: str = "", group_id: str = ""
+    ) -> bool:
+        """
+        多指令訊息：所有指令都有額度才一併扣除；任一指令超限即拒絕且不扣除任何額度。
+        同一訊息重複的指令各扣一次。
+        """
+        now = self._clock()
+        needed: Dict[int, Tuple[TokenBucket, int]] = {}
+        for command in commands:
+            buckets: List[TokenBucket] = []
+            if user_id:
+                buckets.append(self._bucket("user", user_id, command, self.user_limits))
+            if group_id:
+                buckets.append(
+                    self._bucket("group", group_id, command, self.group_limits)
+                )
+            for bucket in buckets:
+                _, count = needed.get(id(bucket), (bucket, 0))
+                needed[id(bucket)] = (bucket, count + 1)
+
+        for bucket, _ in needed.values():
+            bucket.refill(now)
+        if any(bucket.tokens < count for bucket, count in needed.values()):
+            return False
+        for bucket, count in needed.values():
+            bucket.tokens -= count
+        return True
+
+    def _bucket(
+        self, scope: str, key: str, command: str, limits: Mapping[str, float]
+    ) -> TokenBucket:
+        bucket_key = (scope, key, command)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is not None:
+            self._buckets.move_to_end(bucket_key)
+            return bucket
+
+        per_minute = limits.get(command, limits["default"])
+        bucket = TokenBucket(
+            capacity=per_minute,
+            rate=per_minute / 60,
+            tokens=per_minute,
+            updated_at=self._clock(),
+        )
+        self._buckets[bucket_key] = bucket
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return bucket
@@ -0,0 +1,358 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from lineaihelper.lazy_imports import preload
+from lineaihelper.line_client import LineClient
+from lineaihelper.market_calendar import MarketCalendar
+from lineaihelper.metrics import REGISTRY
+from lineaihelper.providers.base_provider import BaseDataProvider
+from lineaihelper.services.registry import ServiceDeps
+
+# 預熱步驟與依賴探測皆為無參數的協程函式；探測只關心耗時與成敗
+Check = Callable[[], Awaitable[Any]]
+
+WARMUP_SECONDS = REGISTRY.gauge(
+    "linenexus_warmup_seconds",
+    "Duration of each readiness warmup step in seconds.",
+    ("step",),
+)
+DEPENDENCY_LATENCY = REGISTRY.histogram(
+    "linenexus_dependency_probe_seconds",
+    "Background dependency probe latency in seconds.",
+    ("dependency", "outcome"),
+)
+
+
+class Readiness:
+    """
+    啟動預熱與就緒狀態。
+
+    依序執行預熱步驟 (載入依賴、編譯模板、預抓熱門代碼、建立連線池等)，
+    全部結束後才回報就緒。步驟失敗只記錄不阻擋：上游故障時若永不就緒，
+    所有 Pod 都會被移出負載平衡，反而放大事故；超過 timeout 亦直接視為就緒。
+    """
+
+    def __init__(self, steps: List[Tuple[str, Check]], timeout: float = 60.0):
+        self.steps = steps
+        self.timeout = timeout
+        self.results: Dict[str, Dict[str, Any]] = {
+            name: {"status": "pending"} for name, _ in steps
+        }
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def wait(self) -> None:
+        await self._ready.wait()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    async def _run(self) -> None:
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._run_steps(), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Warmup timed out", extra={"timeout": self.timeout})
+        self._ready.set()
+        logger.info(
+            "Warmup finished",
+            extra={
+                "seconds": round(time.monotonic() - start, 3),
+                "steps": self.results,
+            },
+        )
+
+    async def _run_steps(self) -> None:
+        for name, step in self.steps:
+            self.results[name] = {"status": "running"}
+            start = time.monotonic()
+            try:
+                await step()
+                status = "ok"
+            except Exception:
+                logger.exception("Warmup step failed", extra={"step": name})
+                status = "failed"
+            elapsed = time.monotonic() - start
+            WARMUP_SECONDS.set(elapsed, name)
+            self.results[name] = {"status": status, "seconds": round(elapsed, 3)}
+
+
+class LatencyWindow:
+    """最近 size 次探測的滾動視窗"""
+
+    def __init__(self, size: int = 20):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=size)
+
+    def add(self, seconds: float, ok: bool) -> None:
+        self._samples.append((seconds, ok))
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self._samples:
+            return {"samples": 0}
+        latencies = sorted(seconds for seconds, ok in self._samples if ok)
+        last_seconds, last_ok = self._samples[-1]
+        summary: Dict[str, Any] = {
+            "samples": len(self._samples),
+            "errors": sum(1 for _, ok in self._samples if not ok),
+            "last_ok": last_ok,
+            "last_ms": round(last_seconds * 1000, 1),
+        }
+        if latencies:
+            summary["p50_ms"] = round(_percentile(latencies, 0.5) * 1000, 1)
+            summary["p95_ms"] = round(_percentile(latencies, 0.95) * 1000, 1)
+        return summary
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+
+class DependencyProbes:
+    """
+    背景定期探測外部依賴 (Yahoo / Gemini / LINE) 的延遲，供 /ready 與指標回報。
+
+    探測結果僅供觀測，不影響就緒狀態。
+    """
+
+    def __init__(
+        self,
+        checks: Dict[str, Check],
+        interval: float = 30.0,
+        timeout: float = 5.0,
+        window: int = 20,
+    ):
+        self.checks = checks
+        self.interval = interval
+        self.timeout = timeout
+        self.windows = {name: LatencyWindow(window) for name in checks}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self, after: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        """
+        啟動背景探測。after 通常為 Readiness.wait：探測會延遲載入 SDK，
+        需等預熱執行緒載入完成，避免在事件迴圈內等待匯入鎖。
+        """
+        self._task = asyncio.create_task(self._loop(after))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(self.probe(name) for name in self.checks))
+
+    async def probe(self, name: str) -> None:
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self.checks[name](), self.timeout)
+            ok = True
+        except Exception as e:
+            logger.warning(
+                "Dependency probe failed",
+                extra={"dependency": name, "error": repr(e)},
+            )
+            ok = False
+        elapsed = time.monotonic() - start
+        self.windows[name].add(elapsed, ok)
+        DEPENDENCY_LATENCY.observe(elapsed, name, "success" if ok else "error")
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: window.snapshot() for name, window in self.windows.items()}
+
+    async def _loop(self, after: Optional[Callable[[], Awaitable[None]]]) -> None:
+        if after is not None:
+            await after()
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+
+class MarketOpenWarmer:
+    """
+    於各交易所開盤時重新預抓熱門代碼。
+
+    休市期間的行情依交易日曆快取到下次開盤，開盤當下一起過期；由背景預抓
+    承擔這一輪上游請求，而非開盤後的第一位使用者。delay 讓上游先產生開盤資料。
+    """
+
+    def __init__(
+        self,
+        calendar: MarketCalendar,
+        symbols: List[str],
+        prefetch: Callable[[str], Awaitable[Any]],
+        delay: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.calendar = calendar
+        self.symbols = symbols
+        self.prefetch = prefetch
+        self.delay = delay
+        self._clock = clock
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def start(self, after: Optional[Callable[[], Awaitable[None]]] = None) -> None:
+        self._task = asyncio.create_task(self._loop(after))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+
+    def next_run(self) -> Optional[Tuple[float, List[str]]]:
+        """(距下次預抓的秒數, 該次開盤的代碼)；沒有可對應交易所的代碼時為 None"""
+        now = datetime.fromtimestamp(self._clock(), timezone.utc)
+        by_open: Dict[datetime, List[str]] = {}
+        for symbol in self.symbols:
+            exchange = self.calendar.for_symbol(symbol)
+            if exchange is not None:
+                by_open.setdefault(exchange.next_open(now), []).append(symbol)
+        if not by_open:
+            return None
+        opens = min(by_open)
+        return (opens - now).total_seconds() + self.delay, by_open[opens]
+
+    async def _loop(self, after: Optional[Callable[[], Awaitable[None]]]) -> None:
+        if after is not None:
+            await after()
+        while True:
+            plan = self.next_run()
+            if plan is None:
+                return
+            seconds, symbols = plan
+            await asyncio.sleep(seconds)
+            results = await asyncio.gather(
+                *(self.prefetch(symbol) for symbol in symbols), return_exceptions=True
+            )
+            logger.info(
+                "Market open warmup finished",
+                extra={
+                    "symbols": symbols,
+                    "failed": [
+                        symbol
+                        for symbol, result in zip(symbols, results, strict=True)
+                        if isinstance(result, BaseException)
+                    ],
+                },
+            )
+
+
+async def prefetch_symbol(provider: BaseDataProvider, symbol: str) -> None:
+    # 與 .price / .stock 使用相同的參數，預熱後可直接命中快取
+    await asyncio.gather(
+        provider.get_quote(symbol),
+        provider.get_history(symbol, period="1mo", interval="1d"),
+        provider.get_history(symbol, period="6mo", interval="1d"),
+    )
+
+
+async def _noop() -> None:
+    await asyncio.sleep(0)
+
+
+def warmup_steps(
+    deps: ServiceDeps,
+    line_client: LineClient,
+    symbols: List[str],
+    gemini_model: str,
+    thread_pool_size: int = 8,
+    preload_imports: bool = True,
+    local_stubs: bool = False,
+) -> List[Tuple[str, Check]]:
+    """
+    Worker 的預熱步驟 (依序執行)。
+
+    local_stubs 時只保留不需連線的步驟，其餘以本機 Stub 代替 (測試與離線開發)。
+    """
+
+    async def imports() -> None:
+        await asyncio.to_thread(preload)
+
+    async def prompts() -> None:
+        await asyncio.to_thread(deps.prompt_engine.warm)
+
+    async def thread_pool() -> None:
+        # 預先建立 to_thread 使用的執行緒，避免首批請求才逐一建立
+        await asyncio.gather(
+            *(asyncio.to_thread(time.sleep, 0.01) for _ in range(thread_pool_size))
+        )
+
+    async def connections() -> None:
+        # 以不計費的讀取請求實際建立 LINE 與 Gemini 的連線 (TLS 交握、連線池)，
+        # 首批請求不需再承擔建立連線的延遲
+        await asyncio.gather(
+            line_client.api.get_bot_info(),
+            deps.gemini_client.aio.models.get(model=gemini_model),
+        )
+
+    async def hot_symbols() -> None:
+        for symbol in symbols:
+            await prefetch_symbol(deps.provider, symbol)
+
+    async def technical_analysis() -> None:
+        if not symbols:
+            return
+        history = await deps.provider.get_history(
+            symbols[0], period="6mo", interval="1d"
+        )
+        await asyncio.to_thread(deps.ta_service.compute_indicators, history)
+
+    if local_stubs:
+        return [
+            ("prompts", prompts),
+            ("thread_pool", thread_pool),
+            ("connections", _noop),
+            ("hot_symbols", _noop),
+        ]
+    steps: List[Tuple[str, Check]] = [("imports", imports)] if preload_imports else []
+    return steps + [
+        ("prompts", prompts),
+        ("thread_pool", thread_pool),
+        ("connections", connections),
+        ("hot_symbols", hot_symbols),
+        ("technical_analysis", technical_analysis),
+    ]
+
+
+def dependency_checks(
+    deps: ServiceDeps,
+    line_client: LineClient,
+    symbol: str,
+    gemini_model: str,
+    local_stubs: bool = False,
+) -> Dict[str, Check]:
+    """外部依賴的輕量探測：皆為不計費、不經快取的讀取請求"""
+    if local_stubs:
+        return {"yahoo": _noop, "gemini": _noop, "line": _noop}
+
+    async def yahoo() -> None:
+        from lineaihelper.providers.stock_provider import YahooFinanceProvider
+
+        await YahooFinanceProvider().get_quote(symbol)
+
+    async def gemini() -> None:
+        await deps.gemini_client.aio.models.get(model=gemini_model)
+
+    async def line() -> None:
+        await line_client.api.get_bot_info()
+
+    return {"yahoo": yahoo, "gemini": gemini, "line": line}
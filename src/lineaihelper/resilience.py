@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from loguru import logger
+
+from lineaihelper.exceptions import CircuitOpenError, DependencyOverloadedError
+from lineaihelper.metrics import REGISTRY
+
+T = TypeVar("T")
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "linenexus_circuit_state",
+    "Circuit breaker state by dependency (0=closed, 1=half-open, 2=open).",
+    ("dependency",),
+)
+RETRIES = REGISTRY.counter(
+    "linenexus_retries_total",
+    "Outbound calls retried after an upstream failure, by dependency.",
+    ("dependency",),
+)
+
+_STATE_VALUES = {"closed": 0.0, "half_open": 1.0, "open": 2.0}
+
+
+def _any_error(exc: BaseException) -> bool:
+    return True
+
+
+class RetryPolicy:
+    """
+    有上限的重試次數與 Full Jitter 指數退避。
+
+    第 n 次失敗後等待 uniform(0, min(max_delay, base_delay * 2^(n-1))) 秒，
+    讓同時失敗的請求錯開重試時間，避免對剛恢復的上游形成重試風暴。
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.2,
+        max_delay: float = 2.0,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rand = rand
+
+    def delay(self, attempt: int) -> float:
+        cap = min(self.max_delay, self.base_delay * 2.0 ** (attempt - 1))
+        return cap * self._rand()
+
+
+class CircuitBreaker:
+    """
+    連續失敗 failure_threshold 次後斷路，斷路期間直接拋出 CircuitOpenError。
+    失敗以呼叫計算：Resilience 用盡重試後才記錄一次，重試不會重複計入。
+
+    斷路 reset_timeout 秒後放行一個試探請求 (half-open)：成功即恢復，失敗則
+    重新斷路。試探請求被取消而沒有結果時，再過 reset_timeout 會放行下一個。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        message: str = "外部服務暫時無法使用，請稍後再試。",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.message = message
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open = False
+
+        CIRCUIT_STATE.set_function(lambda: _STATE_VALUES[self.state], name)
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if self._half_open else "open"
+
+    def check(self) -> None:
+        """斷路中拋出 CircuitOpenError；冷卻結束時放行一個試探請求"""
+        if self._opened_at is None:
+            return
+        now = self._clock()
+        if now - self._opened_at < self.reset_timeout:
+            raise CircuitOpenError(self.message)
+        # 重新計時，試探請求結束前其餘請求仍被拒絕
+        self._opened_at = now
+        self._half_open = True
+
+    def record_success(self) -> None:
+        if self._opened_at is not None:
+            logger.info("Circuit closed", extra={"dependency": self.name})
+        self._failures = 0
+        self._opened_at = None
+        self._half_open = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._half_open or (
+            self._opened_at is None and self._failures >= self.failure_threshold
+        ):
+            logger.warning(
+                "Circuit opened",
+                extra={"dependency": self.name, "failures": self._failures},
+            )
+            self._opened_at = self._clock()
+            self._half_open = False
+
+
+class Resilience:
+    """
+    單一外部依賴的重試與斷路器。
+
+    is_failure 判定為上游故障的例外才會計入斷路器並重試；其他例外 (如查無
+    代碼、參數錯誤) 代表上游有正常回應，直接拋出。自適應並發上限的拒絕屬於
+    本地過載，不重試也不計入斷路器。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        is_failure: Callable[[BaseException], bool] = _any_error,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        self.name = name
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(name)
+        self.is_failure = is_failure
+        self._sleep = sleep
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        # 只在呼叫開始時檢查斷路器：half-open 的試探呼叫可用完自己的重試次數
+        self.breaker.check()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = await fn()
+            except DependencyOverloadedError:
+                raise
+            except Exception as e:
+                if not (isinstance(e, TimeoutError) or self.is_failure(e)):
+                    self.breaker.record_success()
+                    raise
+                # 重試期間其他呼叫已使斷路器斷路時不再重試
+                if attempt >= self.retry.attempts or self.breaker.state == "open":
+                    self.breaker.record_failure()
+                    raise
+                delay = self.retry.delay(attempt)
+                RETRIES.inc(self.name)
+                logger.warning(
+                    "Retrying after upstream failure",
+                    extra={
+                        "dependency": self.name,
+                        "attempt": attempt,
+                        "delay": round(delay, 3),
+                        "error": repr(e),
+                    },
+                )
+                await self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+
+async def resilient(
+    resilience: Optional[Resilience], fn: Callable[[], Awaitable[T]]
+) -> T:
+    """resilience 為 None 時僅呼叫一次"""
+    if resilience is None:
+        return await fn()
+    return await resilience.call(fn)
@@ -0,0 +1,170 @@
+import os
+import signal
+import socket
+import sys
+import time
+from types import FrameType
+from typing import Dict, Optional
+
+import uvicorn
+from loguru import logger
+
+from lineaihelper.config import settings
+from lineaihelper.logging_config import (
+    process_log_name,
+    setup_logging,
+    shutdown_logging,
+)
+
+# Worker 在啟動後此秒數內結束視為啟動失敗，避免不斷重啟
+MIN_WORKER_UPTIME_SECONDS = 5.0
+
+
+def warmup() -> None:
+    """
+    於 fork 前載入重量級模組並編譯所有提示詞模板。
+
+    Worker 以 copy-on-write 共用這些記憶體，不需各自重新 import pandas /
+    pandas_ta / yfinance / google-genai，也縮短 Worker 的啟動時間。
+    """
+    import lineaihelper.main  # noqa: F401  (FastAPI app 與所有已註冊的服務)
+    from lineaihelper.lazy_imports import preload
+    from lineaihelper.prompt_engine import PromptEngine
+
+    # main 本身不載入重量級依賴 (見 lazy_imports)，於此一次載入供 Worker 共用
+    timings = preload()
+    templates = PromptEngine().warm()
+    logger.info(
+        "Pre-fork warmup finished",
+        extra={"templates": templates, "seconds": timings},
+    )
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """建立所有 Worker 共用的監聽 Socket (由核心分配連線)"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(worker_id: int, sock: socket.socket) -> int:
+    """子程序：重新初始化日誌後以共用的 Socket 執行 uvicorn"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    setup_logging(process_log_name(settings.PROCESS_ROLE, worker_id))
+
+    from lineaihelper.main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on"))
+    try:
+        server.run(sockets=[sock])
+    finally:
+        shutdown_logging()
+    return 0 if server.started else 1
+
+
+class Supervisor:
+    """
+    Pre-fork 多程序管理：維持 N 個 Worker，異常結束時重新啟動，
+    收到 SIGTERM / SIGINT 時轉送給所有 Worker 並等待其結束 (優雅關閉)。
+    """
+
+    def __init__(self, workers: int, sock: socket.socket):
+        self.workers = workers
+        self.sock = sock
+        self.children: Dict[int, int] = {}  # pid -> worker_id
+        self.started_at: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, worker_id: int) -> None:
+        # 日誌背景執行緒不會被 fork 複製：fork 前先寫出並關閉，之後各自重建
+        shutdown_logging()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(worker_id, self.sock)
+            finally:
+                os._exit(code)
+        setup_logging()
+        self.children[pid] = worker_id
+        self.started_at[pid] = time.monotonic()
+        logger.info("Worker started", extra={"worker_id": worker_id, "pid": pid})
+
+    def stop(self, signum: int, frame: Optional[FrameType]) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for worker_id in range(self.workers):
+            self.spawn(worker_id)
+
+        exit_code = 0
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            worker_id = self.children.pop(pid)
+            uptime = time.monotonic() - self.started_at.pop(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+
+            logger.warning(
+                "Worker exited",
+                extra={"worker_id": worker_id, "pid": pid, "code": code},
+            )
+            if uptime < MIN_WORKER_UPTIME_SECONDS:
+                # 啟動即失敗 (設定錯誤、埠號衝突等)，重啟也無濟於事
+                exit_code = 1
+                self.stop(signal.SIGTERM, None)
+            else:
+                self.spawn(worker_id)
+        return exit_code
+
+
+def serve() -> None:
+    """
+    正式環境啟動器 (uv run serve)。
+
+    WORKERS > 1 時先於主程序完成 warmup，再 fork 出多個 Worker 共用同一個
+    監聽 Socket；快取與 Webhook 去重透過 SHARED_CACHE_PATH 在 Worker 間共享。
+    """
+    workers = settings.WORKERS
+    if workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.run(
+            "lineaihelper.main:app", host=settings.APP_HOST, port=settings.APP_PORT
+        )
+        return
+
+    if not settings.SHARED_CACHE_PATH:
+        logger.warning(
+            "SHARED_CACHE_PATH is not set, caches and deduplication are per worker",
+            extra={"workers": workers},
+        )
+
+    # 主程序 (Supervisor) 使用不含程序識別的日誌檔，Worker 各自寫入 _{角色}{編號}
+    setup_logging()
+    warmup()
+    sock = bind_socket(settings.APP_HOST, settings.APP_PORT)
+    logger.info(
+        "Starting workers",
+        extra={
+            "workers": workers,
+            "host": settings.APP_HOST,
+            "port": settings.APP_PORT,
+        },
+    )
+
+    sys.exit(Supervisor(workers, sock).run())
@@ -2,6 +2,22 @@ from lineaihelper.services.base_service import BaseService
 from lineaihelper.services.chat_service import ChatService
 from lineaihelper.services.help_service import HelpService
 from lineaihelper.services.price_service import PriceService
+from lineaihelper.services.registry import (
+    COMMAND_REGISTRY,
+    CommandSpec,
+    ServiceDeps,
+    register_command,
+)
 from lineaihelper.services.stock_service import StockService
 
-__all__ = ["BaseService", "ChatService", "HelpService", "PriceService", "StockService"]
+__all__ = [
+    "COMMAND_REGISTRY",
+    "BaseService",
+    "ChatService",
+    "CommandSpec",
+    "HelpService",
+    "PriceService",
+    "ServiceDeps",
+    "StockService",
+    "register_command",
+]
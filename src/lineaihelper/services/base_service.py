@@ -1,4 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from lineaihelper.services.registry import ServiceDeps
 
 
 class BaseService(ABC):
@@ -7,6 +11,13 @@ class BaseService(ABC):
     強制子類別實作 execute 方法。
     """
 
+    @classmethod
+    def create(cls, deps: "ServiceDeps") -> "BaseService":
+        """
+        以共用依賴建立服務實例；需要外部依賴的子類別應覆寫此方法。
+        """
+        return cls()
+
     @abstractmethod
     async def execute(self, args: str) -> str:
         """
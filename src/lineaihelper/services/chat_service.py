@@ -1,35 +1,178 @@
-from typing import Optional
+import asyncio
+from typing import TYPE_CHECKING, Optional, Set
 
-from google import genai
+from loguru import logger
 
+from lineaihelper.adaptive_limit import AdaptiveLimiter
+from lineaihelper.config import settings
+from lineaihelper.context import user_id_var
+from lineaihelper.conversation_memory import ConversationMemory
 from lineaihelper.exceptions import ExternalAPIError, ServiceError, handle_gemini_error
+from lineaihelper.gemini import generate_content
 from lineaihelper.prompt_engine import PromptEngine
+from lineaihelper.resilience import Resilience
 from lineaihelper.services.base_service import BaseService
+from lineaihelper.services.registry import ServiceDeps, register_command
+from lineaihelper.shared_cache import SharedCache
+from lineaihelper.similarity_cache import NearDuplicateCache, normalize_text
 
+if TYPE_CHECKING:
+    from google import genai
 
+
+@register_command(".chat", aliases=(".c",), timeout=30.0, max_concurrency=4)
 class ChatService(BaseService):
     def __init__(
         self,
-        gemini_client: genai.Client,
+        gemini_client: "genai.Client",
         prompt_engine: Optional[PromptEngine] = None,
+        memory: Optional[ConversationMemory] = None,
+        answer_cache: Optional[NearDuplicateCache] = None,
+        shared_answers: Optional[SharedCache] = None,
+        gemini_limiter: Optional[AdaptiveLimiter] = None,
+        gemini_resilience: Optional[Resilience] = None,
     ):
         self.gemini_client = gemini_client
+        self.gemini_limiter = gemini_limiter
+        self.gemini_resilience = gemini_resilience
         self.prompt_engine = prompt_engine or PromptEngine()
+        if memory is None:
+            memory = ConversationMemory(
+                max_tokens_per_user=settings.CHAT_MEMORY_TOKENS_PER_USER,
+                max_users=settings.CHAT_MEMORY_MAX_USERS,
+                max_total_tokens=settings.CHAT_MEMORY_MAX_TOTAL_TOKENS,
+                keep_recent_turns=settings.CHAT_MEMORY_KEEP_RECENT_TURNS,
+            )
+        self.memory = memory
+        if answer_cache is None and settings.CHAT_CACHE_ENABLED:
+            answer_cache = NearDuplicateCache(
+                threshold=settings.CHAT_CACHE_THRESHOLD,
+                max_entries=settings.CHAT_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS,
+            )
+        self.answer_cache = answer_cache
+        # 跨 Worker 共享的回答快取 (以正規化後的問題完全比對)
+        self.shared_answers = shared_answers if settings.CHAT_CACHE_ENABLED else None
+        # 背景摘要任務需保留參照，避免被 GC 回收
+        self._summary_tasks: Set[asyncio.Task[None]] = set()
+        self._summarizing: Set[str] = set()
+
+    @classmethod
+    def create(cls, deps: ServiceDeps) -> "ChatService":
+        return cls(
+            deps.gemini_client,
+            prompt_engine=deps.prompt_engine,
+            shared_answers=deps.shared_cache("chat"),
+            gemini_limiter=deps.gemini_limiter,
+            gemini_resilience=deps.gemini_resilience,
+        )
 
     async def execute(self, args: str) -> str:
         if not args:
             raise ServiceError("請提供聊天內容，例如: .chat 你好")
 
-        prompt = self.prompt_engine.render("chat", {"message": args})
+        user_id = user_id_var.get()
+        conv = self.memory.get(user_id) if user_id else None
+
+        # 快取只存放不依賴對話脈絡的回答；對話進行中的追問 (如「那它的股價呢」)
+        # 需依脈絡回答，讀寫皆略過快取，避免取得或提供其他使用者的回答
+        has_context = conv is not None and bool(conv.summary or conv.turns)
+
+        # 近似問題快取命中時不呼叫 AI
+        cached: Optional[str] = None
+        if not has_context:
+            cached = self.answer_cache.get(args) if self.answer_cache else None
+            if cached is None and self.shared_answers is not None:
+                cached = await self.shared_answers.get(normalize_text(args))
+                if cached is not None and self.answer_cache is not None:
+                    self.answer_cache.put(args, cached)
+        if cached is not None:
+            logger.info("Chat cache hit")
+            if user_id:
+                self._remember(user_id, args, cached)
+            return cached
+
+        prompt = self.prompt_engine.render(
+            "chat",
+            {
+                "message": args,
+                "summary": conv.summary if conv else "",
+                "history": list(conv.turns) if conv else [],
+            },
+        )
 
         try:
-            response = await self.gemini_client.aio.models.generate_content(
-                model="gemini-2.5-flash", contents=prompt
+            response = await generate_content(
+                self.gemini_client, prompt, self.gemini_limiter, self.gemini_resilience
             )
 
             if not response or not response.text:
                 raise ExternalAPIError("AI 回傳了空內容，請換個方式問問看。")
 
-            return response.text
+            reply: str = response.text
         except Exception as e:
             handle_gemini_error(e)
+
+        if self.answer_cache is not None and not has_context:
+            self.answer_cache.put(args, reply)
+        if self.shared_answers is not None and not has_context:
+            await self.shared_answers.set(
+                normalize_text(args), reply, settings.CHAT_CACHE_TTL_SECONDS
+            )
+
+        if user_id:
+            self._remember(user_id, args, reply)
+        return reply
+
+    def _remember(self, user_id: str, message: str, reply: str) -> None:
+        """記錄本回合對話，必要時於背景壓縮舊回合"""
+        self.memory.append(user_id, "user", message)
+        self.memory.append(user_id, "model", reply)
+
+        if user_id in self._summarizing or not self.memory.needs_summary(user_id):
+            return
+
+        self._summarizing.add(user_id)
+        task = asyncio.create_task(self._summarize(user_id))
+        self._summary_tasks.add(task)
+        task.add_done_callback(self._summary_tasks.discard)
+
+    async def _summarize(self, user_id: str) -> None:
+        """將舊回合壓縮為摘要；失敗時直接丟棄舊回合以維持預算"""
+        try:
+            turns = self.memory.turns_to_summarize(user_id)
+            conv = self.memory.get(user_id)
+            if not turns or conv is None:
+                return
+
+            prompt = self.prompt_engine.render(
+                "chat_summary",
+                {
+                    "summary": conv.summary,
+                    "turns": turns,
+                    "max_chars": settings.CHAT_SUMMARY_MAX_CHARS,
+                },
+            )
+            summary = conv.summary
+            try:
+                response = await generate_content(
+                    self.gemini_client,
+                    prompt,
+                    self.gemini_limiter,
+                    self.gemini_resilience,
+                )
+                if response and response.text:
+                    summary = response.text.strip()[: settings.CHAT_SUMMARY_MAX_CHARS]
+            except Exception as e:
+                logger.warning(
+                    "Chat summarization failed, dropping old turns",
+                    extra={"error": str(e)},
+                )
+
+            self.memory.compact(user_id, summary, upto_seq=turns[-1].seq)
+            logger.info(
+                "Chat history compacted",
+                extra={"compacted_turns": len(turns)},
+            )
+        finally:
+            self._summarizing.discard(user_id)
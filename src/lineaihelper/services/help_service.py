@@ -1,12 +1,16 @@
+import math
+
 from lineaihelper.services.base_service import BaseService
+from lineaihelper.services.registry import register_command
 
 
+@register_command(".help", aliases=(".h",), timeout=5.0, cache_ttl=math.inf)
 class HelpService(BaseService):
     async def execute(self, args: str) -> str:
         return (
             "[LineNexus Commands]\n"
-            ".stock [symbol] - AI 技術分析報告\n"
-            ".price [symbol] - 即時報價與近期 K 線\n"
-            ".chat [content] - AI 聊天對話\n"
-            ".help - 顯示此指令列表"
+            ".stock (.s) [symbol] - AI 技術分析報告\n"
+            ".price (.p) [symbol] - 即時報價與近期 K 線\n"
+            ".chat (.c) [content] - AI 聊天對話\n"
+            ".help (.h) - 顯示此指令列表"
         )
@@ -2,13 +2,25 @@ from typing import Optional
 
 from lineaihelper.exceptions import ExternalAPIError, ServiceError
 from lineaihelper.providers.base_provider import BaseDataProvider
-from lineaihelper.providers.stock_provider import YahooFinanceProvider
+from lineaihelper.providers.cached_provider import DELAYED_DATA_NOTICE
 from lineaihelper.services.base_service import BaseService
+from lineaihelper.services.registry import ServiceDeps, register_command
 
 
+@register_command(
+    ".price", aliases=(".p",), timeout=15.0, max_concurrency=8, cache_ttl=5.0
+)
 class PriceService(BaseService):
     def __init__(self, provider: Optional[BaseDataProvider] = None):
-        self.provider = provider or YahooFinanceProvider()
+        if provider is None:
+            from lineaihelper.providers.stock_provider import YahooFinanceProvider
+
+            provider = YahooFinanceProvider()
+        self.provider = provider
+
+    @classmethod
+    def create(cls, deps: ServiceDeps) -> "PriceService":
+        return cls(provider=deps.provider)
 
     async def execute(self, args: str) -> str:
         if not args:
@@ -42,4 +54,6 @@ class PriceService(BaseService):
                 f"- {b.timestamp.strftime('%m/%d')}: C:{b.close:<7} V:{b.volume:,}"
             )
 
+        if quote.delayed or history.delayed:
+            lines[:0] = [DELAYED_DATA_NOTICE, ""]
         return "\n".join(lines)
@@ -0,0 +1,236 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from lineaihelper.adaptive_limit import AdaptiveLimiter
+from lineaihelper.config import settings
+from lineaihelper.exceptions import ExternalAPIError, is_gemini_overload
+from lineaihelper.market_calendar import FreshnessPolicy, MarketCalendar
+from lineaihelper.prompt_engine import PromptEngine
+from lineaihelper.providers.base_provider import BaseDataProvider
+from lineaihelper.providers.cached_provider import CachedDataProvider
+from lineaihelper.resilience import CircuitBreaker, Resilience, RetryPolicy
+from lineaihelper.shared_cache import SharedCache, SQLiteStore
+
+if TYPE_CHECKING:
+    from google import genai
+
+    from lineaihelper.services.base_service import BaseService
+    from lineaihelper.services.technical_analysis_service import (
+        TechnicalAnalysisService,
+    )
+
+
+class ServiceDeps:
+    """
+    服務共用的依賴容器，所有服務共享同一組 Provider 與 PromptEngine。
+
+    依賴皆於首次存取時才建立。
+    """
+
+    def __init__(
+        self,
+        gemini_client: Optional["genai.Client"] = None,
+        provider: Optional[BaseDataProvider] = None,
+        prompt_engine: Optional[PromptEngine] = None,
+        shared_store: Optional[SQLiteStore] = None,
+    ):
+        if gemini_client is not None:
+            self.__dict__["gemini_client"] = gemini_client
+        if provider is not None:
+            self.__dict__["provider"] = provider
+        if prompt_engine is not None:
+            self.__dict__["prompt_engine"] = prompt_engine
+        if shared_store is not None:
+            self.__dict__["shared_store"] = shared_store
+
+    @cached_property
+    def gemini_client(self) -> "genai.Client":
+        # google-genai 載入約需 1 秒，延後到第一個需要 AI 的服務建立時
+        from google import genai
+
+        return genai.Client(api_key=settings.GEMINI_API_KEY)
+
+    @cached_property
+    def shared_store(self) -> Optional[SQLiteStore]:
+        """跨 Worker 共享的鍵值儲存；未設定 SHARED_CACHE_PATH 時為 None"""
+        if not settings.SHARED_CACHE_PATH:
+            return None
+        return SQLiteStore(settings.SHARED_CACHE_PATH)
+
+    def shared_cache(self, namespace: str) -> Optional[SharedCache]:
+        store = self.shared_store
+        if store is None:
+            return None
+        return SharedCache(
+            store, namespace, lease_seconds=settings.SHARED_CACHE_LEASE_SECONDS
+        )
+
+    @cached_property
+    def provider_limiter(self) -> Optional[AdaptiveLimiter]:
+        if not settings.ADAPTIVE_LIMIT_ENABLED:
+            return None
+        return AdaptiveLimiter(
+            "provider",
+            initial=settings.PROVIDER_LIMIT_INITIAL,
+            min_limit=settings.PROVIDER_LIMIT_MIN,
+            max_limit=settings.PROVIDER_LIMIT_MAX,
+            latency_threshold=settings.PROVIDER_LATENCY_THRESHOLD_SECONDS,
+            backoff=settings.ADAPTIVE_LIMIT_BACKOFF,
+            max_wait=settings.ADAPTIVE_LIMIT_MAX_WAIT_SECONDS,
+            is_congestion=_is_provider_failure,
+            message="行情資料來源目前忙碌中，請稍後再試。",
+        )
+
+    @cached_property
+    def gemini_limiter(self) -> Optional[AdaptiveLimiter]:
+        if not settings.ADAPTIVE_LIMIT_ENABLED:
+            return None
+        return AdaptiveLimiter(
+            "gemini",
+            initial=settings.GEMINI_LIMIT_INITIAL,
+            min_limit=settings.GEMINI_LIMIT_MIN,
+            max_limit=settings.GEMINI_LIMIT_MAX,
+            latency_threshold=settings.GEMINI_LATENCY_THRESHOLD_SECONDS,
+            backoff=settings.ADAPTIVE_LIMIT_BACKOFF,
+            max_wait=settings.ADAPTIVE_LIMIT_MAX_WAIT_SECONDS,
+            is_congestion=is_gemini_overload,
+            message="AI 服務目前忙碌中，請稍後再試。",
+        )
+
+    @cached_property
+    def provider_resilience(self) -> Resilience:
+        return _resilience(
+            "provider",
+            settings.PROVIDER_RETRY_ATTEMPTS,
+            is_failure=_is_provider_failure,
+            message="行情資料來源暫時無法連線，請稍後再試。",
+        )
+
+    @cached_property
+    def gemini_resilience(self) -> Resilience:
+        return _resilience(
+            "gemini",
+            settings.GEMINI_RETRY_ATTEMPTS,
+            is_failure=is_gemini_overload,
+            message="AI 服務暫時無法連線，請稍後再試。",
+        )
+
+    @cached_property
+    def market_calendar(self) -> MarketCalendar:
+        return MarketCalendar.load()
+
+    @cached_property
+    def provider(self) -> BaseDataProvider:
+        from lineaihelper.providers.stock_provider import YahooFinanceProvider
+
+        # 共用快取讓同一則訊息中的多個指令與同時抵達的相同查詢共享上游結果
+        return CachedDataProvider(
+            YahooFinanceProvider(),
+            quote_ttl=settings.QUOTE_CACHE_TTL_SECONDS,
+            history_ttl=settings.HISTORY_CACHE_TTL_SECONDS,
+            shared=self.shared_cache("provider"),
+            limiter=self.provider_limiter,
+            resilience=self.provider_resilience,
+            stale_ttl=settings.MARKET_DATA_STALE_SECONDS,
+            freshness=FreshnessPolicy(
+                self.market_calendar,
+                settle_seconds=settings.MARKET_SETTLE_SECONDS,
+                max_ttl=settings.MARKET_DATA_MAX_TTL_SECONDS,
+            )
+            if settings.MARKET_CALENDAR_ENABLED
+            else None,
+        )
+
+    @cached_property
+    def prompt_engine(self) -> PromptEngine:
+        return PromptEngine()
+
+    @cached_property
+    def ta_service(self) -> "TechnicalAnalysisService":
+        from lineaihelper.services.technical_analysis_service import (
+            TechnicalAnalysisService,
+        )
+
+        return TechnicalAnalysisService()
+
+
+def _is_provider_failure(e: BaseException) -> bool:
+    # 查無代碼等資料錯誤由 Provider 自行拋出後再包裝一次，不代表上游故障或壅塞
+    return not isinstance(e.__cause__, ExternalAPIError)
+
+
+def _resilience(
+    name: str,
+    attempts: int,
+    is_failure: Callable[[BaseException], bool],
+    message: str,
+) -> Resilience:
+    return Resilience(
+        name,
+        retry=RetryPolicy(
+            attempts,
+            base_delay=settings.RETRY_BASE_DELAY_SECONDS,
+            max_delay=settings.RETRY_MAX_DELAY_SECONDS,
+        ),
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.CIRCUIT_RESET_SECONDS,
+            message=message,
+        ),
+        is_failure=is_failure,
+    )
+
+
+@dataclass(frozen=True)
+class CommandSpec:
+    """
+    指令規格：指令名稱、別名、服務工廠與執行預算。
+
+    Attributes:
+        name: 正式指令名稱，例如 ".stock"。
+        factory: 以 ServiceDeps 建立服務實例的工廠。
+        aliases: 別名，例如 (".s",)。全形字元會先經 NFKC 正規化。
+        timeout: 單次執行的逾時秒數。
+        max_concurrency: 同時執行的上限；None 表示不限制。
+        cache_ttl: 整則回覆的快取秒數；None 表示不快取，math.inf 表示永久快取。
+    """
+
+    name: str
+    factory: Callable[[ServiceDeps], "BaseService"]
+    aliases: Tuple[str, ...] = field(default_factory=tuple)
+    timeout: float = 30.0
+    max_concurrency: Optional[int] = None
+    cache_ttl: Optional[float] = None
+
+
+# 全域指令註冊表 (名稱 -> 規格)
+COMMAND_REGISTRY: Dict[str, CommandSpec] = {}
+
+S = TypeVar("S", bound=Type["BaseService"])
+
+
+def register_command(
+    name: str,
+    aliases: Tuple[str, ...] = (),
+    timeout: float = 30.0,
+    max_concurrency: Optional[int] = None,
+    cache_ttl: Optional[float] = None,
+) -> Callable[[S], S]:
+    """
+    類別裝飾器：宣告服務所負責的指令。服務實例由 Dispatcher 於首次使用時建立。
+    """
+
+    def decorator(cls: S) -> S:
+        COMMAND_REGISTRY[name] = CommandSpec(
+            name=name,
+            factory=cls.create,
+            aliases=aliases,
+            timeout=timeout,
+            max_concurrency=max_concurrency,
+            cache_ttl=cache_ttl,
+        )
+        return cls
+
+    return decorator
@@ -1,17 +1,27 @@
 import asyncio
-from typing import List, Optional
-
-from google import genai
+from typing import TYPE_CHECKING, List, Optional
 
+from lineaihelper.adaptive_limit import AdaptiveLimiter
 from lineaihelper.exceptions import ExternalAPIError, ServiceError, handle_gemini_error
+from lineaihelper.gemini import generate_content
 from lineaihelper.models.market_data import KLineBar
 from lineaihelper.prompt_engine import PromptEngine
 from lineaihelper.providers.base_provider import BaseDataProvider
-from lineaihelper.providers.stock_provider import YahooFinanceProvider
+from lineaihelper.providers.cached_provider import DELAYED_DATA_NOTICE
+from lineaihelper.resilience import Resilience
 from lineaihelper.services.base_service import BaseService
-from lineaihelper.services.technical_analysis_service import TechnicalAnalysisService
+from lineaihelper.services.registry import ServiceDeps, register_command
+from lineaihelper.tracing import span
+
+if TYPE_CHECKING:
+    from google import genai
 
+    from lineaihelper.services.technical_analysis_service import (
+        TechnicalAnalysisService,
+    )
 
+
+@register_command(".stock", aliases=(".s",), timeout=60.0, max_concurrency=4)
 class StockService(BaseService):
     """
     股票分析服務，整合市場數據提供者、技術分析與 AI 輔助判讀。
@@ -19,10 +29,12 @@ class StockService(BaseService):
 
     def __init__(
         self,
-        gemini_client: genai.Client,
+        gemini_client: "genai.Client",
         provider: Optional[BaseDataProvider] = None,
         prompt_engine: Optional[PromptEngine] = None,
-        ta_service: Optional[TechnicalAnalysisService] = None,
+        ta_service: Optional["TechnicalAnalysisService"] = None,
+        gemini_limiter: Optional[AdaptiveLimiter] = None,
+        gemini_resilience: Optional[Resilience] = None,
     ):
         """
         初始化股票服務。
@@ -32,11 +44,38 @@ class StockService(BaseService):
             provider: 市場數據提供者 (預設使用 YahooFinanceProvider)。
             prompt_engine: 提示詞引擎。
             ta_service: 技術分析服務。
+            gemini_limiter: Gemini 呼叫共用的自適應並發上限 (None 表示不限制)。
+            gemini_resilience: Gemini 呼叫的重試與斷路器 (None 表示只呼叫一次)。
         """
+        # yfinance 與 pandas_ta 載入緩慢，未注入時才於此匯入
+        if provider is None:
+            from lineaihelper.providers.stock_provider import YahooFinanceProvider
+
+            provider = YahooFinanceProvider()
+        if ta_service is None:
+            from lineaihelper.services.technical_analysis_service import (
+                TechnicalAnalysisService,
+            )
+
+            ta_service = TechnicalAnalysisService()
+
         self.gemini_client = gemini_client
-        self.provider = provider or YahooFinanceProvider()
+        self.provider = provider
         self.prompt_engine = prompt_engine or PromptEngine()
-        self.ta_service = ta_service or TechnicalAnalysisService()
+        self.ta_service = ta_service
+        self.gemini_limiter = gemini_limiter
+        self.gemini_resilience = gemini_resilience
+
+    @classmethod
+    def create(cls, deps: ServiceDeps) -> "StockService":
+        return cls(
+            deps.gemini_client,
+            provider=deps.provider,
+            prompt_engine=deps.prompt_engine,
+            ta_service=deps.ta_service,
+            gemini_limiter=deps.gemini_limiter,
+            gemini_resilience=deps.gemini_resilience,
+        )
 
     async def execute(self, args: str) -> str:
         """
@@ -71,7 +110,8 @@ class StockService(BaseService):
         )
 
         # 2. 技術指標計算
-        enriched_daily = self.ta_service.compute_indicators(daily_h)
+        with span("ta.compute_indicators", bars=len(daily_h.bars)):
+            enriched_daily = self.ta_service.compute_indicators(daily_h)
 
         # 3. 準備多週期數據摘要
         def format_bars(bars: List[KLineBar], count: int) -> str:
@@ -101,11 +141,15 @@ class StockService(BaseService):
 
         # 4. AI 分析
         try:
-            response = await self.gemini_client.aio.models.generate_content(
-                model="gemini-2.5-flash", contents=prompt
+            response = await generate_content(
+                self.gemini_client, prompt, self.gemini_limiter, self.gemini_resilience
             )
             if not response or not response.text:
                 raise ExternalAPIError("AI 分析回傳空內容")
-            return response.text
+            report: str = response.text
         except Exception as e:
             handle_gemini_error(e, default_msg="AI 分析目前無法使用")
+
+        if any(data.delayed for data in (quote, daily_h, weekly_h, monthly_h)):
+            report = f"{DELAYED_DATA_NOTICE}\n\n{report}"
+        return report
@@ -0,0 +1,197 @@
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+from lineaihelper.metrics import REGISTRY
+
+T = TypeVar("T")
+
+SHARED_CACHE = REGISTRY.counter(
+    "linenexus_shared_cache_total",
+    "Shared cross-worker cache lookups by namespace and result.",
+    ("namespace", "result"),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+"""
+
+
+def connect_sqlite(path: str, busy_timeout: float, schema: str) -> sqlite3.Connection:
+    """開啟 WAL 模式的 SQLite 連線 (autocommit，可跨執行緒使用) 並建立資料表"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(
+        path,
+        timeout=busy_timeout,
+        isolation_level=None,
+        check_same_thread=False,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn
+
+
+class SQLiteStore:
+    """
+    以本機 SQLite 檔案 (WAL 模式) 實作的跨程序鍵值儲存。
+
+    同一台機器上的多個 Worker 程序開啟同一個檔案即可共享資料；
+    讀取不互相阻塞，寫入由 SQLite 檔案鎖序列化。
+    連線於 fork 後的第一次使用時重新建立，可安全地在 pre-fork 前建立實例。
+    到期時間以 epoch 秒數記錄 (各程序共用同一時鐘)；None 代表永不過期。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = connect_sqlite(self.path, self.busy_timeout, _SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT value FROM kv WHERE key = ? "
+                    "AND (expires_at IS NULL OR expires_at > ?)",
+                    (key, self._clock()),
+                )
+                .fetchone()
+            )
+        return row[0] if row is not None else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, self._expires_at(ttl)),
+            )
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """鍵不存在或已過期時寫入並回傳 True (原子操作)"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET "
+                "value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?",
+                (key, value, self._expires_at(ttl), self._clock()),
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def purge(self) -> int:
+        """刪除所有過期項目並回傳筆數"""
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (self._clock(),),
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    def _expires_at(self, ttl: float) -> Optional[float]:
+        return None if ttl == float("inf") else self._clock() + ttl
+
+
+class SharedCache:
+    """
+    SQLiteStore 的非同步介面，以命名空間區隔不同用途的鍵，值以 pickle 序列化。
+
+    資料庫操作於背景執行緒進行，不阻塞事件迴圈。僅供同一應用程式的程序之間
+    共享，不可指向不受信任的檔案。同時也實作 IdempotencyBackend。
+    """
+
+    def __init__(
+        self,
+        store: SQLiteStore,
+        namespace: str,
+        lease_seconds: float = 10.0,
+        poll_interval: float = 0.05,
+    ):
+        self.store = store
+        self.namespace = namespace
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key!r}"
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        data = await asyncio.to_thread(self.store.get, self._key(key))
+        SHARED_CACHE.inc(self.namespace, "miss" if data is None else "hit")
+        return pickle.loads(data) if data is not None else None
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        await asyncio.to_thread(self.store.set, self._key(key), data, ttl)
+
+    async def set_if_absent(self, key: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self.store.add, self._key(key), b"", ttl)
+
+    async def get_or_fetch(
+        self, key: Hashable, ttl: float, fetch: Callable[[], Awaitable[T]]
+    ) -> T:
+        """
+        跨程序的 Single-flight：取得租約的程序負責呼叫上游並寫入共享快取，
+        其他程序輪詢等待結果；租約到期仍無結果時改為自行呼叫上游。
+        """
+        cached = await self.get(key)
+        if cached is not None:
+            result: T = cached
+            return result
+
+        lease = f"lease:{self._key(key)}"
+        leader = await asyncio.to_thread(self.store.add, lease, b"", self.lease_seconds)
+        if not leader:
+            deadline = time.monotonic() + self.lease_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                data = await asyncio.to_thread(self.store.get, self._key(key))
+                if data is not None:
+                    SHARED_CACHE.inc(self.namespace, "coalesced")
+                    result = pickle.loads(data)
+                    return result
+                # 租約已釋放卻沒有結果 (上游失敗)，不再等待
+                if await asyncio.to_thread(self.store.get, lease) is None:
+                    break
+
+        try:
+            result = await fetch()
+            await self.set(key, result, ttl)
+            return result
+        finally:
+            if leader:
+                await asyncio.to_thread(self.store.delete, lease)
@@ -0,0 +1,171 @@
+import re
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Mersenne prime，用於 MinHash 的線性雜湊排列
+_PRIME = (1 << 61) - 1
+
+# 正反問句 (會不會、是不是、有沒有) 視同肯定句
+_A_NOT_A = re.compile(r"(.)[不沒]\1")
+# 句尾語氣詞
+_TRAILING_PARTICLES = re.compile(r"[嗎呢吧啊呀嘛喔哦]+$")
+
+
+def normalize_text(text: str) -> str:
+    """
+    將問題正規化，讓僅在空白、標點、全半形或問句語氣上不同的輸入得到相同字串。
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    text = "".join(
+        ch for ch in text if unicodedata.category(ch)[0] not in ("P", "Z", "C")
+    )
+    text = _A_NOT_A.sub(r"\1", text)
+    return _TRAILING_PARTICLES.sub("", text)
+
+
+def shingles(text: str, n: int = 2) -> FrozenSet[str]:
+    """產生字元 n-gram 集合；過短的字串直接以整串作為單一元素"""
+    if len(text) <= n:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i : i + n] for i in range(len(text) - n + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _Entry:
+    shingles: FrozenSet[str]
+    bands: List[Tuple[int, Tuple[int, ...]]]
+    answer: str
+    expires_at: float
+
+
+class NearDuplicateCache:
+    """
+    基於字元 n-gram MinHash/LSH 的近似問題快取，完全於本地計算。
+
+    - 以 LSH 分段 (band) 找出候選問題，再以精確 Jaccard 相似度確認。
+    - 以 LRU 限制項目數量，並對每個項目套用 TTL。
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        max_entries: int = 2000,
+        ttl_seconds: float = 600.0,
+        num_perm: int = 32,
+        bands: int = 16,
+        ngram: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm 必須能被 bands 整除")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.ngram = ngram
+        self._rows = num_perm // bands
+        self._bands = bands
+        self._clock = clock
+
+        # 固定種子的排列參數，確保跨程序的簽章一致
+        self._perms = [
+            (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+            for i in range(num_perm)
+        ]
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, question: str) -> Optional[str]:
+        """找出足夠相似且未過期的已快取問題，回傳其答案"""
+        key = normalize_text(question)
+        if not key:
+            return None
+
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > now:
+            self._entries.move_to_end(key)
+            return entry.answer
+
+        grams = shingles(key, self.ngram)
+        best_key, best_score = None, 0.0
+        for candidate in self._candidates(self._band_keys(grams)):
+            cand = self._entries[candidate]
+            if cand.expires_at <= now:
+                self._remove(candidate)
+                continue
+            score = jaccard(grams, cand.shingles)
+            if score > best_score:
+                best_key, best_score = candidate, score
+
+        if best_key is None or best_score < self.threshold:
+            return None
+
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key].answer
+
+    def put(self, question: str, answer: str) -> None:
+        key = normalize_text(question)
+        if not key:
+            return
+
+        self._remove(key)
+        grams = shingles(key, self.ngram)
+        entry = _Entry(
+            shingles=grams,
+            bands=self._band_keys(grams),
+            answer=answer,
+            expires_at=self._clock() + self.ttl_seconds,
+        )
+        self._entries[key] = entry
+        for band in entry.bands:
+            self._buckets.setdefault(band, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def purge(self) -> int:
+        """清空快取並回傳清除的項目數"""
+        count = len(self._entries)
+        self._entries.clear()
+        self._buckets.clear()
+        return count
+
+    def _signature(self, grams: FrozenSet[str]) -> List[int]:
+        hashes = [zlib.crc32(g.encode("utf-8")) for g in grams]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, grams: FrozenSet[str]) -> List[Tuple[int, Tuple[int, ...]]]:
+        sig = self._signature(grams)
+        r = self._rows
+        return [(i, tuple(sig[i * r : (i + 1) * r])) for i in range(self._bands)]
+
+    def _candidates(self, band_keys: List[Tuple[int, Tuple[int, ...]]]) -> Set[str]:
+        found: Set[str] = set()
+        for band in band_keys:
+            found |= self._buckets.get(band, set())
+        return found
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
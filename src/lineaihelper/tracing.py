@@ -0,0 +1,297 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+import zlib
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import TracebackType
+from typing import Any, Deque, Dict, Iterator, List, Optional, Type
+
+import orjson
+
+from lineaihelper.context import trace_id_var
+
+# OTLP SpanKind
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP StatusCode
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+@dataclass
+class Span:
+    """單一追蹤區段；時間以 epoch 奈秒表示，對應 OTLP 的欄位定義"""
+
+    trace_id: str
+    span_id: str
+    parent_span_id: str
+    name: str
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = 0
+    end_ns: int = 0
+    status: int = STATUS_OK
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": k, "value": {"stringValue": str(v)}}
+                for k, v in self.attributes.items()
+            ],
+            "status": {"code": self.status},
+        }
+
+    @classmethod
+    def from_otlp(cls, data: Dict[str, Any]) -> "Span":
+        return cls(
+            trace_id=data["traceId"],
+            span_id=data["spanId"],
+            parent_span_id=data.get("parentSpanId", ""),
+            name=data["name"],
+            kind=data.get("kind", SPAN_KIND_INTERNAL),
+            start_ns=int(data["startTimeUnixNano"]),
+            end_ns=int(data["endTimeUnixNano"]),
+            status=data.get("status", {}).get("code", STATUS_OK),
+            attributes={
+                a["key"]: a["value"].get("stringValue", "")
+                for a in data.get("attributes", [])
+            },
+        )
+
+
+class SpanExporter:
+    """
+    將完成的 Span 暫存於有上限的佇列，再批次以 OTLP/JSON (每行一個
+    ExportTraceServiceRequest，與 OTel Collector file exporter 相同) 寫入檔案。
+
+    export 只做 append，檔案 I/O 由 flush 在背景執行緒完成，不阻塞事件迴圈。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        service_name: str = "LineNexus",
+        max_buffer: int = 10_000,
+    ):
+        self.path = path
+        self.service_name = service_name
+        self.dropped = 0
+        self._buffer: Deque[Span] = deque()
+        self._max_buffer = max_buffer
+        self._write_lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        if len(self._buffer) >= self._max_buffer:
+            self.dropped += 1
+            return
+        self._buffer.append(span)
+
+    def flush(self) -> int:
+        spans: List[Span] = []
+        while self._buffer:
+            spans.append(self._buffer.popleft())
+        if not spans:
+            return 0
+
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "lineaihelper"},
+                            "spans": [s.to_otlp() for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = orjson.dumps(payload) + b"\n"
+        directory = os.path.dirname(self.path)
+        with self._write_lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line)
+        return len(spans)
+
+
+class Tracer:
+    """
+    以 trace_id 雜湊決定取樣，同一請求 (含背景工作) 的所有 Span 取樣結果一致，
+    不需額外傳遞取樣旗標。
+    """
+
+    def __init__(
+        self, sample_rate: float = 0.0, exporter: Optional[SpanExporter] = None
+    ):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+
+    def is_sampled(self, trace_id: str) -> bool:
+        if self.exporter is None or self.sample_rate <= 0:
+            return False
+        if self.sample_rate >= 1:
+            return True
+        return zlib.crc32(trace_id.encode("utf-8")) / 2**32 < self.sample_rate
+
+
+_tracer = Tracer()
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def configure(sample_rate: float, exporter: Optional[SpanExporter]) -> Tracer:
+    """設定全域 Tracer (於 lifespan 呼叫)"""
+    global _tracer
+    _tracer = Tracer(sample_rate, exporter)
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def otel_trace_id(trace_id: str) -> str:
+    """將應用層 trace_id (UUID 或任意字串) 轉為 OTLP 的 32 位十六進位 ID"""
+    try:
+        return uuid.UUID(trace_id).hex
+    except ValueError:
+        return hashlib.md5(trace_id.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+
+class span:
+    """
+    建立一個 Span 並設為目前區段；未取樣時幾乎不產生成本。
+
+    Example:
+        with span("provider.get_quote", symbol=symbol):
+            ...
+    """
+
+    __slots__ = ("name", "kind", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self._span: Optional[Span] = None
+        self._token: Any = None
+
+    def __enter__(self) -> Optional[Span]:
+        tracer = _tracer
+        trace_id = trace_id_var.get()
+        if not tracer.is_sampled(trace_id):
+            return None
+
+        parent = _current_span.get()
+        attributes = dict(self.attributes)
+        attributes.setdefault("linenexus.trace_id", trace_id)
+        self._span = Span(
+            trace_id=otel_trace_id(trace_id),
+            span_id=os.urandom(8).hex(),
+            parent_span_id=parent.span_id if parent is not None else "",
+            name=self.name,
+            kind=self.kind,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        current = self._span
+        if current is None:
+            return
+        current.end_ns = time.time_ns()
+        if exc_type is not None:
+            current.status = STATUS_ERROR
+            current.attributes["exception.type"] = exc_type.__name__
+        _current_span.reset(self._token)
+        exporter = _tracer.exporter
+        if exporter is not None:
+            exporter.export(current)
+
+
+def load_spans(path: str) -> Iterator[Span]:
+    """逐行讀取 OTLP/JSON 檔案中的所有 Span"""
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource in orjson.loads(line).get("resourceSpans", []):
+                for scope in resource.get("scopeSpans", []):
+                    for data in scope.get("spans", []):
+                        yield Span.from_otlp(data)
+
+
+def find_trace(path: str, trace_id: str) -> List[Span]:
+    """依應用層 trace_id 或 OTLP traceId 取出同一請求的所有 Span"""
+    target = otel_trace_id(trace_id) if len(trace_id) != 32 else trace_id
+    return [s for s in load_spans(path) if s.trace_id in (target, trace_id)]
+
+
+def format_waterfall(spans: List[Span], width: int = 40) -> str:
+    """
+    以瀑布圖呈現各階段耗時，子區段依父子關係縮排。
+    """
+    if not spans:
+        return "No spans found."
+
+    start = min(s.start_ns for s in spans)
+    end = max(s.end_ns for s in spans)
+    total = max(end - start, 1)
+    children: Dict[str, List[Span]] = {}
+    ids = {s.span_id for s in spans}
+    roots: List[Span] = []
+    for s in sorted(spans, key=lambda s: s.start_ns):
+        if s.parent_span_id and s.parent_span_id in ids:
+            children.setdefault(s.parent_span_id, []).append(s)
+        else:
+            roots.append(s)
+
+    lines = [f"trace {spans[0].trace_id}  total {total / 1e6:.1f} ms"]
+
+    def walk(node: Span, depth: int) -> None:
+        offset = int((node.start_ns - start) / total * width)
+        length = max(1, int((node.end_ns - node.start_ns) / total * width))
+        bar = " " * offset + "█" * min(length, width - offset)
+        mark = " !" if node.status == STATUS_ERROR else ""
+        lines.append(
+            f"{(node.start_ns - start) / 1e6:9.1f} ms {bar:<{width}} "
+            f"{node.duration_ms:9.1f} ms  {'  ' * depth}{node.name}{mark}"
+        )
+        for child in children.get(node.span_id, []):
+            walk(child, depth + 1)
+
+    for root in roots:
+        walk(root, 0)
+    return "\n".join(lines)
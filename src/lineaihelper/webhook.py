@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import hmac
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+
+class InvalidSignatureError(Exception):
+    """
+    Webhook 簽章不符。
+
+    簽章驗證已自行實作，不需為此匯入 LINE SDK (匯入約需 0.5 秒)。
+    """
+
+
+@dataclass(frozen=True, slots=True)
+class TextMessageEvent:
+    """
+    LINE 文字訊息事件的輕量表示，只保留後續處理所需的欄位。
+
+    相較於 SDK 的 MessageEvent，不需經過完整的模型驗證與反序列化。
+    """
+
+    reply_token: str
+    text: str
+    timestamp: int  # 毫秒
+    user_id: str = ""
+    group_id: str = ""
+    room_id: str = ""
+    webhook_event_id: str = ""
+    is_redelivery: bool = False
+
+    @property
+    def source_id(self) -> str:
+        """事件來源：群組或聊天室優先，其次為使用者本人"""
+        return self.group_id or self.room_id or self.user_id
+
+    @property
+    def push_target(self) -> str:
+        """Push 對象，即事件來源"""
+        return self.source_id
+
+
+def verify_signature(body: bytes, signature: str, channel_secret: str) -> bool:
+    """以 HMAC-SHA256 驗證 x-line-signature"""
+    digest = hmac.new(channel_secret.encode("utf-8"), body, hashlib.sha256).digest()
+    return hmac.compare_digest(base64.b64encode(digest), signature.encode("utf-8"))
+
+
+def _object(value: Any, name: str) -> Dict[str, Any]:
+    """欄位需為 JSON 物件 (缺少時視為空物件)"""
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"Webhook field {name!r} must be a JSON object")
+    return value
+
+
+def _to_event(raw: Dict[str, Any]) -> TextMessageEvent:
+    source = _object(raw.get("source"), "source")
+    delivery = _object(raw.get("deliveryContext"), "deliveryContext")
+    text = raw["message"].get("text", "")
+    if not isinstance(text, str):
+        raise ValueError("Webhook field 'message.text' must be a string")
+    return TextMessageEvent(
+        reply_token=raw.get("replyToken", ""),
+        text=text,
+        timestamp=raw.get("timestamp", 0),
+        user_id=source.get("userId", ""),
+        group_id=source.get("groupId", ""),
+        room_id=source.get("roomId", ""),
+        webhook_event_id=raw.get("webhookEventId", ""),
+        is_redelivery=bool(delivery.get("isRedelivery", False)),
+    )
+
+
+def parse_events(body: bytes) -> List[TextMessageEvent]:
+    """
+    解析 Webhook Payload，僅回傳文字訊息事件，其餘事件類型略過。
+
+    Raises:
+        ValueError: Payload 不是合法的 JSON 或結構不符 (對應 400)。
+    """
+    payload = orjson.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook payload must be a JSON object")
+    raw_events = payload.get("events", [])
+    if not isinstance(raw_events, list):
+        raise ValueError("Webhook field 'events' must be a JSON array")
+
+    events: List[TextMessageEvent] = []
+    for raw in raw_events:
+        if not isinstance(raw, dict):
+            raise ValueError("Webhook events must be JSON objects")
+        message = _object(raw.get("message"), "message")
+        if raw.get("type") == "message" and message.get("type") == "text":
+            events.append(_to_event(raw))
+    return events
+
+
+def parse_webhook(
+    body: bytes, signature: str, channel_secret: str
+) -> List[TextMessageEvent]:
+    """
+    驗證簽章 (僅一次) 並解析事件。
+
+    Raises:
+        InvalidSignatureError: 簽章不符。
+        ValueError: Payload 不是合法的 JSON 或結構不符。
+    """
+    if not verify_signature(body, signature, channel_secret):
+        raise InvalidSignatureError(f"Invalid signature. signature={signature}")
+    return parse_events(body)
+
+
+def to_payload(event: TextMessageEvent, context: Dict[str, Any]) -> bytes:
+    """將事件與追蹤資訊序列化，供持久化佇列跨程序傳遞"""
+    return orjson.dumps({"event": asdict(event), "context": context})
+
+
+def from_payload(payload: bytes) -> Tuple[TextMessageEvent, Dict[str, Any]]:
+    """
+    還原 to_payload 的結果。
+
+    Raises:
+        ValueError: Payload 格式不正確。
+    """
+    data = orjson.loads(payload)
+    try:
+        return TextMessageEvent(**data["event"]), data.get("context", {})
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Malformed job payload: {e}") from e
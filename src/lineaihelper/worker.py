@@ -0,0 +1,168 @@
+import asyncio
+import signal
+from typing import Any, Callable, Dict, Optional, Set
+
+from loguru import logger
+
+from lineaihelper.config import settings
+from lineaihelper.context import line_inbound_id_var, request_id_var, trace_id_var
+from lineaihelper.durable_queue import DurableQueue, Lease
+from lineaihelper.job_queue import JobQueue
+from lineaihelper.logging_config import process_log_name, setup_logging
+from lineaihelper.webhook import TextMessageEvent, from_payload
+
+# (事件, 追蹤資訊, 完成回呼) -> None，實作為 main.handle_message
+EventHandler = Callable[[TextMessageEvent, Dict[str, Any], Callable[[], None]], None]
+
+
+class QueueConsumer:
+    """
+    從持久化佇列領取事件並交給本程序的 JobQueue 執行。
+
+    - 只在 JobQueue 有空閒 Worker 時領取，未領取的事件留在佇列中，
+      可由其他 Worker 程序消化 (各程序可獨立水平擴展)。
+    - 事件處理結束後才 ack；程序中途結束時，未 ack 的事件會在可見性逾時後
+      由其他 Worker 重新領取 (at-least-once)。
+    """
+
+    def __init__(
+        self,
+        queue: DurableQueue,
+        job_queue: JobQueue,
+        handle: EventHandler,
+        poll_interval: float = 0.2,
+        purge_after: float = 600.0,
+        purge_interval: float = 60.0,
+    ):
+        self.queue = queue
+        self.job_queue = job_queue
+        self.handle = handle
+        self.poll_interval = poll_interval
+        self.purge_after = purge_after
+        self.purge_interval = purge_interval
+        self._acks: Set[asyncio.Task[bool]] = set()
+
+    @property
+    def capacity(self) -> int:
+        busy = self.job_queue.queue_size + self.job_queue.in_flight
+        return max(0, self.job_queue.workers - busy)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        next_purge = loop.time()
+        while not stop.is_set():
+            if loop.time() >= next_purge:
+                await asyncio.to_thread(self.queue.purge, self.purge_after)
+                next_purge = loop.time() + self.purge_interval
+
+            leases = []
+            if self.capacity > 0:
+                leases = await asyncio.to_thread(self.queue.claim, self.capacity)
+            for lease in leases:
+                self._dispatch(lease)
+            if not leases:
+                try:
+                    await asyncio.wait_for(stop.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def flush(self) -> None:
+        """等待所有 ack 寫入完成 (關閉前呼叫)"""
+        if self._acks:
+            await asyncio.gather(*self._acks, return_exceptions=True)
+
+    def _dispatch(self, lease: Lease) -> None:
+        try:
+            event, context = from_payload(lease.payload)
+        except ValueError:
+            # 格式錯誤的工作重試也無法成功，直接確認移除
+            logger.exception("Dropping malformed job", extra={"job_id": lease.job_id})
+            self._ack(lease)
+            return
+
+        if lease.attempts > 1:
+            logger.warning(
+                "Redelivered job",
+                extra={"job_id": lease.job_id, "attempts": lease.attempts},
+            )
+        self.handle(event, context, lambda: self._ack(lease))
+
+    def _ack(self, lease: Lease) -> None:
+        task = asyncio.create_task(asyncio.to_thread(self.queue.ack, lease))
+        self._acks.add(task)
+        task.add_done_callback(self._acks.discard)
+
+
+def handle_queued_event(
+    event: TextMessageEvent, context: Dict[str, Any], on_finish: Callable[[], None]
+) -> None:
+    """還原 Ingress 的追蹤資訊後，以與單一程序模式相同的流程處理事件"""
+    from lineaihelper.main import handle_message
+
+    trace_id = context.get("trace_id", "system")
+    request_id = context.get("request_id", "system")
+    line_inbound_id = context.get("line_inbound_id", "N/A")
+    t_token = trace_id_var.set(trace_id)
+    r_token = request_id_var.set(request_id)
+    l_token = line_inbound_id_var.set(line_inbound_id)
+    try:
+        with logger.contextualize(
+            trace_id=trace_id,
+            request_id=request_id,
+            line_inbound_id=line_inbound_id,
+        ):
+            handle_message(
+                event, profile=bool(context.get("profile")), on_finish=on_finish
+            )
+    finally:
+        trace_id_var.reset(t_token)
+        request_id_var.reset(r_token)
+        line_inbound_id_var.reset(l_token)
+
+
+async def consume(stop: Optional[asyncio.Event] = None) -> None:
+    """建立與 Web 程序相同的執行環境 (lifespan)，持續消化持久化佇列"""
+    from lineaihelper.main import app, lifespan
+
+    if settings.DURABLE_QUEUE_VISIBILITY_SECONDS <= settings.JOB_BUDGET_SECONDS:
+        logger.warning(
+            "Visibility timeout should exceed the job budget",
+            extra={
+                "visibility": settings.DURABLE_QUEUE_VISIBILITY_SECONDS,
+                "job_budget": settings.JOB_BUDGET_SECONDS,
+            },
+        )
+
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    queue = DurableQueue(
+        settings.DURABLE_QUEUE_PATH,
+        visibility_timeout=settings.DURABLE_QUEUE_VISIBILITY_SECONDS,
+        max_attempts=settings.DURABLE_QUEUE_MAX_ATTEMPTS,
+    )
+    async with lifespan(app):
+        consumer = QueueConsumer(
+            queue,
+            app.state.job_queue,
+            handle_queued_event,
+            poll_interval=settings.DURABLE_QUEUE_POLL_INTERVAL_SECONDS,
+            purge_after=settings.IDEMPOTENCY_TTL_SECONDS,
+        )
+        # 預熱完成後才開始領取，避免冷啟動的 Worker 以較慢的速度處理工作
+        await app.state.readiness.wait()
+        logger.info("Queue worker started", extra={"path": queue.path})
+        await consumer.run(stop)
+    # lifespan 結束時已消化進行中的工作，最後寫出其 ack
+    await consumer.flush()
+    queue.close()
+    logger.info("Queue worker stopped")
+
+
+def run() -> None:
+    """Worker 角色 (uv run worker)：處理 Ingress 寫入持久化佇列的事件"""
+    # 可同時執行多個 Worker 程序，各自寫入 linenexus_*_worker-{pid}_*.log
+    setup_logging(process_log_name("worker"))
+    asyncio.run(consume())
@@ -1,9 +1,16 @@
+import os
+import tempfile
 from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
 
-from lineaihelper.main import app
+# 預熱與依賴探測改用本機 Stub，測試不連線至 Yahoo / Gemini / LINE
+os.environ.setdefault("READINESS_LOCAL_STUBS", "true")
+# 日誌檔寫入暫存目錄，執行測試不會改動工作目錄下的 logs/
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="linenexus-test-logs-"))
+
+from lineaihelper.main import app  # noqa: E402
 
 
 @pytest.fixture
@@ -1,10 +1,14 @@
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from google.genai import errors
 
+from lineaihelper.context import user_id_var
+from lineaihelper.conversation_memory import ConversationMemory
 from lineaihelper.exceptions import ExternalAPIError, ServiceError
 from lineaihelper.services.chat_service import ChatService
+from lineaihelper.similarity_cache import NearDuplicateCache
 
 
 @pytest.mark.asyncio
@@ -44,3 +48,92 @@ async def test_chat_service_quota_error() -> None:
     with pytest.raises(ExternalAPIError) as excinfo:
         await service.execute("Hi")
     assert "額度已達上限" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_chat_service_remembers_per_user_history() -> None:
+    mock_gemini = MagicMock()
+    mock_response = MagicMock()
+    mock_response.text = "台積電是晶圓代工龍頭"
+    mock_gemini.aio.models.generate_content = AsyncMock(return_value=mock_response)
+    service = ChatService(mock_gemini, memory=ConversationMemory())
+
+    token = user_id_var.set("U123")
+    try:
+        await service.execute("台積電是什麼")
+        await service.execute("那它的股價呢")
+    finally:
+        user_id_var.reset(token)
+
+    prompt = mock_gemini.aio.models.generate_content.call_args.kwargs["contents"]
+    assert "台積電是什麼" in prompt
+    assert "台積電是晶圓代工龍頭" in prompt
+    conv = service.memory.get("U123")
+    assert conv is not None
+    assert len(conv.turns) == 4
+
+
+@pytest.mark.asyncio
+async def test_chat_service_summarizes_old_turns() -> None:
+    mock_gemini = MagicMock()
+    mock_response = MagicMock()
+    mock_response.text = "回覆內容"
+    mock_gemini.aio.models.generate_content = AsyncMock(return_value=mock_response)
+    memory = ConversationMemory(
+        max_tokens_per_user=40, summary_ratio=0.5, keep_recent_turns=2
+    )
+    service = ChatService(mock_gemini, memory=memory)
+
+    token = user_id_var.set("U123")
+    try:
+        for i in range(3):
+            await service.execute(f"問題{i}")
+        await asyncio.gather(*service._summary_tasks)
+    finally:
+        user_id_var.reset(token)
+
+    conv = memory.get("U123")
+    assert conv is not None
+    assert conv.summary == "回覆內容"
+    assert len(conv.turns) <= 2
+
+
+@pytest.mark.asyncio
+async def test_chat_service_serves_near_duplicate_from_cache() -> None:
+    mock_gemini = MagicMock()
+    mock_response = MagicMock()
+    mock_response.text = "短期偏多"
+    mock_gemini.aio.models.generate_content = AsyncMock(return_value=mock_response)
+    service = ChatService(mock_gemini, answer_cache=NearDuplicateCache())
+
+    first = await service.execute("台積電會漲嗎")
+    second = await service.execute("台積電 會不會漲")
+
+    assert first == second == "短期偏多"
+    mock_gemini.aio.models.generate_content.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_chat_service_bypasses_cache_during_conversation() -> None:
+    mock_gemini = MagicMock()
+    mock_response = MagicMock()
+    mock_response.text = "依脈絡的回答"
+    mock_gemini.aio.models.generate_content = AsyncMock(return_value=mock_response)
+    cache = NearDuplicateCache()
+    cache.put("那它的股價呢", "其他使用者的回答")
+    memory = ConversationMemory()
+    memory.append("U123", "user", "台積電是什麼")
+    memory.append("U123", "model", "台積電是晶圓代工龍頭")
+    service = ChatService(mock_gemini, memory=memory, answer_cache=cache)
+
+    token = user_id_var.set("U123")
+    try:
+        reply = await service.execute("那它的股價呢")
+    finally:
+        user_id_var.reset(token)
+
+    assert reply == "依脈絡的回答"
+    mock_gemini.aio.models.generate_content.assert_called_once()
+    conv = memory.get("U123")
+    assert conv is not None
+    assert "其他使用者的回答" not in [turn.text for turn in conv.turns]
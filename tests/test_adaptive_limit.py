@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from lineaihelper.adaptive_limit import CONCURRENCY_REJECTED, AdaptiveLimiter
+from lineaihelper.exceptions import DependencyOverloadedError, ExternalAPIError
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_limit_grows_while_healthy_and_shrinks_on_slow_calls() -> None:
+    clock = Clock()
+    limiter = AdaptiveLimiter(
+        "test-aimd", initial=2, max_limit=4, latency_threshold=1.0, clock=clock
+    )
+
+    async def call() -> None:
+        async with limiter.slot():
+            await asyncio.sleep(0)
+
+    # 僅在上限實際被用到時才放寬
+    for _ in range(10):
+        async with limiter.slot():
+            pass
+    assert limiter.limit == 2
+    for _ in range(10):
+        await asyncio.gather(*(call() for _ in range(limiter.limit)))
+    assert limiter.limit == 4
+
+    async with limiter.slot():
+        clock.now += 2.0
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_failures_decrease_once() -> None:
+    clock = Clock()
+    limiter = AdaptiveLimiter(
+        "test-once",
+        initial=10,
+        is_congestion=lambda e: not isinstance(e, ValueError),
+        clock=clock,
+    )
+    release = asyncio.Event()
+
+    async def call(exc: Exception) -> None:
+        with pytest.raises(type(exc)):
+            async with limiter.slot():
+                await release.wait()
+                raise exc
+
+    tasks = [asyncio.create_task(call(ExternalAPIError("503"))) for _ in range(5)]
+    tasks.append(asyncio.create_task(call(ValueError("not found"))))
+    await asyncio.sleep(0)
+    clock.now = 1.0
+    release.set()
+    await asyncio.gather(*tasks)
+
+    # 同一波壅塞只調降一次；非壅塞錯誤不影響上限
+    assert limiter.limit == 7
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_rejects_fast_when_full_and_hands_off_slots() -> None:
+    limiter = AdaptiveLimiter("test-reject", initial=1, max_wait=0.05)
+    rejected = CONCURRENCY_REJECTED.value("test-reject")
+    holder_entered = asyncio.Event()
+    release = asyncio.Event()
+
+    async def holder() -> None:
+        async with limiter.slot():
+            holder_entered.set()
+            await release.wait()
+
+    task = asyncio.create_task(holder())
+    await holder_entered.wait()
+
+    with pytest.raises(DependencyOverloadedError):
+        async with limiter.slot():
+            pass
+    assert CONCURRENCY_REJECTED.value("test-reject") == rejected + 1
+
+    # 等待中的請求於空位釋出時直接取得
+    async def waiter() -> None:
+        async with limiter.slot():
+            pass
+
+    pending = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    assert not pending.done()
+    release.set()
+    await asyncio.wait_for(pending, 1.0)
+    await task
+    assert limiter.in_flight == 0
@@ -0,0 +1,115 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lineaihelper.exceptions import ExternalAPIError
+from lineaihelper.models.market_data import KLineData, PriceQuote
+from lineaihelper.providers.cached_provider import CachedDataProvider
+from lineaihelper.shared_cache import SharedCache, SQLiteStore
+
+
+@pytest.fixture
+def inner() -> MagicMock:
+    provider = MagicMock()
+    provider.get_quote = AsyncMock(
+        return_value=PriceQuote(symbol="2330.TW", current_price=100.0)
+    )
+    provider.get_history = AsyncMock(
+        return_value=KLineData(symbol="2330.TW", interval="1d", bars=[])
+    )
+    return provider
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_serves_from_cache_until_ttl(inner: MagicMock) -> None:
+    now = [0.0]
+    provider = CachedDataProvider(inner, quote_ttl=10, clock=lambda: now[0])
+
+    await provider.get_quote("2330")
+    await provider.get_quote(" 2330 ")
+    assert inner.get_quote.call_count == 1
+
+    now[0] = 11.0
+    await provider.get_quote("2330")
+    assert inner.get_quote.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_coalesces_concurrent_requests(inner: MagicMock) -> None:
+    async def slow_history(*args: object, **kwargs: object) -> KLineData:
+        await asyncio.sleep(0.01)
+        return KLineData(symbol="2330.TW", interval="1d", bars=[])
+
+    inner.get_history.side_effect = slow_history
+    provider = CachedDataProvider(inner)
+
+    results = await asyncio.gather(
+        *[provider.get_history("2330", interval="1d", period="6mo") for _ in range(5)]
+    )
+
+    assert len(results) == 5
+    assert inner.get_history.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_does_not_cache_errors(inner: MagicMock) -> None:
+    inner.get_quote.side_effect = [
+        RuntimeError("boom"),
+        PriceQuote(symbol="2330.TW", current_price=1.0),
+    ]
+    provider = CachedDataProvider(inner)
+
+    with pytest.raises(RuntimeError):
+        await provider.get_quote("2330")
+    quote = await provider.get_quote("2330")
+    assert quote.current_price == 1.0
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_serves_stale_data_on_upstream_failure(
+    inner: MagicMock,
+) -> None:
+    now = [0.0]
+    provider = CachedDataProvider(
+        inner, quote_ttl=10, stale_ttl=3600, clock=lambda: now[0]
+    )
+    fresh = await provider.get_quote("2330")
+    assert not fresh.delayed
+
+    now[0] = 11.0
+    inner.get_quote.side_effect = ExternalAPIError("Yahoo Finance 查詢失敗")
+    stale = await provider.get_quote("2330")
+    assert stale.delayed
+    assert stale.current_price == fresh.current_price
+
+    # 超過 stale_ttl 後不再回傳舊資料
+    now[0] = 3612.0
+    with pytest.raises(ExternalAPIError):
+        await provider.get_quote("2330")
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_shares_results_across_workers(
+    inner: MagicMock, tmp_path: Path
+) -> None:
+    async def slow_quote(symbol: str) -> PriceQuote:
+        await asyncio.sleep(0.05)
+        return PriceQuote(symbol="2330.TW", current_price=100.0)
+
+    inner.get_quote.side_effect = slow_quote
+    path = str(tmp_path / "shared.db")
+    # 各 Worker 各自開啟同一個 SQLite 檔案
+    workers = [
+        CachedDataProvider(
+            inner, shared=SharedCache(SQLiteStore(path), "provider", poll_interval=0.01)
+        )
+        for _ in range(3)
+    ]
+
+    quotes = await asyncio.gather(*[w.get_quote("2330") for w in workers])
+    await workers[0].get_quote("2330")
+
+    assert [q.current_price for q in quotes] == [100.0] * 3
+    assert inner.get_quote.call_count == 1
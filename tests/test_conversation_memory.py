@@ -0,0 +1,62 @@
+from lineaihelper.conversation_memory import ConversationMemory, estimate_tokens
+
+
+def test_estimate_tokens() -> None:
+    assert estimate_tokens("台積電") == 3
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("") == 0
+
+
+def test_per_user_budget_drops_oldest_turns() -> None:
+    memory = ConversationMemory(max_tokens_per_user=10)
+    for i in range(5):
+        memory.append("u1", "user", f"問題{i}")  # 每回合 3 tokens
+
+    conv = memory.get("u1")
+    assert conv is not None
+    assert conv.tokens <= 10
+    assert conv.turns[-1].text == "問題4"
+    assert memory.total_tokens == conv.tokens
+
+
+def test_lru_eviction_across_users() -> None:
+    memory = ConversationMemory(max_users=2)
+    memory.append("u1", "user", "a")
+    memory.append("u2", "user", "b")
+    memory.get("u1")  # u1 變為最近使用
+    memory.append("u3", "user", "c")
+
+    assert memory.get("u2") is None
+    assert memory.get("u1") is not None
+    assert memory.get("u3") is not None
+
+
+def test_total_token_cap_evicts_lru_users() -> None:
+    memory = ConversationMemory(max_tokens_per_user=100, max_total_tokens=10)
+    memory.append("u1", "user", "一二三四五六")
+    memory.append("u2", "user", "一二三四五六")
+
+    assert memory.get("u1") is None
+    assert memory.total_tokens == 6
+
+
+def test_compact_replaces_old_turns_with_summary() -> None:
+    memory = ConversationMemory(
+        max_tokens_per_user=20, summary_ratio=0.5, keep_recent_turns=2
+    )
+    for i in range(4):
+        memory.append("u1", "user", f"第{i}回合")
+
+    assert memory.needs_summary("u1")
+    old = memory.turns_to_summarize("u1")
+    assert [t.text for t in old] == ["第0回合", "第1回合"]
+
+    # 摘要期間新增的回合不應被移除
+    memory.append("u1", "user", "新回合")
+    memory.compact("u1", "摘要", upto_seq=old[-1].seq)
+
+    conv = memory.get("u1")
+    assert conv is not None
+    assert conv.summary == "摘要"
+    assert [t.text for t in conv.turns] == ["第2回合", "第3回合", "新回合"]
+    assert memory.total_tokens == conv.tokens
@@ -0,0 +1,105 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from lineaihelper.delivery import DeliveryBudget, deliver_with_deadline
+
+
+class FakeClock:
+    """以事件迴圈時間為基準的時鐘，事件時間設為 0"""
+
+    def __init__(self) -> None:
+        self.start = asyncio.get_running_loop().time()
+
+    def __call__(self) -> float:
+        return asyncio.get_running_loop().time() - self.start
+
+
+@pytest.mark.asyncio
+async def test_fast_result_is_replied() -> None:
+    replies: List[str] = []
+    pushes: List[str] = []
+
+    async def work() -> List[str]:
+        return ["result"]
+
+    async def reply(texts: List[str]) -> None:
+        replies.extend(texts)
+
+    async def push(texts: List[str]) -> None:
+        pushes.extend(texts)
+
+    mode = await deliver_with_deadline(
+        work, DeliveryBudget(event_time=0), reply, push, "ack", clock=FakeClock()
+    )
+    assert mode == "reply"
+    assert replies == ["result"]
+    assert pushes == []
+
+
+@pytest.mark.asyncio
+async def test_slow_result_acks_then_pushes() -> None:
+    replies: List[str] = []
+    pushes: List[str] = []
+
+    async def work() -> List[str]:
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    async def reply(texts: List[str]) -> None:
+        replies.extend(texts)
+
+    async def push(texts: List[str]) -> None:
+        pushes.extend(texts)
+
+    budget = DeliveryBudget(event_time=0, reply_ttl=1, ack_after=0.01, job_budget=1)
+    mode = await deliver_with_deadline(
+        work, budget, reply, push, "ack", clock=FakeClock()
+    )
+    assert mode == "push"
+    assert replies == ["ack"]
+    assert pushes == ["result"]
+
+
+@pytest.mark.asyncio
+async def test_undeliverable_result_cancels_work() -> None:
+    cancelled = asyncio.Event()
+    replies: List[str] = []
+
+    async def work() -> List[str]:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return ["never"]
+
+    async def reply(texts: List[str]) -> None:
+        replies.extend(texts)
+
+    budget = DeliveryBudget(event_time=0, reply_ttl=0.02, ack_after=0.01)
+    mode = await deliver_with_deadline(
+        work, budget, reply, None, "ack", clock=FakeClock()
+    )
+    assert mode == "expired"
+    assert cancelled.is_set()
+    assert replies == []
+
+
+@pytest.mark.asyncio
+async def test_expired_event_is_skipped() -> None:
+    called = False
+
+    async def work() -> List[str]:
+        nonlocal called
+        called = True
+        return ["result"]
+
+    async def reply(texts: List[str]) -> None:
+        pass
+
+    budget = DeliveryBudget(event_time=-100, reply_ttl=50, job_budget=60)
+    mode = await deliver_with_deadline(work, budget, reply, reply, "ack")
+    assert mode == "expired"
+    assert not called
@@ -1,10 +1,21 @@
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+from pathlib import Path
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from lineaihelper.dispatcher import CommandDispatcher
 from lineaihelper.exceptions import ServiceError
+from lineaihelper.metrics import REQUESTS, RESULT_CACHE
+from lineaihelper.services import (
+    CommandSpec,
+    PriceService,
+    ServiceDeps,
+    StockService,
+)
 from lineaihelper.services.base_service import BaseService
+from lineaihelper.shared_cache import SQLiteStore
 
 
 @pytest.mark.asyncio
@@ -54,3 +65,245 @@ async def test_dispatch_routing_success() -> None:
 
     response = await dispatcher.parse_and_execute(".stock 2330")
     assert response == "Success"
+
+
+def _spec(name: str, service: BaseService, **kwargs: Any) -> CommandSpec:
+    return CommandSpec(name=name, factory=lambda deps: service, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_resolves_aliases_and_full_width() -> None:
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.return_value = "Success"
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".stock": _spec(".stock", mock_service, aliases=(".s",))}
+    )
+
+    assert await dispatcher.parse_and_execute(".s 2330") == "Success"
+    assert await dispatcher.parse_and_execute("．ｓｔｏｃｋ 2330") == "Success"
+    mock_service.execute.assert_called_with("2330")
+
+
+def test_services_are_constructed_lazily_with_shared_deps() -> None:
+    dispatcher = CommandDispatcher(MagicMock())
+    assert dispatcher.services == {}
+
+    stock = dispatcher.get_service(".stock")
+    price = dispatcher.get_service(".price")
+
+    assert isinstance(stock, StockService)
+    assert isinstance(price, PriceService)
+    assert stock.provider is price.provider
+    assert dispatcher.get_service(".stock") is stock
+
+
+@pytest.mark.asyncio
+async def test_dispatch_enforces_timeout() -> None:
+    async def slow(args: str) -> str:
+        await asyncio.sleep(1)
+        return "late"
+
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.side_effect = slow
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".slow": _spec(".slow", mock_service, timeout=0.01)}
+    )
+
+    response = await dispatcher.parse_and_execute(".slow")
+    assert "逾時" in response
+
+
+@pytest.mark.asyncio
+async def test_dispatch_enforces_concurrency_limit() -> None:
+    release = asyncio.Event()
+
+    async def blocking(args: str) -> str:
+        await release.wait()
+        return "done"
+
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.side_effect = blocking
+    dispatcher = CommandDispatcher(
+        MagicMock(),
+        registry={".slow": _spec(".slow", mock_service, max_concurrency=1)},
+    )
+
+    first = asyncio.create_task(dispatcher.parse_and_execute(".slow"))
+    await asyncio.sleep(0)
+    rejected = await dispatcher.parse_and_execute(".slow")
+    release.set()
+
+    assert "請求過多" in rejected
+    assert await first == "done"
+
+
+@pytest.mark.asyncio
+async def test_execute_message_runs_commands_concurrently() -> None:
+    running = 0
+    peak = 0
+
+    async def echo(args: str) -> str:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return f"price {args}"
+
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.side_effect = echo
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".price": _spec(".price", mock_service)}
+    )
+
+    results = await dispatcher.execute_message(".price 2330\n.price 2317\n.unknown")
+
+    assert results[:2] == ["price 2330", "price 2317"]
+    assert "Unknown command" in results[2]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_message_keeps_multiline_args_together() -> None:
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.return_value = "ok"
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".chat": _spec(".chat", mock_service)}
+    )
+
+    results = await dispatcher.execute_message(".chat 第一行\n第二行")
+
+    assert results == ["ok"]
+    mock_service.execute.assert_called_once_with("第一行\n第二行")
+
+
+@pytest.mark.asyncio
+async def test_execute_message_caps_bubbles_and_budget() -> None:
+    async def slow(args: str) -> str:
+        if args == "slow":
+            await asyncio.sleep(1)
+        return args
+
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.side_effect = slow
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".p": _spec(".p", mock_service)}
+    )
+
+    text = "\n".join([".p slow"] + [f".p {i}" for i in range(6)])
+    with patch("lineaihelper.dispatcher.settings.MULTI_COMMAND_BUDGET_SECONDS", 0.05):
+        results = await dispatcher.execute_message(text)
+
+    assert len(results) == 5
+    assert "逾時" in results[0]
+    assert results[1] == "0"
+    assert "已略過 2 個" in results[-1]
+
+
+@pytest.mark.asyncio
+async def test_result_cache_hits_skip_service() -> None:
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.return_value = "2330 報價"
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".price": _spec(".price", mock_service, cache_ttl=5.0)}
+    )
+    hits = RESULT_CACHE.value(".price", "hit")
+    misses = RESULT_CACHE.value(".price", "miss")
+
+    assert await dispatcher.parse_and_execute(".price 2330") == "2330 報價"
+    assert await dispatcher.parse_and_execute(".price   ２３３０") == "2330 報價"
+
+    mock_service.execute.assert_awaited_once()
+    assert RESULT_CACHE.value(".price", "hit") == hits + 1
+    assert RESULT_CACHE.value(".price", "miss") == misses + 1
+
+
+@pytest.mark.asyncio
+async def test_result_cache_coalesces_concurrent_requests() -> None:
+    calls = 0
+
+    async def slow(args: str) -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.side_effect = slow
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".price": _spec(".price", mock_service, cache_ttl=5.0)}
+    )
+    coalesced = RESULT_CACHE.value(".price", "coalesced")
+
+    results = await asyncio.gather(
+        *(dispatcher.parse_and_execute(".price 2330") for _ in range(3))
+    )
+
+    assert results == ["done"] * 3
+    assert calls == 1
+    assert RESULT_CACHE.value(".price", "coalesced") == coalesced + 2
+
+
+@pytest.mark.asyncio
+async def test_result_cache_skips_errors_and_uncached_commands() -> None:
+    failing = AsyncMock(spec=BaseService)
+    failing.execute.side_effect = ServiceError("查無此股票")
+    chat = AsyncMock(spec=BaseService)
+    chat.execute.return_value = "hi"
+    dispatcher = CommandDispatcher(
+        MagicMock(),
+        registry={
+            ".price": _spec(".price", failing, cache_ttl=5.0),
+            ".chat": _spec(".chat", chat),
+        },
+    )
+
+    for _ in range(2):
+        assert await dispatcher.parse_and_execute(".price XXXX") == "查無此股票"
+        assert await dispatcher.parse_and_execute(".chat hello") == "hi"
+
+    assert failing.execute.await_count == 2
+    assert chat.execute.await_count == 2
+    assert len(dispatcher.result_cache) == 0
+    assert REQUESTS.value("command", ".price", "error") >= 2
+
+
+@pytest.mark.asyncio
+async def test_plain_text_is_routed_to_command() -> None:
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.return_value = "2330 報價"
+    dispatcher = CommandDispatcher(
+        MagicMock(), registry={".price": _spec(".price", mock_service)}
+    )
+
+    assert dispatcher.route("2330 多少") == ".price 2330"
+    assert await dispatcher.execute_message(dispatcher.route("2330 多少")) == [
+        "2330 報價"
+    ]
+    mock_service.execute.assert_awaited_once_with("2330")
+    assert dispatcher.split_commands(dispatcher.route("台積電股價")) == [".price 2330"]
+    assert await dispatcher.parse_and_execute(dispatcher.route("hello")) == (
+        "LineNexus (Async) received: hello"
+    )
+
+
+@pytest.mark.asyncio
+async def test_result_cache_is_shared_across_workers(tmp_path: Path) -> None:
+    mock_service = AsyncMock(spec=BaseService)
+    mock_service.execute.return_value = "help text"
+    path = str(tmp_path / "shared.db")
+    workers = [
+        CommandDispatcher(
+            MagicMock(),
+            registry={".help": _spec(".help", mock_service, cache_ttl=60.0)},
+            deps=ServiceDeps(MagicMock(), shared_store=SQLiteStore(path)),
+        )
+        for _ in range(2)
+    ]
+    shared_hits = RESULT_CACHE.value(".help", "shared_hit")
+
+    assert await workers[0].parse_and_execute(".help") == "help text"
+    assert await workers[1].parse_and_execute(".help") == "help text"
+
+    mock_service.execute.assert_awaited_once()
+    assert RESULT_CACHE.value(".help", "shared_hit") == shared_hits + 1
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from lineaihelper.durable_queue import DurableQueue
+
+
+def test_enqueue_deduplicates_by_key(tmp_path: Path) -> None:
+    queue = DurableQueue(str(tmp_path / "jobs.db"))
+
+    assert queue.enqueue([("event-1", b"a"), ("event-2", b"b")]) == 2
+    # LINE 重送同一事件
+    assert queue.enqueue([("event-1", b"a"), ("", b"c"), ("", b"d")]) == 2
+    assert queue.pending() == 4
+
+
+def test_unacked_job_is_redelivered_after_visibility_timeout(tmp_path: Path) -> None:
+    now = [1000.0]
+    path = str(tmp_path / "jobs.db")
+    first = DurableQueue(path, visibility_timeout=30, clock=lambda: now[0])
+    second = DurableQueue(path, visibility_timeout=30, clock=lambda: now[0])
+    first.enqueue([("event-1", b"a"), ("event-2", b"b")])
+
+    leases = first.claim(limit=1)
+    assert [lease.payload for lease in leases] == [b"a"]
+    # 已被領取的工作在逾時前對其他 Worker 不可見
+    assert [lease.payload for lease in second.claim(limit=5)] == [b"b"]
+    assert second.claim(limit=5) == []
+
+    now[0] += 31
+    redelivered = second.claim(limit=5)
+    assert [(lease.payload, lease.attempts) for lease in redelivered] == [
+        (b"a", 2),
+        (b"b", 2),
+    ]
+    # 原租約已失效，遲來的 ack 不會覆蓋新的領取
+    assert first.ack(leases[0]) is False
+    assert all(second.ack(lease) for lease in redelivered)
+    assert second.pending() == 0
+
+
+def test_nack_and_dead_letter(tmp_path: Path) -> None:
+    now = [1000.0]
+    queue = DurableQueue(
+        str(tmp_path / "jobs.db"), max_attempts=2, clock=lambda: now[0]
+    )
+    queue.enqueue([("event-1", b"a")])
+
+    lease = queue.claim()[0]
+    assert queue.nack(lease, delay=5) is True
+    assert queue.claim() == []
+    now[0] += 5
+    lease = queue.claim()[0]
+    assert lease.attempts == 2
+    queue.nack(lease)
+
+    # 已達上限，不再投遞
+    assert queue.claim() == []
+    assert queue.pending() == 0
+
+
+def test_purge_keeps_recent_jobs_for_deduplication(tmp_path: Path) -> None:
+    now = [1000.0]
+    queue = DurableQueue(str(tmp_path / "jobs.db"), clock=lambda: now[0])
+    queue.enqueue([("event-1", b"a")])
+    queue.ack(queue.claim()[0])
+
+    assert queue.purge(older_than=600) == 0
+    assert queue.enqueue([("event-1", b"a")]) == 0
+
+    now[0] += 601
+    assert queue.purge(older_than=600) == 1
+    assert queue.enqueue([("event-1", b"a")]) == 1
@@ -0,0 +1,58 @@
+import pytest
+
+from lineaihelper.idempotency import IdempotencyStore
+
+
+class FakeBackend:
+    def __init__(self) -> None:
+        self.keys: set[str] = set()
+
+    async def set_if_absent(self, key: str, ttl: float) -> bool:
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+
+@pytest.mark.asyncio
+async def test_claim_rejects_duplicates_until_expiry() -> None:
+    now = [0.0]
+    store = IdempotencyStore(ttl_seconds=10, clock=lambda: now[0])
+
+    assert await store.claim("evt-1")
+    assert not await store.claim("evt-1")
+
+    now[0] = 11.0
+    assert await store.claim("evt-1")
+
+
+@pytest.mark.asyncio
+async def test_claim_is_bounded() -> None:
+    store = IdempotencyStore(max_entries=2)
+    for key in ("a", "b", "c"):
+        assert await store.claim(key)
+    assert len(store) == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_backend_dedupes_across_stores() -> None:
+    backend = FakeBackend()
+    worker_a = IdempotencyStore(backend=backend)
+    worker_b = IdempotencyStore(backend=backend)
+
+    assert await worker_a.claim("evt-1")
+    assert not await worker_b.claim("evt-1")
+
+
+@pytest.mark.asyncio
+async def test_in_flight_job_wakes_attached_waiters() -> None:
+    store = IdempotencyStore()
+    job = store.start("evt-1")
+    assert store.in_flight("evt-1") is job
+
+    store.finish("evt-1", ["result"], delivered=False)
+
+    assert job.finished.is_set()
+    assert job.result == ["result"]
+    assert not job.delivered
+    assert store.in_flight("evt-1") is None
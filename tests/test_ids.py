@@ -0,0 +1,32 @@
+import uuid
+
+from lineaihelper.ids import SortableIdGenerator
+
+
+def test_ids_are_valid_uuid7_and_sortable() -> None:
+    now = [1_700_000_000_000 * 1_000_000]
+    generate = SortableIdGenerator(clock=lambda: now[0])
+
+    ids = []
+    for _ in range(3):
+        ids.append(generate())
+        ids.append(generate())
+        now[0] += 1_000_000
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    parsed = uuid.UUID(ids[0])
+    assert parsed.version == 7
+    assert parsed.variant == uuid.RFC_4122
+    assert int(parsed.hex[:12], 16) == 1_700_000_000_000
+
+
+def test_ids_stay_monotonic_when_clock_goes_backwards() -> None:
+    now = [2_000_000_000_000 * 1_000_000]
+    generate = SortableIdGenerator(clock=lambda: now[0])
+
+    first = generate()
+    now[0] -= 5_000_000
+    second = generate()
+
+    assert second > first
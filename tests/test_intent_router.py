@@ -0,0 +1,60 @@
+import pytest
+
+from lineaihelper.intent_router import AhoCorasick, Intent, IntentRouter
+
+
+def test_automaton_finds_overlapping_patterns() -> None:
+    automaton: AhoCorasick[str] = AhoCorasick()
+    for pattern in ("he", "she", "his", "hers"):
+        automaton.add(pattern, pattern.upper())
+
+    matches = sorted(automaton.iter_matches("ushers"))
+
+    assert matches == [(1, "she", "SHE"), (2, "he", "HE"), (2, "hers", "HERS")]
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("2330 多少", Intent(".price", "2330")),
+        ("2330", Intent(".price", "2330")),
+        ("0050", Intent(".price", "0050")),
+        # 股票用語本身不算額外內容
+        ("股票 2330", Intent(".price", "2330")),
+        ("代碼 2330", Intent(".price", "2330")),
+        ("2330 etf", Intent(".price", "2330")),
+        # 未收錄的代碼需有股票用語
+        ("6488 股價", Intent(".price", "6488")),
+        ("股票 6488", Intent(".price", "6488")),
+        ("分析個股 6488", Intent(".stock", "6488")),
+        ("台積電股價", Intent(".price", "2330")),
+        ("台積電", Intent(".price", "2330")),
+        ("ＴＳＬＡ？", Intent(".price", "TSLA")),
+        ("幫我分析一下鴻海", Intent(".stock", "2317")),
+        ("輝達最近走勢如何", Intent(".stock", "NVDA trend")),
+        ("apple price", Intent(".price", "AAPL")),
+    ],
+)
+def test_routes_plain_text_to_commands(text: str, expected: Intent) -> None:
+    assert IntentRouter().route(text) == expected
+
+
+def test_unsure_messages_fall_back() -> None:
+    router = IntentRouter()
+
+    assert router.route("今天天氣真好") is None
+    # 英文名稱需在單字邊界上
+    assert router.route("I like pineapple") is None
+    # 提到標的但沒有意圖時不猜測
+    assert router.route("我同事在台積電上班") is None
+    assert router.route(".price 2330") is None
+    # 未收錄的數字需有股票相關用語，避免電話、房號或驗證碼被當成代碼
+    assert router.route("1234") is None
+    assert router.route("我住 1205 號房") is None
+    # 一般金額搭配報價用語不是股票代碼
+    assert router.route("今天吃了多少 1000 元") is None
+    assert router.route("價格 3000 元的手機推薦") is None
+    assert router.route("分析 6488") is None
+
+    chat_router = IntentRouter(fallback="chat")
+    assert chat_router.route("今天天氣真好") == Intent(".chat", "今天天氣真好")
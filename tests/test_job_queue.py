@@ -0,0 +1,124 @@
+import asyncio
+from contextvars import ContextVar
+
+import pytest
+
+from lineaihelper.job_queue import Job, JobQueue
+
+
+@pytest.mark.asyncio
+async def test_job_queue_runs_jobs_and_drains() -> None:
+    queue = JobQueue(workers=2, max_size=10)
+    queue.start()
+    done: list[int] = []
+
+    def make_job(i: int) -> Job:
+        async def job() -> None:
+            await asyncio.sleep(0.01)
+            done.append(i)
+
+        return job
+
+    for i in range(5):
+        assert queue.submit(make_job(i))
+
+    await queue.stop(drain_timeout=1.0)
+    assert sorted(done) == [0, 1, 2, 3, 4]
+    assert queue.in_flight == 0
+    # 關閉後不再收件
+    assert not queue.submit(make_job(99))
+
+
+@pytest.mark.asyncio
+async def test_job_queue_sheds_load_when_full() -> None:
+    queue = JobQueue(workers=1, max_size=1)
+    queue.start()
+    release = asyncio.Event()
+
+    async def blocking_job() -> None:
+        await release.wait()
+
+    assert queue.submit(blocking_job)
+    await asyncio.sleep(0)  # 讓 Worker 取走第一個工作
+    assert queue.in_flight == 1
+    assert queue.submit(blocking_job)
+    assert queue.queue_size == 1
+    assert not queue.submit(blocking_job)
+
+    release.set()
+    await queue.stop(drain_timeout=1.0)
+
+
+@pytest.mark.asyncio
+async def test_job_queue_drain_timeout_cancels_jobs() -> None:
+    queue = JobQueue(workers=1, max_size=1)
+    queue.start()
+    cancelled = asyncio.Event()
+
+    async def slow_job() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    queue.submit(slow_job)
+    await asyncio.sleep(0)
+    await queue.stop(drain_timeout=0.01)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_job_queue_isolates_context() -> None:
+    var: ContextVar[str] = ContextVar("var", default="")
+    queue = JobQueue(workers=1, max_size=10)
+    queue.start()
+    seen: list[str] = []
+
+    async def job() -> None:
+        seen.append(var.get())
+        var.set("leaked")
+
+    var.set("first")
+    queue.submit(job)
+    var.set("second")
+    queue.submit(job)
+
+    await queue.stop(drain_timeout=1.0)
+    assert seen == ["first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_job_queue_round_robin_across_sources() -> None:
+    queue = JobQueue(workers=1, max_size=10)
+    queue.start()
+    order: list[str] = []
+
+    def make_job(label: str) -> Job:
+        async def job() -> None:
+            order.append(label)
+
+        return job
+
+    # 群組 G1 先洗版，使用者 U1 之後才送出
+    for i in range(3):
+        queue.submit(make_job(f"G1-{i}"), source="G1")
+    queue.submit(make_job("U1-0"), source="U1")
+
+    await queue.stop(drain_timeout=1.0)
+    assert order == ["G1-0", "U1-0", "G1-1", "G1-2"]
+
+
+@pytest.mark.asyncio
+async def test_job_queue_per_source_cap() -> None:
+    queue = JobQueue(workers=1, max_size=10, max_per_source=2)
+    queue.start()
+
+    async def job() -> None:
+        pass
+
+    assert queue.submit(job, source="G1")
+    assert queue.submit(job, source="G1")
+    assert not queue.submit(job, source="G1")
+    assert queue.submit(job, source="G2")
+    await queue.stop(drain_timeout=1.0)
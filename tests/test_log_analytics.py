@@ -0,0 +1,185 @@
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import orjson
+import pytest
+
+from lineaihelper.log_analytics import (
+    LatencyHistogram,
+    LatencyStats,
+    ParquetRowWriter,
+    format_table,
+    iter_log_files,
+    iter_requests,
+    parse_line,
+)
+
+T0 = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc).timestamp()
+
+
+def line(
+    ts: float, message: str, trace_id: str, level: str = "INFO", **fields: Any
+) -> bytes:
+    record: Dict[str, Any] = {
+        "timestamp": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+        "level": level,
+        "message": message,
+        "extra": {"trace_id": trace_id, "request_id": "r", "extra": fields},
+    }
+    return orjson.dumps(record) + b"\n"
+
+
+def request_lines(trace_id: str, start: float, text: str, command: str) -> List[bytes]:
+    return [
+        line(start, "開始處理請求", trace_id, method="POST", path="/callback"),
+        line(start + 0.01, "收到使用者訊息", trace_id, user_text=text),
+        line(start + 0.02, "Dispatching command", trace_id, command=command),
+        line(start + 0.52, "訊息回覆成功", trace_id, user_text=text),
+    ]
+
+
+def test_parse_line_supports_loguru_serialized_format() -> None:
+    legacy = orjson.dumps(
+        {
+            "text": "...",
+            "record": {
+                "time": {"timestamp": T0},
+                "level": {"name": "INFO"},
+                "message": "Dispatching command",
+                "extra": {"trace_id": "t1", "extra": {"command": ".price"}},
+            },
+        }
+    )
+
+    event = parse_line(legacy)
+
+    assert event is not None
+    assert event.ts == T0
+    assert event.trace_id == "t1"
+    assert event.fields == {"command": ".price"}
+    assert parse_line(b"not json\n") is None
+
+
+def test_iter_requests_joins_rotated_and_active_files(tmp_path: Path) -> None:
+    rotated = tmp_path / "linenexus_info_2026-03-02.2026-03-02_10-00-00_000000.log"
+    rotated.write_bytes(
+        b"".join(request_lines("t1", T0, ".stock 2330 trend", ".stock"))
+    )
+    with zipfile.ZipFile(f"{rotated}.zip", "w") as zf:
+        zf.write(rotated, arcname=rotated.name)
+    rotated.unlink()
+
+    active = tmp_path / "linenexus_info_2026-03-02.log"
+    active.write_bytes(
+        line(T0 + 3600, "system started", "system")
+        + b"".join(request_lines("t2", T0 + 3600, ".price aapl", ".price"))
+    )
+
+    files = iter_log_files([str(tmp_path)])
+    rows = list(iter_requests(files))
+
+    assert [f.name for f in files] == [f"{rotated.name}.zip", active.name]
+    assert [(r.trace_id, r.command, r.symbol, r.status) for r in rows] == [
+        ("t1", ".stock", "2330", "ok"),
+        ("t2", ".price", "AAPL", "ok"),
+    ]
+    assert rows[0].hour == "2026-03-02 09:00"
+    assert rows[0].queue_ms == pytest.approx(10, abs=0.01)
+    assert rows[0].total_ms == pytest.approx(520, abs=0.01)
+
+
+def test_ack_reply_waits_for_push_and_errors_are_kept(tmp_path: Path) -> None:
+    log = tmp_path / "linenexus_info_2026-03-02.log"
+    log.write_bytes(
+        b"".join(
+            [
+                line(T0, "收到使用者訊息", "t1", user_text=".stock 2330"),
+                line(T0 + 0.1, "Dispatching command", "t1", command=".stock"),
+                line(T0 + 1, "訊息回覆成功", "t1"),
+                line(
+                    T0 + 1,
+                    "Reply budget at risk, acknowledged and switched to push",
+                    "t1",
+                ),
+                line(T0 + 2, "Dispatching command", "t2", command=".chat"),
+                line(T0 + 2.5, "Command timed out", "t2", command=".chat"),
+                line(T0 + 2.6, "訊息回覆成功", "t2"),
+                line(T0 + 9, "訊息推播成功", "t1"),
+                line(T0 + 20, "Dispatching command", "t3", command=".help"),
+            ]
+        )
+    )
+
+    rows = {r.trace_id: r for r in iter_requests([log], grace=5.0)}
+
+    assert rows["t1"].delivery == "push"
+    assert rows["t1"].total_ms == pytest.approx(9000, abs=0.01)
+    assert rows["t2"].status == "timeout"
+    assert rows["t3"].status == "incomplete"
+    assert rows["t3"].total_ms is None
+
+
+def test_error_file_lines_are_merged_by_time(tmp_path: Path) -> None:
+    info = tmp_path / "linenexus_info_w1_2026-03-02.log"
+    info.write_bytes(
+        b"".join(
+            [
+                line(T0, "收到使用者訊息", "t1", user_text=".stock 2330"),
+                line(T0 + 0.1, "Dispatching command", "t1", command=".stock"),
+                line(T0 + 1, "訊息回覆成功", "t1"),
+                line(T0 + 2, "Dispatching command", "t2", command=".price"),
+                line(T0 + 2.5, "訊息回覆成功", "t2"),
+            ]
+        )
+    )
+    # ERROR 紀錄只會寫入錯誤日誌檔
+    error = tmp_path / "linenexus_error_w1_2026-03-02.log"
+    error.write_bytes(
+        line(T0 + 0.5, "Unexpected error in command", "t1", level="ERROR")
+    )
+
+    files = iter_log_files([str(tmp_path)])
+    rows = {r.trace_id: r for r in iter_requests(files)}
+
+    assert {f.name for f in files} == {info.name, error.name}
+    assert rows["t1"].status == "error"
+    assert rows["t1"].total_ms == pytest.approx(1000, abs=0.01)
+    assert rows["t2"].status == "ok"
+
+
+def test_latency_histogram_percentiles_are_approximate() -> None:
+    histogram = LatencyHistogram()
+    for value in range(1, 1001):
+        histogram.add(float(value))
+
+    assert histogram.count == 1000
+    assert histogram.percentile(0.5) == pytest.approx(500, rel=0.1)
+    assert histogram.percentile(0.99) == pytest.approx(990, rel=0.1)
+    assert histogram.percentile(1.0) == 1000
+
+
+def test_report_tables_and_parquet_output(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    log = tmp_path / "linenexus_info_2026-03-02.log"
+    log.write_bytes(
+        b"".join(
+            b"".join(request_lines(f"t{i}", T0 + i, ".price 2330", ".price"))
+            for i in range(5)
+        )
+    )
+    output = tmp_path / "requests.parquet"
+
+    stats = LatencyStats()
+    writer = ParquetRowWriter(str(output), batch_size=2)
+    for row in iter_requests([log]):
+        stats.add(row)
+        writer.write(row)
+    writer.close()
+
+    table = pq.read_table(output)
+    assert table.num_rows == 5
+    assert set(table.column("command").to_pylist()) == {".price"}
+    assert stats.statuses == {"ok": 5}
+    assert ".price" in format_table("command", stats.by_command)
@@ -0,0 +1,117 @@
+import io
+import os
+import zipfile
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import MagicMock
+
+from lineaihelper.log_pipeline import (
+    LOG_DROPPED,
+    Destination,
+    LogPipeline,
+    RotatingFileWriter,
+    Sampler,
+    StreamWriter,
+)
+
+
+def _message(text: str, level_no: int = 20, trace_id: str = "system") -> Any:
+    level = MagicMock()
+    level.no = level_no
+    message = MagicMock()
+    message.record = {"message": text, "level": level, "extra": {"trace_id": trace_id}}
+    return message
+
+
+def test_pipeline_serializes_once_and_drops_oldest() -> None:
+    calls: List[str] = []
+
+    def serializer(record: Any) -> bytes:
+        calls.append(record["message"])
+        return f"{record['message']}\n".encode()
+
+    info, errors = io.BytesIO(), io.BytesIO()
+    pipeline = LogPipeline(
+        [
+            Destination(StreamWriter(info), min_level=20, max_level=40),
+            Destination(StreamWriter(errors), min_level=40),
+            Destination(StreamWriter(io.BytesIO()), min_level=20),
+        ],
+        serializer=serializer,
+        max_queue=2,
+    )
+    dropped_before = LOG_DROPPED.value()
+
+    pipeline.sink(_message("a"))
+    pipeline.sink(_message("b"))
+    pipeline.sink(_message("c", level_no=40))
+
+    assert pipeline.dropped == 1
+    assert LOG_DROPPED.value() == dropped_before + 1
+    assert pipeline.drain() == 2
+    assert calls == ["a", "b", "c"]
+    assert info.getvalue() == b"b\n"
+    assert errors.getvalue() == b"c\n"
+
+
+def test_sampler_keeps_warnings_and_whole_traces() -> None:
+    sampler = Sampler(default_rate=0.0, rates={"收到使用者訊息": 1.0})
+
+    assert not sampler(_message("Rendering prompt").record)
+    assert sampler(_message("收到使用者訊息").record)
+    assert sampler(_message("Command timed out", level_no=30).record)
+
+    half = Sampler(default_rate=0.5)
+    for trace_id in ("t1", "t2", "t3"):
+        decisions = {half(_message(m, trace_id=trace_id).record) for m in "xyz"}
+        assert len(decisions) == 1
+
+
+def test_rotating_writer_rotates_compresses_and_purges(tmp_path: Path) -> None:
+    now = [1_700_000_000.0]
+    writer = RotatingFileWriter(
+        str(tmp_path), "app", max_bytes=10, retention_days=1, clock=lambda: now[0]
+    )
+
+    writer.write(b"12345678\n")
+    writer.write(b"abcdefgh\n")
+    writer.flush()
+
+    rotated = list(tmp_path.glob("app_*.log.zip"))
+    assert len(rotated) == 1
+    with zipfile.ZipFile(rotated[0]) as zf:
+        assert zf.read(zf.namelist()[0]) == b"12345678\n"
+    assert writer.path.read_bytes() == b"abcdefgh\n"
+
+    # 超過保留期限的輪替檔於下次輪替時清除
+    os.utime(rotated[0], (now[0], now[0]))
+    now[0] += 3 * 86400
+    writer.write(b"next-day\n")
+    writer.close()
+    assert not rotated[0].exists()
+
+
+def test_rotating_writer_purges_files_of_other_processes(tmp_path: Path) -> None:
+    now = [1_700_000_000.0]
+    stale = tmp_path / "app_worker-42_2023-11-01.log"
+    other = tmp_path / "app_worker-43_2023-11-14.log"
+    stale.write_bytes(b"old\n")
+    other.write_bytes(b"recent\n")
+    os.utime(stale, (now[0] - 3 * 86400, now[0] - 3 * 86400))
+    os.utime(other, (now[0], now[0]))
+
+    writer = RotatingFileWriter(
+        str(tmp_path),
+        "app_worker-44",
+        max_bytes=10,
+        retention_days=1,
+        clock=lambda: now[0],
+        family="app",
+    )
+    writer.write(b"12345678\n")
+    writer.write(b"abcdefgh\n")
+    writer.close()
+
+    # 已結束程序留下的過期檔案一併清除，其他程序近期寫入的檔案保留
+    assert not stale.exists()
+    assert other.exists()
@@ -1,11 +1,17 @@
 import json
+import os
 from typing import Any, cast
 from unittest.mock import MagicMock, patch
 
 import pytest
 from loguru import logger
 
-from lineaihelper.logging_config import serialize, setup_logging
+from lineaihelper.logging_config import (
+    process_log_name,
+    serialize,
+    setup_logging,
+    shutdown_logging,
+)
 
 
 def test_serialize_output() -> None:
@@ -33,21 +39,44 @@ def test_serialize_output() -> None:
     assert "timestamp" in data
 
 
+def test_serialize_exception_traceback() -> None:
+    """含例外的紀錄應輸出可讀的 traceback 文字而非拋出序列化錯誤"""
+    records: list = []
+    sink_id = logger.add(lambda msg: records.append(msg.record))
+    try:
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        logger.remove(sink_id)
+
+    data = json.loads(serialize(records[0]))
+
+    assert data["exception"]["type"] == "ValueError"
+    assert "raise ValueError" in data["exception"]["traceback"]
+
+
+def test_process_log_name_is_unique_per_process() -> None:
+    assert process_log_name("ingress", 0) == "ingress0"
+    assert process_log_name("worker") == f"worker-{os.getpid()}"
+
+
 def test_setup_logging_json_mode() -> None:
     """測試在 LOG_JSON=True 時初始化日誌系統是否不噴錯"""
-    with patch("lineaihelper.logging_config.settings") as mock_settings:
-        mock_settings.LOG_JSON = True
-        try:
+    try:
+        with patch("lineaihelper.logging_config.settings.LOG_JSON", True):
             setup_logging()
             # 觸發一次日誌輸出以確保 sink 正常運作
             logger.info("Test JSON log sink")
-        except KeyError as e:
-            pytest.fail(
-                f"KeyError detected in JSON logging: {e}. "
-                "Check if format_map is being misused."
-            )
-        except Exception as e:
-            pytest.fail(f"setup_logging failed in JSON mode: {e}")
-        finally:
-            # 測試完畢後恢復日誌設定，避免影響其他測試
-            setup_logging()
+    except KeyError as e:
+        pytest.fail(
+            f"KeyError detected in JSON logging: {e}. "
+            "Check if format_map is being misused."
+        )
+    except Exception as e:
+        pytest.fail(f"setup_logging failed in JSON mode: {e}")
+    finally:
+        # 關閉測試建立的管線 (背景執行緒與檔案)，並於還原 LOG_JSON 後恢復原本的設定
+        shutdown_logging()
+        setup_logging()
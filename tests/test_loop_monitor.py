@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import TYPE_CHECKING, List
+
+import pytest
+from loguru import logger
+
+from lineaihelper.context import trace_id_var
+from lineaihelper.loop_monitor import LOOP_BLOCKED, LOOP_LAG, LoopLagMonitor
+
+if TYPE_CHECKING:
+    from loguru import Record
+
+
+def blocking_call() -> None:
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_blocked_loop_is_reported_with_stack_and_trace_id() -> None:
+    records: List["Record"] = []
+    sink_id = logger.add(
+        lambda msg: records.append(msg.record),
+        filter=lambda r: r["message"] == "Event loop blocked",
+    )
+    monitor = LoopLagMonitor(interval=0.02, threshold=0.1)
+    blocked_before = LOOP_BLOCKED.value()
+    observed_before = LOOP_LAG.count()
+
+    async def slow_request() -> None:
+        trace_id_var.set("trace-blocking")
+        blocking_call()
+
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(slow_request())
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+        logger.remove(sink_id)
+
+    assert LOOP_BLOCKED.value() == blocked_before + 1
+    assert LOOP_LAG.count() > observed_before
+    assert len(records) == 1
+    record = records[0]
+    assert record["extra"]["trace_id"] == "trace-blocking"
+    assert "blocking_call" in record["extra"]["extra"]["stack"]
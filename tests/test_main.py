@@ -1,6 +1,22 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from linebot.v3.exceptions import InvalidSignatureError
+import pytest
+from fastapi.testclient import TestClient
+
+import lineaihelper.main as main_module
+from lineaihelper.config import settings
+from lineaihelper.durable_queue import DurableQueue
+from lineaihelper.idempotency import InFlightJob
+from lineaihelper.main import app
+from lineaihelper.profiling import RequestProfiler
+from lineaihelper.webhook import TextMessageEvent, from_payload
 
 
 def test_read_root(client: MagicMock) -> None:
@@ -15,6 +31,34 @@ def test_health_check(client: MagicMock) -> None:
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
+    assert response.json()["jobs"] == {"queued": 0, "in_flight": 0}
+
+
+def test_readiness_check(client: MagicMock) -> None:
+    readiness = client.app.state.readiness
+    client.portal.call(readiness.wait)
+
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["warmup"]["prompts"]["status"] == "ok"
+    assert set(data["dependencies"]) == {"yahoo", "gemini", "line"}
+
+
+def test_metrics_endpoint(client: MagicMock) -> None:
+    client.post("/callback", content=b"{}")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "linenexus_jobs_queued 0.0" in response.text
+    assert (
+        'linenexus_requests_total{component="callback",operation="/callback",'
+        'outcome="error"}' in response.text
+    )
 
 
 def test_callback_no_signature(client: MagicMock) -> None:
@@ -23,33 +67,174 @@ def test_callback_no_signature(client: MagicMock) -> None:
     assert response.json()["detail"] == "Missing signature"
 
 
+def _sign(body: bytes) -> str:
+    digest = hmac.new(
+        settings.LINE_CHANNEL_SECRET.encode("utf-8"), body, hashlib.sha256
+    ).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
 def test_callback_invalid_signature(client: MagicMock) -> None:
-    with patch("lineaihelper.main.handler.handle") as mock_handle:
-        mock_handle.side_effect = InvalidSignatureError()
-        response = client.post(
-            "/callback",
-            headers={"X-Line-Signature": "invalid_sig"},
-            content="test body",
-        )
-        assert response.status_code == 400
-        assert response.json()["detail"] == "Invalid signature"
+    response = client.post(
+        "/callback",
+        headers={"X-Line-Signature": "invalid_sig"},
+        content="test body",
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid signature"
+
+
+def test_callback_invalid_payload(client: MagicMock) -> None:
+    body = b"test body"
+    response = client.post(
+        "/callback", headers={"X-Line-Signature": _sign(body)}, content=body
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid payload"
+
+
+def test_callback_malformed_events(client: MagicMock) -> None:
+    body = b'{"events": [42]}'
+    response = client.post(
+        "/callback", headers={"X-Line-Signature": _sign(body)}, content=body
+    )
+    assert response.status_code == 400
 
 
 def test_callback_success(client: MagicMock) -> None:
-    with patch("lineaihelper.main.handler.handle") as mock_handle:
+    payload = {
+        "destination": "U0",
+        "events": [
+            {
+                "type": "message",
+                "replyToken": f"token-{i}",
+                "timestamp": 1700000000000,
+                "source": {"type": "user", "userId": "U123"},
+                "message": {"type": "text", "id": str(i), "text": f".price {i}"},
+            }
+            for i in range(3)
+        ]
+        + [{"type": "follow", "replyToken": "t", "source": {"type": "user"}}],
+    }
+    body = json.dumps(payload).encode("utf-8")
+    with patch("lineaihelper.main.handle_message") as mock_handle:
         response = client.post(
-            "/callback",
-            headers={"X-Line-Signature": "valid_sig"},
-            content="test body",
+            "/callback", headers={"X-Line-Signature": _sign(body)}, content=body
         )
         assert response.status_code == 200
         assert response.text == '"OK"'
+        assert mock_handle.call_count == 3
+        assert mock_handle.call_args.args[0].text == ".price 2"
+
+
+def test_callback_drops_redelivered_event(client: MagicMock) -> None:
+    event = {
+        "type": "message",
+        "replyToken": "token",
+        "timestamp": 1700000000000,
+        "webhookEventId": "01HDUPLICATE",
+        "deliveryContext": {"isRedelivery": False},
+        "source": {"type": "user", "userId": "U123"},
+        "message": {"type": "text", "id": "1", "text": ".help"},
+    }
+    redelivered = {**event, "deliveryContext": {"isRedelivery": True}}
+    with patch("lineaihelper.main.handle_message") as mock_handle:
+        for payload in ({"events": [event]}, {"events": [redelivered]}):
+            body = json.dumps(payload).encode("utf-8")
+            response = client.post(
+                "/callback", headers={"X-Line-Signature": _sign(body)}, content=body
+            )
+            assert response.status_code == 200
         mock_handle.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_attached_redelivery_stops_waiting_after_job_budget(
+    client: MagicMock,
+) -> None:
+    expired = time.time() - settings.JOB_BUDGET_SECONDS - 1
+    event = TextMessageEvent(
+        reply_token="token",
+        text=".help",
+        timestamp=int(expired * 1000),
+        webhook_event_id="01HATTACHED",
+        is_redelivery=True,
+    )
+    # 原始工作永遠不會結束
+    with patch.object(app.state.line_client, "reply", AsyncMock()) as reply:
+        main_module.handle_message(event, attach_to=InFlightJob())
+        await asyncio.wait_for(asyncio.gather(*main_module._background_tasks), 1)
+    reply.assert_not_awaited()
+
+
+def test_callback_enqueues_events_in_ingress_mode(tmp_path: Path) -> None:
+    event = {
+        "type": "message",
+        "replyToken": "token",
+        "timestamp": 1700000000000,
+        "webhookEventId": "01HINGRESS",
+        "source": {"type": "user", "userId": "U123"},
+        "message": {"type": "text", "id": "1", "text": ".help"},
+    }
+    body = json.dumps({"events": [event, event]}).encode("utf-8")
+    path = str(tmp_path / "jobs.db")
+    with (
+        patch.object(settings, "PROCESS_ROLE", "ingress"),
+        patch.object(settings, "DURABLE_QUEUE_PATH", path),
+        patch("lineaihelper.main.handle_message") as mock_handle,
+        TestClient(app) as client,
+    ):
+        response = client.post(
+            "/callback", headers={"X-Line-Signature": _sign(body)}, content=body
+        )
+        assert response.status_code == 200
+        mock_handle.assert_not_called()
+
+    leases = DurableQueue(path).claim(limit=5)
+    assert len(leases) == 1
+    queued, context = from_payload(leases[0].payload)
+    assert queued.text == ".help"
+    assert context["trace_id"] == response.headers["x-trace-id"]
+
+
 def test_start() -> None:
     with patch("uvicorn.run") as mock_run:
         from lineaihelper.main import start
 
         start()
         mock_run.assert_called_once()
+
+
+def test_purge_chat_cache_disabled_without_admin_token(client: MagicMock) -> None:
+    response = client.post("/admin/chat-cache/purge")
+    assert response.status_code == 404
+
+
+def test_purge_chat_cache(client: MagicMock) -> None:
+    with patch("lineaihelper.main.settings.ADMIN_TOKEN", "secret"):
+        forbidden = client.post(
+            "/admin/chat-cache/purge", headers={"x-admin-token": "wrong"}
+        )
+        assert forbidden.status_code == 403
+
+        chat_service = client.app.state.dispatcher.get_service(".chat")
+        chat_service.answer_cache.put("台積電會漲嗎", "可能")
+        response = client.post(
+            "/admin/chat-cache/purge", headers={"x-admin-token": "secret"}
+        )
+        assert response.status_code == 200
+        assert response.json() == {"purged": 1}
+
+
+def test_arm_profiler(client: MagicMock) -> None:
+    with patch("lineaihelper.main.settings.ADMIN_TOKEN", "secret"):
+        headers = {"x-admin-token": "secret"}
+        # 未啟用剖析時視同端點不存在
+        assert client.post("/admin/profile", headers=headers).status_code == 404
+
+        client.app.state.profiler = RequestProfiler()
+        response = client.post(
+            "/admin/profile", params={"count": 2, "user_id": "U1"}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json() == {"armed": 2}
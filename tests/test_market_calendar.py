@@ -0,0 +1,111 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from lineaihelper.market_calendar import (
+    FreshnessPolicy,
+    MarketCalendar,
+    exchange_for_symbol,
+)
+from lineaihelper.models.market_data import PriceQuote
+from lineaihelper.providers.cached_provider import CachedDataProvider
+from lineaihelper.readiness import MarketOpenWarmer
+
+TAIPEI = ZoneInfo("Asia/Taipei")
+NEW_YORK = ZoneInfo("America/New_York")
+CALENDAR = MarketCalendar.load()
+
+
+def at(tz: ZoneInfo, year: int, month: int, day: int, hour: int, minute: int) -> float:
+    return datetime(year, month, day, hour, minute, tzinfo=tz).timestamp()
+
+
+def test_exchange_for_symbol() -> None:
+    assert exchange_for_symbol("2330") == "TWSE"
+    assert exchange_for_symbol("6488.two") == "TPEx"
+    assert exchange_for_symbol("^TWII") == "TWSE"
+    assert exchange_for_symbol("AAPL") == "NYSE"
+    assert exchange_for_symbol("BRK-B") == "NYSE"
+    assert exchange_for_symbol("BTC-USD") is None
+    assert exchange_for_symbol("7203.T") is None
+
+
+def test_bundled_calendar_skips_holidays_and_weekends() -> None:
+    twse = CALENDAR.exchanges["TWSE"]
+    assert CALENDAR.exchanges["TPEx"].holidays == twse.holidays
+    assert not twse.is_trading_day(date(2026, 10, 9))  # 國慶日補假
+
+    now = datetime(2026, 10, 8, 14, 0, tzinfo=TAIPEI)
+    assert twse.next_open(now) == datetime(2026, 10, 12, 9, 0, tzinfo=TAIPEI)
+
+    nyse = CALENDAR.exchanges["NYSE"]
+    session = nyse.session(date(2026, 11, 27))  # 感恩節隔日提前收盤
+    assert session is not None
+    assert session[1] == datetime(2026, 11, 27, 13, 0, tzinfo=NEW_YORK)
+
+
+@pytest.mark.parametrize(
+    ("symbol", "now", "expected"),
+    [
+        # 盤中與收盤後確認期使用短 TTL
+        ("2330", at(TAIPEI, 2026, 10, 19, 10, 0), 10.0),
+        ("2330", at(TAIPEI, 2026, 10, 19, 13, 45), 10.0),
+        # 收盤後快取到下一個交易日開盤
+        ("2330", at(TAIPEI, 2026, 10, 19, 22, 0), 11 * 3600),
+        # 週末與提前收盤日延長至下次開盤
+        ("2330", at(TAIPEI, 2026, 10, 17, 9, 0), 48 * 3600),
+        ("AAPL", at(NEW_YORK, 2026, 11, 27, 14, 0), 67.5 * 3600),
+        # 全天交易的代碼不適用日曆
+        ("BTC-USD", at(TAIPEI, 2026, 10, 17, 9, 0), 10.0),
+    ],
+)
+def test_freshness_ttl_follows_sessions(
+    symbol: str, now: float, expected: float
+) -> None:
+    policy = FreshnessPolicy(CALENDAR, max_ttl=7 * 86400, clock=lambda: now)
+    assert policy.ttl(symbol, 10.0) == expected
+
+
+def test_freshness_ttl_is_capped() -> None:
+    now = at(TAIPEI, 2026, 10, 17, 9, 0)
+    policy = FreshnessPolicy(CALENDAR, max_ttl=6 * 3600, clock=lambda: now)
+    assert policy.ttl("2330", 10.0) == 6 * 3600
+
+
+@pytest.mark.asyncio
+async def test_cached_provider_keeps_quotes_until_next_open() -> None:
+    inner = MagicMock()
+    inner.get_quote = AsyncMock(
+        return_value=PriceQuote(symbol="2330.TW", current_price=100.0)
+    )
+    elapsed = [0.0]
+    friday_night = at(TAIPEI, 2026, 10, 16, 22, 0)
+    provider = CachedDataProvider(
+        inner,
+        quote_ttl=10,
+        clock=lambda: elapsed[0],
+        freshness=FreshnessPolicy(
+            CALENDAR, max_ttl=7 * 86400, clock=lambda: friday_night + elapsed[0]
+        ),
+    )
+
+    await provider.get_quote("2330")
+    elapsed[0] = 86400.0
+    await provider.get_quote("2330")
+    assert inner.get_quote.call_count == 1
+
+
+def test_market_open_warmer_groups_symbols_by_next_open() -> None:
+    now = at(TAIPEI, 2026, 10, 19, 20, 0)
+    warmer = MarketOpenWarmer(
+        CALENDAR,
+        ["2330", "0050", "AAPL", "BTC-USD"],
+        AsyncMock(),
+        delay=5.0,
+        clock=lambda: now,
+    )
+
+    # 台北 20:00 時紐約尚未開盤 (21:30 台北時間)，先於美股開盤預抓
+    assert warmer.next_run() == (1.5 * 3600 + 5.0, ["AAPL"])
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+
+from lineaihelper.metrics import LATENCY, REQUESTS, MetricsRegistry, observe, track
+
+
+def test_render_text_exposition_format() -> None:
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo counter.", ("route",))
+    histogram = registry.histogram(
+        "demo_seconds", "Demo latency.", ("route",), buckets=(0.1, 1.0)
+    )
+    gauge = registry.gauge("demo_depth", "Demo gauge.")
+
+    counter.inc('/cb"x')
+    histogram.observe(0.05, "/cb")
+    histogram.observe(0.5, "/cb")
+    histogram.observe(5.0, "/cb")
+    gauge.set_function(lambda: 3)
+
+    text = registry.render()
+
+    assert "# TYPE demo_total counter" in text
+    assert 'demo_total{route="/cb\\"x"} 1.0' in text
+    assert 'demo_seconds_bucket{route="/cb",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{route="/cb",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{route="/cb",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{route="/cb"} 3' in text
+    assert "demo_seconds_sum" in text
+    assert "demo_depth 3.0" in text
+
+
+def test_duplicate_metric_names_are_rejected() -> None:
+    registry = MetricsRegistry()
+    registry.counter("dup_total", "x")
+    with pytest.raises(ValueError):
+        registry.gauge("dup_total", "y")
+
+
+@pytest.mark.asyncio
+async def test_track_records_outcome_and_latency() -> None:
+    before = LATENCY.count("test", "op")
+
+    with track("test", "op"):
+        await asyncio.sleep(0)
+    with pytest.raises(RuntimeError), track("test", "op"):
+        raise RuntimeError("boom")
+    observe("test", "op", "ok", 0.01)
+
+    assert REQUESTS.value("test", "op", "ok") >= 2
+    assert REQUESTS.value("test", "op", "error") >= 1
+    assert LATENCY.count("test", "op") == before + 3
+
+
+def test_thread_safe_counter_counts_updates_from_threads() -> None:
+    counter = MetricsRegistry().counter("threaded_total", "Demo.", thread_safe=True)
+
+    def work() -> None:
+        for _ in range(10_000):
+            counter.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value() == 40_000
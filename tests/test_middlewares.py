@@ -0,0 +1,60 @@
+from typing import Dict, List, Tuple
+
+import pytest
+from starlette.types import Message, Receive, Scope, Send
+
+from lineaihelper.context import trace_id_var
+from lineaihelper.middlewares import TraceIdMiddleware
+
+seen: List[str] = []
+
+
+async def run(
+    middleware: TraceIdMiddleware, path: str, headers: List[Tuple[bytes, bytes]]
+) -> Dict[bytes, bytes]:
+    scope: Scope = {"type": "http", "method": "GET", "path": path, "headers": headers}
+    sent: List[Message] = []
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b""}
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    await middleware(scope, receive, send)
+    return dict(sent[0]["headers"])
+
+
+async def app(scope: Scope, receive: Receive, send: Send) -> None:
+    seen.append(trace_id_var.get())
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.fixture(autouse=True)
+def reset_seen() -> None:
+    seen.clear()
+
+
+@pytest.mark.asyncio
+async def test_propagates_incoming_trace_id() -> None:
+    middleware = TraceIdMiddleware(app)
+
+    headers = await run(middleware, "/callback", [(b"x-trace-id", b"abc")])
+
+    assert seen == ["abc"]
+    assert headers[b"x-trace-id"] == b"abc"
+    assert b"x-request-id" in headers
+    assert trace_id_var.get() == "system"
+
+
+@pytest.mark.asyncio
+async def test_generates_ids_and_skips_allowlisted_paths() -> None:
+    middleware = TraceIdMiddleware(app, skip_paths=["/health"])
+
+    traced = await run(middleware, "/callback", [])
+    skipped = await run(middleware, "/health", [])
+
+    assert traced[b"x-trace-id"].decode() == seen[0] != "system"
+    assert seen[1] == "system"
+    assert b"x-trace-id" not in skipped
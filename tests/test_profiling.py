@@ -0,0 +1,51 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from lineaihelper.profiling import (
+    RequestProfiler,
+    list_profiles,
+    profile_path,
+    summarize,
+)
+
+
+def busy_work() -> int:
+    return sum(i * i for i in range(20_000))
+
+
+@pytest.mark.asyncio
+async def test_profile_follows_job_across_awaits(tmp_path: Path) -> None:
+    profiler = RequestProfiler(str(tmp_path))
+
+    async with profiler.profile("trace/../1") as path:
+        await asyncio.sleep(0)
+        busy_work()
+
+    assert path == profile_path(str(tmp_path), "trace/../1")
+    assert path is not None and path.parent == tmp_path
+    assert list_profiles(str(tmp_path)) == [path]
+    assert "busy_work" in summarize(path, sort="tottime", limit=10)
+
+
+@pytest.mark.asyncio
+async def test_only_one_profile_at_a_time(tmp_path: Path) -> None:
+    profiler = RequestProfiler(str(tmp_path))
+
+    async with profiler.profile("outer") as outer:
+        async with profiler.profile("inner") as inner:
+            assert inner is None
+    assert outer is not None and outer.exists()
+
+
+def test_armed_profiles_are_claimed_per_user() -> None:
+    profiler = RequestProfiler()
+    profiler.arm(count=1, user_id="U1")
+    profiler.arm(count=2)
+
+    assert profiler.armed == 3
+    assert profiler.claim("U1")
+    assert profiler.claim("U2")
+    assert profiler.claim("U1")
+    assert not profiler.claim("U1")
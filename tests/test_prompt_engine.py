@@ -1,5 +1,6 @@
 import textwrap
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
@@ -49,3 +50,15 @@ def test_prompt_not_found() -> None:
     engine = PromptEngine()
     with pytest.raises(FileNotFoundError):
         engine.get_prompt("non_existent")
+
+
+def test_warm_compiles_templates_once(tmp_path: Path) -> None:
+    (tmp_path / "chat").mkdir()
+    prompt_file = tmp_path / "chat" / "latest.md"
+    prompt_file.write_text("Hi {{ name }}", encoding="utf-8")
+    engine = PromptEngine(prompts_dir=tmp_path)
+
+    assert engine.warm() == 1
+    with patch.object(engine, "get_prompt") as get_prompt:
+        assert engine.render("chat", {"name": "A"}) == "Hi A"
+    get_prompt.assert_not_called()
@@ -0,0 +1,57 @@
+import pytest
+
+from lineaihelper.rate_limiter import RateLimiter
+
+USER_LIMITS = {"default": 10, ".stock": 2}
+GROUP_LIMITS = {"default": 30, ".stock": 3}
+
+
+def test_per_command_user_limit_and_refill() -> None:
+    now = [0.0]
+    limiter = RateLimiter(USER_LIMITS, GROUP_LIMITS, clock=lambda: now[0])
+
+    assert limiter.allow(".stock", user_id="U1")
+    assert limiter.allow(".stock", user_id="U1")
+    assert not limiter.allow(".stock", user_id="U1")
+    # 其他指令與其他使用者不受影響
+    assert limiter.allow(".price", user_id="U1")
+    assert limiter.allow(".stock", user_id="U2")
+
+    # .stock 每分鐘 2 次 => 30 秒補充 1 次
+    now[0] = 30.0
+    assert limiter.allow(".stock", user_id="U1")
+
+
+def test_group_limit_applies_across_users() -> None:
+    limiter = RateLimiter(USER_LIMITS, GROUP_LIMITS, clock=lambda: 0.0)
+
+    for user in ("U1", "U2", "U3"):
+        assert limiter.allow(".stock", user_id=user, group_id="G1")
+    assert not limiter.allow(".stock", user_id="U4", group_id="G1")
+    assert limiter.allow(".stock", user_id="U4", group_id="G2")
+
+
+def test_rejection_does_not_consume_other_buckets() -> None:
+    limiter = RateLimiter(USER_LIMITS, {"default": 1}, clock=lambda: 0.0)
+
+    assert limiter.allow(".price", user_id="U1", group_id="G1")
+    assert not limiter.allow(".price", user_id="U1", group_id="G1")
+    # 使用者額度未因群組拒絕而被扣除 (default 10 次)
+    for _ in range(9):
+        assert limiter.allow(".price", user_id="U1")
+    assert not limiter.allow(".price", user_id="U1")
+
+
+def test_multi_command_checks_every_bucket_before_consuming() -> None:
+    limiter = RateLimiter(USER_LIMITS, GROUP_LIMITS, clock=lambda: 0.0)
+    assert limiter.allow(".stock", user_id="U1")
+
+    # .stock 只剩 1 次，兩個 .stock 的訊息整體拒絕，.price 的額度也不扣除
+    assert not limiter.allow_all([".price", ".stock", ".stock"], user_id="U1")
+    assert limiter.allow_all([".price"] * 10, user_id="U1")
+    assert limiter.allow(".stock", user_id="U1")
+
+
+def test_limits_require_default_entry() -> None:
+    with pytest.raises(ValueError, match="default"):
+        RateLimiter(USER_LIMITS, {".stock": 3})
@@ -0,0 +1,102 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from lineaihelper.readiness import (
+    DependencyProbes,
+    LatencyWindow,
+    Readiness,
+    warmup_steps,
+)
+
+
+@pytest.mark.asyncio
+async def test_readiness_turns_ready_after_all_steps() -> None:
+    release = asyncio.Event()
+    order = []
+
+    async def slow() -> None:
+        await release.wait()
+        order.append("slow")
+
+    async def failing() -> None:
+        raise RuntimeError("upstream down")
+
+    readiness = Readiness([("slow", slow), ("failing", failing)], timeout=5)
+    readiness.start()
+    await asyncio.sleep(0.01)
+    assert not readiness.ready
+    assert readiness.results["slow"] == {"status": "running"}
+    assert readiness.results["failing"] == {"status": "pending"}
+
+    release.set()
+    await asyncio.wait_for(readiness.wait(), 1)
+    # 預熱失敗只記錄，不阻擋就緒
+    assert readiness.results["slow"]["status"] == "ok"
+    assert readiness.results["failing"]["status"] == "failed"
+    await readiness.stop()
+
+
+@pytest.mark.asyncio
+async def test_readiness_gives_up_after_timeout() -> None:
+    async def hang() -> None:
+        await asyncio.sleep(10)
+
+    readiness = Readiness([("hang", hang)], timeout=0.05)
+    readiness.start()
+    await asyncio.wait_for(readiness.wait(), 1)
+    assert readiness.ready
+
+
+@pytest.mark.asyncio
+async def test_dependency_probes_record_latency_and_errors() -> None:
+    async def fast() -> None:
+        await asyncio.sleep(0)
+
+    async def broken() -> None:
+        raise ConnectionError("refused")
+
+    async def hang() -> None:
+        await asyncio.sleep(10)
+
+    probes = DependencyProbes(
+        {"yahoo": fast, "gemini": broken, "line": hang}, timeout=0.05
+    )
+    await probes.probe_all()
+    await probes.probe_all()
+
+    snapshot = probes.snapshot()
+    assert snapshot["yahoo"]["samples"] == 2
+    assert snapshot["yahoo"]["errors"] == 0
+    assert snapshot["yahoo"]["last_ok"] is True
+    assert "p95_ms" in snapshot["yahoo"]
+    assert snapshot["gemini"]["errors"] == 2
+    assert snapshot["line"]["last_ok"] is False
+    assert snapshot["line"]["last_ms"] >= 50
+
+
+def test_latency_window_keeps_recent_samples() -> None:
+    window = LatencyWindow(size=3)
+    assert window.snapshot() == {"samples": 0}
+    for seconds in (1.0, 0.1, 0.2, 0.3):
+        window.add(seconds, ok=True)
+
+    snapshot = window.snapshot()
+    assert snapshot["samples"] == 3
+    assert snapshot["p50_ms"] == 200.0
+    assert snapshot["p95_ms"] == 300.0
+
+
+@pytest.mark.asyncio
+async def test_connections_step_issues_real_requests() -> None:
+    deps = MagicMock()
+    deps.gemini_client.aio.models.get = AsyncMock()
+    line_client = MagicMock()
+    line_client.api.get_bot_info = AsyncMock()
+
+    steps = dict(warmup_steps(deps, line_client, [], "gemini-test"))
+    await steps["connections"]()
+
+    line_client.api.get_bot_info.assert_awaited_once()
+    deps.gemini_client.aio.models.get.assert_awaited_once_with(model="gemini-test")
@@ -0,0 +1,98 @@
+from typing import List
+from unittest.mock import AsyncMock
+
+import pytest
+
+from lineaihelper.exceptions import CircuitOpenError, ExternalAPIError
+from lineaihelper.resilience import CircuitBreaker, Resilience, RetryPolicy
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_retry_delay_is_jittered_and_capped() -> None:
+    policy = RetryPolicy(attempts=5, base_delay=0.5, max_delay=2.0, rand=lambda: 1.0)
+    assert [policy.delay(n) for n in range(1, 5)] == [0.5, 1.0, 2.0, 2.0]
+    assert RetryPolicy(rand=lambda: 0.0).delay(3) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_retries_upstream_failures_only() -> None:
+    delays: List[float] = []
+
+    async def sleep(seconds: float) -> None:
+        delays.append(seconds)
+
+    resilience = Resilience(
+        "test-retry",
+        retry=RetryPolicy(attempts=3, rand=lambda: 1.0),
+        is_failure=lambda e: not isinstance(e, ValueError),
+        sleep=sleep,
+    )
+
+    flaky = AsyncMock(side_effect=[ExternalAPIError("503"), "ok"])
+    assert await resilience.call(flaky) == "ok"
+    assert flaky.call_count == 2
+    assert delays == [0.2]
+
+    not_found = AsyncMock(side_effect=ValueError("not found"))
+    with pytest.raises(ValueError):
+        await resilience.call(not_found)
+    assert not_found.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_breaker_counts_one_failure_per_call() -> None:
+    breaker = CircuitBreaker("test-per-call", failure_threshold=2)
+    resilience = Resilience(
+        "test-per-call",
+        retry=RetryPolicy(attempts=3, rand=lambda: 0.0),
+        breaker=breaker,
+    )
+    failing = AsyncMock(side_effect=ExternalAPIError("503"))
+
+    with pytest.raises(ExternalAPIError):
+        await resilience.call(failing)
+    assert failing.call_count == 3
+    assert breaker.state == "closed"
+
+    with pytest.raises(ExternalAPIError):
+        await resilience.call(failing)
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_fails_fast_and_recovers_after_probe() -> None:
+    clock = Clock()
+    breaker = CircuitBreaker(
+        "test-breaker", failure_threshold=2, reset_timeout=30, clock=clock
+    )
+    resilience = Resilience(
+        "test-breaker", retry=RetryPolicy(attempts=1), breaker=breaker
+    )
+    failing = AsyncMock(side_effect=ExternalAPIError("503"))
+
+    for _ in range(2):
+        with pytest.raises(ExternalAPIError):
+            await resilience.call(failing)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        await resilience.call(failing)
+    assert failing.call_count == 2
+
+    # 冷卻後放行一個試探請求；失敗即重新斷路
+    clock.now = 31.0
+    with pytest.raises(ExternalAPIError):
+        await resilience.call(failing)
+    with pytest.raises(CircuitOpenError):
+        await resilience.call(failing)
+
+    clock.now = 62.0
+    assert await resilience.call(AsyncMock(return_value="ok")) == "ok"
+    assert breaker.state == "closed"
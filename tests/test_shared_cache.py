@@ -0,0 +1,74 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from lineaihelper.shared_cache import SharedCache, SQLiteStore
+
+
+def test_store_expires_entries_and_add_is_exclusive(tmp_path: Path) -> None:
+    now = [1000.0]
+    store = SQLiteStore(str(tmp_path / "kv.db"), clock=lambda: now[0])
+
+    store.set("a", b"1", ttl=10)
+    store.set("forever", b"2", ttl=float("inf"))
+    assert store.get("a") == b"1"
+    assert store.add("lock", b"", ttl=5) is True
+    assert store.add("lock", b"", ttl=5) is False
+
+    now[0] += 11
+    assert store.get("a") is None
+    assert store.get("forever") == b"2"
+    assert store.add("lock", b"", ttl=5) is True
+    assert store.purge() == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_round_trips_values_between_instances(
+    tmp_path: Path,
+) -> None:
+    path = str(tmp_path / "kv.db")
+    writer = SharedCache(SQLiteStore(path), "result")
+    reader = SharedCache(SQLiteStore(path), "result")
+    other = SharedCache(SQLiteStore(path), "chat")
+
+    await writer.set((".help", ""), "help text", ttl=60)
+
+    assert await reader.get((".help", "")) == "help text"
+    assert await other.get((".help", "")) is None
+
+
+@pytest.mark.asyncio
+async def test_set_if_absent_deduplicates_across_instances(tmp_path: Path) -> None:
+    path = str(tmp_path / "kv.db")
+    first = SharedCache(SQLiteStore(path), "idempotency")
+    second = SharedCache(SQLiteStore(path), "idempotency")
+
+    assert await first.set_if_absent("event-1", ttl=60) is True
+    assert await second.set_if_absent("event-1", ttl=60) is False
+
+
+@pytest.mark.asyncio
+async def test_follower_stops_waiting_when_leader_fails(tmp_path: Path) -> None:
+    path = str(tmp_path / "kv.db")
+    leader = SharedCache(SQLiteStore(path), "provider", poll_interval=0.01)
+    follower = SharedCache(SQLiteStore(path), "provider", poll_interval=0.01)
+    calls = []
+
+    async def failing() -> str:
+        calls.append("leader")
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    async def succeeding() -> str:
+        calls.append("follower")
+        return "ok"
+
+    leader_task = asyncio.ensure_future(leader.get_or_fetch("k", 60, failing))
+    await asyncio.sleep(0.01)  # 確保 leader 先取得租約
+    follower_result = await follower.get_or_fetch("k", 60, succeeding)
+
+    with pytest.raises(RuntimeError):
+        await leader_task
+    assert follower_result == "ok"
+    assert calls == ["leader", "follower"]
@@ -0,0 +1,38 @@
+from lineaihelper.similarity_cache import NearDuplicateCache, normalize_text
+
+
+def test_normalize_text() -> None:
+    assert normalize_text("台積電會漲嗎") == "台積電會漲"
+    assert normalize_text("台積電 會不會漲？") == "台積電會漲"
+    assert normalize_text("ＴＳＭＣ 有沒有機會") == "tsmc有機會"
+
+
+def test_near_duplicate_hit() -> None:
+    cache = NearDuplicateCache()
+    cache.put("台積電會漲嗎", "答案")
+
+    assert cache.get("台積電 會不會漲") == "答案"
+    assert cache.get("台積電會跌嗎") is None
+    assert cache.get("鴻海會漲嗎") is None
+
+
+def test_ttl_expiry() -> None:
+    now = [0.0]
+    cache = NearDuplicateCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.put("今天天氣如何", "晴天")
+    assert cache.get("今天天氣如何") == "晴天"
+
+    now[0] = 11.0
+    assert cache.get("今天天氣如何") is None
+
+
+def test_memory_bound_and_purge() -> None:
+    cache = NearDuplicateCache(max_entries=2)
+    cache.put("第一個問題", "1")
+    cache.put("第二個問題", "2")
+    cache.put("完全不同的內容", "3")
+
+    assert len(cache) == 2
+    assert cache.get("第一個問題") is None
+    assert cache.purge() == 2
+    assert cache.get("完全不同的內容") is None
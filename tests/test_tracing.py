@@ -0,0 +1,81 @@
+import asyncio
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from lineaihelper import tracing
+from lineaihelper.context import trace_id_var
+from lineaihelper.tracing import (
+    STATUS_ERROR,
+    SpanExporter,
+    find_trace,
+    format_waterfall,
+    span,
+)
+
+TRACE_ID = "4bf92f35-77b3-4da6-a3ce-929d0e0e4736"
+
+
+@pytest.fixture
+def exporter(tmp_path: Path) -> Iterator[SpanExporter]:
+    exporter = SpanExporter(str(tmp_path / "traces.jsonl"))
+    tracing.configure(1.0, exporter)
+    token = trace_id_var.set(TRACE_ID)
+    yield exporter
+    trace_id_var.reset(token)
+    tracing.configure(0.0, None)
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_tasks_and_export_otlp(
+    exporter: SpanExporter,
+) -> None:
+    async def provider_call() -> None:
+        with span("provider.get_quote"):
+            await asyncio.sleep(0)
+
+    with span("POST /callback"):
+        with span("dispatch", command=".price"):
+            await asyncio.gather(provider_call(), provider_call())
+        with pytest.raises(RuntimeError), span("line.reply"):
+            raise RuntimeError("boom")
+
+    assert exporter.flush() == 5
+    spans = find_trace(exporter.path, TRACE_ID)
+
+    by_name = {s.name: s for s in spans}
+    root = by_name["POST /callback"]
+    assert root.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert root.parent_span_id == ""
+    assert by_name["dispatch"].parent_span_id == root.span_id
+    assert by_name["dispatch"].attributes["command"] == ".price"
+    assert by_name["line.reply"].status == STATUS_ERROR
+    quotes = [s for s in spans if s.name == "provider.get_quote"]
+    assert {s.parent_span_id for s in quotes} == {by_name["dispatch"].span_id}
+
+    waterfall = format_waterfall(spans)
+    assert waterfall.splitlines()[1].endswith("POST /callback")
+    assert "    provider.get_quote" in waterfall
+
+
+def test_unsampled_traces_are_not_recorded(tmp_path: Path) -> None:
+    exporter = SpanExporter(str(tmp_path / "traces.jsonl"))
+    tracing.configure(0.0, exporter)
+    try:
+        with span("POST /callback") as current:
+            assert current is None
+        assert exporter.flush() == 0
+    finally:
+        tracing.configure(0.0, None)
+
+
+def test_sampling_is_consistent_per_trace() -> None:
+    tracer = tracing.Tracer(0.5, SpanExporter("unused"))
+    decisions = {tracer.is_sampled(f"trace-{i}") for i in range(200)}
+
+    assert decisions == {True, False}
+    assert all(
+        tracer.is_sampled(f"trace-{i}") == tracer.is_sampled(f"trace-{i}")
+        for i in range(50)
+    )
@@ -0,0 +1,38 @@
+import math
+
+from lineaihelper.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl() -> None:
+    clock = FakeClock()
+    cache: TTLCache[str, str] = TTLCache(clock=clock)
+    cache.set("a", "1", ttl=5)
+    cache.set("b", "2", ttl=math.inf)
+
+    clock.now = 4.9
+    assert cache.get("a") == "1"
+    clock.now = 5.0
+    assert cache.get("a") is None
+    clock.now = 1e9
+    assert cache.get("b") == "2"
+
+
+def test_lru_eviction_respects_recent_use() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
@@ -0,0 +1,94 @@
+import base64
+import hashlib
+import hmac
+import json
+from typing import Any, Dict
+
+import pytest
+
+from lineaihelper.webhook import (
+    InvalidSignatureError,
+    parse_events,
+    parse_webhook,
+    verify_signature,
+)
+
+SECRET = "channel-secret"
+
+
+def _sign(body: bytes) -> str:
+    digest = hmac.new(SECRET.encode("utf-8"), body, hashlib.sha256).digest()
+    return base64.b64encode(digest).decode("utf-8")
+
+
+def test_verify_signature() -> None:
+    body = b'{"events": []}'
+    assert verify_signature(body, _sign(body), SECRET)
+    assert not verify_signature(body, "bad", SECRET)
+
+
+def test_parse_events_filters_text_messages() -> None:
+    body = json.dumps(
+        {
+            "events": [
+                {
+                    "type": "message",
+                    "replyToken": "r1",
+                    "timestamp": 1700000000000,
+                    "webhookEventId": "01H",
+                    "deliveryContext": {"isRedelivery": True},
+                    "source": {"type": "group", "groupId": "G1", "userId": "U1"},
+                    "message": {"type": "text", "id": "1", "text": ".help"},
+                },
+                {
+                    "type": "message",
+                    "replyToken": "r2",
+                    "source": {"type": "user", "userId": "U1"},
+                    "message": {"type": "sticker", "id": "2"},
+                },
+            ]
+        }
+    ).encode("utf-8")
+
+    events = parse_events(body)
+    assert len(events) == 1
+    event = events[0]
+    assert event.text == ".help"
+    assert event.reply_token == "r1"
+    assert event.webhook_event_id == "01H"
+    assert event.is_redelivery
+    assert event.push_target == "G1"
+
+
+def test_parse_webhook_rejects_invalid_signature() -> None:
+    with pytest.raises(InvalidSignatureError):
+        parse_webhook(b"{}", "bad", SECRET)
+
+
+def test_parse_webhook_rejects_invalid_json() -> None:
+    body = b"not json"
+    with pytest.raises(ValueError):
+        parse_webhook(body, _sign(body), SECRET)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"events": {"type": "message"}},
+        {"events": ["not an event"]},
+        {"events": [{"type": "message", "message": "hi"}]},
+        {"events": [{"type": "message", "message": {"type": "text", "text": 1}}]},
+        {
+            "events": [
+                {
+                    "type": "message",
+                    "message": {"type": "text", "text": "hi"},
+                    "source": [],
+                }
+            ]
+        },
+    ],
+)
+def test_parse_events_rejects_malformed_structure(payload: Dict[str, Any]) -> None:
+    with pytest.raises(ValueError):
+        parse_events(json.dumps(payload).encode())
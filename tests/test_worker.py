@@ -0,0 +1,64 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+from lineaihelper.durable_queue import DurableQueue
+from lineaihelper.job_queue import JobQueue
+from lineaihelper.webhook import TextMessageEvent, to_payload
+from lineaihelper.worker import QueueConsumer
+
+
+def _event(i: int) -> TextMessageEvent:
+    return TextMessageEvent(
+        reply_token=f"token-{i}",
+        text=f".price {i}",
+        timestamp=1700000000000,
+        user_id="U1",
+        webhook_event_id=f"event-{i}",
+    )
+
+
+@pytest.mark.asyncio
+async def test_consumer_acks_only_after_jobs_finish(tmp_path: Path) -> None:
+    queue = DurableQueue(str(tmp_path / "jobs.db"))
+    queue.enqueue(
+        [(f"event-{i}", to_payload(_event(i), {"trace_id": "t"})) for i in range(3)]
+        + [("bad", b"not json")]
+    )
+    job_queue = JobQueue(workers=2, max_size=10)
+    job_queue.start()
+    release = asyncio.Event()
+    handled: List[str] = []
+
+    def handle(
+        event: TextMessageEvent, context: Dict[str, Any], on_finish: Callable[[], None]
+    ) -> None:
+        async def job() -> None:
+            await release.wait()
+            handled.append(event.text)
+            on_finish()
+
+        assert context["trace_id"] == "t"
+        job_queue.submit(job)
+
+    consumer = QueueConsumer(queue, job_queue, handle, poll_interval=0.01)
+    stop = asyncio.Event()
+    task = asyncio.create_task(consumer.run(stop))
+    await asyncio.sleep(0.1)
+
+    # 只領取空閒 Worker 數量的工作，處理完成前皆未 ack
+    assert job_queue.in_flight == 2
+    assert job_queue.queue_size == 0
+    assert queue.pending() == 4
+    release.set()
+    await asyncio.sleep(0.2)
+    stop.set()
+    await task
+    await job_queue.stop()
+    await consumer.flush()
+
+    assert sorted(handled) == [".price 0", ".price 1", ".price 2"]
+    # 格式錯誤的工作同樣被移除，不會無限重試
+    assert queue.pending() == 0